@@ -1,30 +1,88 @@
+import os
+import sys
 from flask import Flask, render_template
+from painel.tabelas import PROJETO_DIR, iniciar_registro
+from painel.pacote import NOME_PADRAO as NOME_PACOTE
+from painel.metricas import instalar_metricas
+from painel.auditoria_io import instalar_auditoria_io
+from painel.perfil import instalar_perfil
+from painel.memoria import instalar_memoria
+from painel.inicializacao import Aquecimento, RelatorioInicio, SEM_RELATORIO
 
-def create_app():
+# (módulo, atributo do blueprint, prefixo da URL)
+BLUEPRINTS = [
+    ('geracao_tesouros.routes', 'tesouros_bp', '/tesouros'),
+    ('destino_npc.routes', 'destino_bp', '/destino'),
+    ('geracao_encontros.routes', 'encontros_bp', '/encontros'),
+    ('geracao_hex.routes', 'hex_bp', '/hex'),
+    ('geracao_npcs.routes', 'npcs_bp', '/npcs'),
+    ('geracao_eventos.routes', 'eventos_bp', '/eventos'),
+    ('geracao_rumores.routes', 'rumores_bp', '/rumores'),
+]
+
+def create_app(relatorio=None):
+    """
+    Cria o app. Nada pesado roda aqui: as tabelas JSON e as pastas de dados são
+    preparadas por um aquecimento em segundo plano (ou sob demanda, no primeiro uso).
+    'relatorio' (RelatorioInicio) recebe o tempo de cada fase.
+    """
+    relatorio = relatorio or SEM_RELATORIO
     app = Flask(__name__)
 
     app.config['SECRET_KEY'] = 'uma-string-secreta-bem-aleatoria-98765'
-    
-    from geracao_tesouros.routes import tesouros_bp
-    app.register_blueprint(tesouros_bp, url_prefix='/tesouros')
-    
-    from destino_npc.routes import destino_bp
-    app.register_blueprint(destino_bp, url_prefix='/destino')
-    
-    from geracao_encontros.routes import encontros_bp
-    app.register_blueprint(encontros_bp, url_prefix='/encontros')
-    
-    from geracao_hex.routes import hex_bp
-    app.register_blueprint(hex_bp, url_prefix='/hex')
-    
-    from geracao_npcs.routes import npcs_bp
-    app.register_blueprint(npcs_bp, url_prefix='/npcs')
-    
-    from geracao_eventos.routes import eventos_bp
-    app.register_blueprint(eventos_bp, url_prefix='/eventos')
-
-    from geracao_rumores.routes import rumores_bp
-    app.register_blueprint(rumores_bp, url_prefix='/rumores')
+    # Intervalo mínimo (s) entre checagens de mtime das tabelas JSON; None desativa
+    app.config.setdefault('TABELAS_REVALIDAR_SEGUNDOS', 5.0)
+    # False: o aquecimento roda antes do create_app retornar (útil em scripts e benchmarks)
+    app.config.setdefault('AQUECER_EM_SEGUNDO_PLANO', True)
+    # Depuração de I/O: conta open/stat/walk/listdir por requisição (ver painel/auditoria_io.py)
+    app.config.setdefault('AUDITORIA_IO', os.environ.get('PAINEL_AUDITORIA_IO') == '1')
+    app.config.setdefault('AUDITORIA_IO_ESTRITA', False)
+    app.config.setdefault('ORCAMENTO_IO', {})  # {"/rota": máximo de chamadas, "*": padrão}
+    # /debug/profile: cProfile de uma rota sob demanda (desligado por padrão)
+    app.config.setdefault('DEBUG_PERFIL', os.environ.get('PAINEL_DEBUG_PERFIL') == '1')
+    app.config.setdefault('PERFIL_TOKEN', os.environ.get('PAINEL_PERFIL_TOKEN'))
+    app.config.setdefault('PERFIL_MAX_N', 5000)
+    # /debug/memory: memória residente por blueprint (+ diffs do tracemalloc)
+    app.config.setdefault('DEBUG_MEMORIA', os.environ.get('PAINEL_DEBUG_MEMORIA') == '1')
+    app.config.setdefault('MEMORIA_TRACEMALLOC', os.environ.get('PAINEL_TRACEMALLOC') == '1')
+    # Pacote de dados gerado por 'python -m painel.pacote' (ignorado se não existir)
+    app.config.setdefault('PACOTE_DADOS', os.path.join(PROJETO_DIR, NOME_PACOTE))
+
+    # Registro único de tabelas JSON compartilhado pelos blueprints (leitura sob demanda
+    # até o aquecimento carregar tudo)
+    with relatorio.fase("registro de tabelas"):
+        registro = iniciar_registro(
+            intervalo_revalidacao=app.config['TABELAS_REVALIDAR_SEGUNDOS'], carregar=False,
+            pacote=app.config['PACOTE_DADOS'])
+        app.extensions['tabelas'] = registro
+
+    # Contagem, erros e latência (p50/p95/p99) de cada rota, expostos em /metrics
+    with relatorio.fase("métricas"):
+        instalar_metricas(app)
+        if app.config['AUDITORIA_IO']:
+            instalar_auditoria_io(app)
+        if app.config['DEBUG_PERFIL']:
+            instalar_perfil(app)
+        if app.config['DEBUG_MEMORIA']:
+            instalar_memoria(app)
+
+    with relatorio.fase("motores compartilhados (sorteio, dados)"):
+        import painel.sorteio, painel.rolagem  # noqa: F401 (NumPy só é importado no primeiro lote)
+
+    for modulo, atributo, prefixo in BLUEPRINTS:
+        with relatorio.fase(f"blueprint {prefixo}"):
+            blueprint = getattr(__import__(modulo, fromlist=[atributo]), atributo)
+            app.register_blueprint(blueprint, url_prefix=prefixo)
+
+    from geracao_eventos.routes import garantir_estrutura
+    from geracao_hex.manifesto import validar_manifestos
+    tarefas = [("estrutura de pastas de eventos", garantir_estrutura),
+               ("manifesto de marcos e obstáculos dos hexes", validar_manifestos)]
+    if registro.pacote is None:
+        # Com o pacote de dados as tabelas já estão indexadas e são decodificadas no primeiro uso
+        tarefas.insert(0, ("carregar tabelas JSON", registro.carregar_tudo))
+    aquecimento = Aquecimento(tarefas, relatorio)
+    app.extensions['aquecimento'] = aquecimento.iniciar(app.config['AQUECER_EM_SEGUNDO_PLANO'])
 
     # Rota da página inicial
     @app.route('/')
@@ -47,5 +105,13 @@ def create_app():
     return app
 
 if __name__ == '__main__':
+    if '--startup-report' in sys.argv:
+        # Mostra quanto custa cada fase da inicialização e sai (sem subir o servidor)
+        relatorio = RelatorioInicio()
+        with relatorio.fase("create_app (até poder responder)"):
+            app = create_app(relatorio)
+        app.extensions['aquecimento'].aguardar()
+        relatorio.imprimir()
+        sys.exit(0)
     app = create_app()
     app.run()
\ No newline at end of file
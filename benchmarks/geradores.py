@@ -0,0 +1,258 @@
+"""
+Suíte de benchmarks dos geradores do Painel do Mestre.
+
+Mede operações por segundo e memória de cada ponto de entrada dos blueprints
+com semente fixa, e grava o resultado em JSON para comparar execuções.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.geradores
+    python -m benchmarks.geradores --filtro tesouros --repeticoes 3
+    python -m benchmarks.geradores --saida antes.json
+    python -m benchmarks.geradores --comparar antes.json --tolerancia 10
+"""
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+PROJETO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJETO_DIR not in sys.path:
+    sys.path.insert(0, PROJETO_DIR)
+
+RESULTADOS_DIR = os.path.join(PROJETO_DIR, 'benchmarks', 'resultados')
+
+# ========== REGISTRO DOS CASOS ==========
+
+# Cada caso: (nome, fábrica) — a fábrica devolve [(sufixo, funcao_sem_argumentos, iteracoes), ...]
+CASOS = []
+
+
+def caso(nome):
+    """Registra uma fábrica de casos de benchmark."""
+    def decorador(fabrica):
+        CASOS.append((nome, fabrica))
+        return fabrica
+    return decorador
+
+
+@caso('npcs.gerar_npc')
+def _casos_npc(app):
+    from geracao_npcs.routes import gerar_npc
+    return [('', gerar_npc, 300)]
+
+
+@caso('hex.generate_hex_description')
+def _casos_hex(app):
+    from geracao_hex.routes import generate_hex_description, get_terrains
+    return [(f'[{t}]', (lambda t=t: generate_hex_description(t)), 200) for t in get_terrains()]
+
+
+@caso('eventos.generate_single_encounter')
+def _casos_encontro_unico(app):
+    from geracao_eventos.routes import generate_single_encounter, carregar_json, get_bp_path
+    terrenos = carregar_json(get_bp_path('tipos_terreno.json'))
+    return [(f'[{t}]', (lambda t=t: generate_single_encounter(False, t)), 300) for t in terrenos]
+
+
+@caso('eventos.simular_viagem')
+def _casos_viagem(app):
+    from geracao_eventos.routes import simular_viagem
+    return [
+        ('[floresta,30d,dia]', lambda: simular_viagem('floresta', 30, False), 30),
+        ('[floresta,30d,noite]', lambda: simular_viagem('floresta', 30, True), 30),
+        ('[deserto,365d,noite]', lambda: simular_viagem('deserto', 365, True), 3),
+    ]
+
+
+@caso('encontros.generate_encounter_logic')
+def _casos_encontros(app):
+    from geracao_encontros.routes import generate_encounter_logic, DATA_DIR
+    from painel.tabelas import obter_registro
+    registro = obter_registro()
+    tipos = [f[:-len('.json')] for f in registro.listar(DATA_DIR)]
+    origens = sorted({o for t in tipos for o in registro.obter(os.path.join(DATA_DIR, f'{t}.json'))})
+    return [(f'[nd={nd}]',
+             (lambda nd=nd: generate_encounter_logic(nd, 0.25, 20, 1, 10, tipos, origens, 'varias solo + lacaios')),
+             20) for nd in range(1, 21)]
+
+
+@caso('tesouros.resolve_treasure_roll')
+def _casos_tesouros(app):
+    from geracao_tesouros.routes import load_data, resolve_treasure_roll
+
+    def rolar_tudo(tabelas):
+        for roll_string in tabelas.get('Dinheiro', {}):
+            resolve_treasure_roll(roll_string, 'padrao')
+        for roll_string in tabelas.get('Itens', {}):
+            resolve_treasure_roll(roll_string, 'padrao')
+
+    return [(f'[{nd}]', (lambda t=tabelas: rolar_tudo(t)), 50) for nd, tabelas in load_data('nds.json').items()]
+
+
+@caso('rumores.gerar_rumor_por_estado')
+def _casos_rumores(app):
+    from geracao_rumores.routes import carregar_json, gerar_rumor_por_estado
+    return [(f'[{e}]', (lambda e=e: gerar_rumor_por_estado(e)), 300) for e in carregar_json('estados.json')]
+
+
+@caso('destino.gerar_destinos_reinos')
+def _casos_destino(app):
+    from destino_npc.routes import gerar_destinos_reinos
+
+    def pipeline():
+        # Cofre inexistente: mede só o cálculo dos destinos (sem varrer o Obsidian)
+        with app.test_request_context('/destino/gerar_destinos_reinos', method='POST',
+                                      json={'vault_path': os.path.join(PROJETO_DIR, '.cofre_inexistente')}):
+            gerar_destinos_reinos()
+
+    return [('', pipeline, 50)]
+
+
+# ========== MEDIÇÃO ==========
+
+def medir(funcao, iteracoes, repeticoes, seed):
+    """Executa 'funcao' em blocos de 'iteracoes' e devolve as métricas do caso."""
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        random.seed(seed)
+        funcao()  # Aquecimento (caches, compilação de tabelas)
+
+        tempos = []
+        for r in range(repeticoes):
+            random.seed(seed + r)
+            gc.collect()
+            inicio = time.perf_counter()
+            for _ in range(iteracoes):
+                funcao()
+            tempos.append((time.perf_counter() - inicio) / iteracoes)
+
+        # Memória: pico durante uma operação e o que fica retido após 'iteracoes' operações
+        random.seed(seed)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            funcao()
+            _, pico = tracemalloc.get_traced_memory()
+            antes = tracemalloc.take_snapshot()
+            for _ in range(iteracoes):
+                funcao()
+            gc.collect()
+            depois = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+    diferenca = depois.compare_to(antes, 'filename')
+    retido_bytes = sum(d.size_diff for d in diferenca)
+    retido_blocos = sum(d.count_diff for d in diferenca)
+    melhor = min(tempos)
+    return {
+        'iteracoes': iteracoes,
+        'repeticoes': repeticoes,
+        'ops_por_seg': round(1.0 / melhor, 2) if melhor > 0 else None,
+        'melhor_us': round(melhor * 1e6, 2),
+        'mediana_us': round(statistics.median(tempos) * 1e6, 2),
+        'memoria_pico_bytes': max(0, pico - base),
+        'retido_bytes_por_op': round(retido_bytes / iteracoes, 1),
+        'retido_blocos_por_op': round(retido_blocos / iteracoes, 2),
+    }
+
+
+def _metadados(seed):
+    try:
+        import numpy
+        versao_numpy = numpy.__version__
+    except ImportError:
+        versao_numpy = None
+    commit = None
+    with contextlib.suppress(Exception):
+        cabeca = open(os.path.join(PROJETO_DIR, '.git', 'HEAD'), encoding='utf-8').read().strip()
+        if cabeca.startswith('ref: '):
+            ref = os.path.join(PROJETO_DIR, '.git', *cabeca[5:].split('/'))
+            commit = open(ref, encoding='utf-8').read().strip() if os.path.exists(ref) else None
+        else:
+            commit = cabeca
+    return {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'seed': seed,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'numpy': versao_numpy,
+        'commit': commit,
+    }
+
+
+def executar(seed=1234, repeticoes=5, filtro=None, escala=1.0, registrar=print):
+    """Roda todos os casos (ou os que contêm 'filtro') e devolve o dicionário de resultados."""
+    from app import create_app
+    app = create_app()
+    app.extensions['aquecimento'].aguardar()  # Não medir concorrendo com a carga das tabelas
+    resultados = {}
+    for nome, fabrica in CASOS:
+        for sufixo, funcao, iteracoes in fabrica(app):
+            nome_completo = nome + sufixo
+            if filtro and filtro not in nome_completo:
+                continue
+            metricas = medir(funcao, max(1, int(iteracoes * escala)), repeticoes, seed)
+            resultados[nome_completo] = metricas
+            registrar(f"{nome_completo:<60} {metricas['ops_por_seg']:>12,.1f} ops/s "
+                      f"{metricas['memoria_pico_bytes'] / 1024:>10,.1f} KiB pico")
+    return {'meta': _metadados(seed), 'resultados': resultados}
+
+
+def comparar(atual, anterior, tolerancia=10.0, registrar=print):
+    """Compara ops/s com uma execução anterior. Retorna os nomes que regrediram além da tolerância (%)."""
+    regressoes = []
+    base = anterior.get('resultados', {})
+    for nome, metricas in atual['resultados'].items():
+        if nome not in base or not base[nome].get('ops_por_seg'):
+            continue
+        variacao = (metricas['ops_por_seg'] / base[nome]['ops_por_seg'] - 1.0) * 100
+        marca = ''
+        if variacao < -tolerancia:
+            marca = '  <-- REGRESSÃO'
+            regressoes.append(nome)
+        registrar(f"{nome:<60} {variacao:+8.1f}%{marca}")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks dos geradores do Painel do Mestre.")
+    parser.add_argument('--seed', type=int, default=1234, help="Semente fixa (padrão: 1234)")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Repetições de cada bloco de medição")
+    parser.add_argument('--escala', type=float, default=1.0, help="Multiplica o número de iterações de cada caso")
+    parser.add_argument('--filtro', help="Só roda os casos cujo nome contém este texto")
+    parser.add_argument('--saida', help="Arquivo JSON de saída (padrão: benchmarks/resultados/bench_<data>.json)")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--tolerancia', type=float, default=10.0, help="Queda máxima de ops/s (%%) antes de acusar regressão")
+    args = parser.parse_args(argv)
+
+    resultado = executar(args.seed, args.repeticoes, args.filtro, args.escala)
+
+    saida = args.saida
+    if not saida:
+        os.makedirs(RESULTADOS_DIR, exist_ok=True)
+        saida = os.path.join(RESULTADOS_DIR, f"bench_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados salvos em '{saida}'")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            anterior = json.load(f)
+        print(f"\n=== Comparação com '{args.comparar}' ===")
+        if comparar(resultado, anterior, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
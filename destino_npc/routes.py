@@ -5,6 +5,8 @@ import re
 import shutil 
 import unicodedata
 from flask import Blueprint, render_template, request, jsonify
+from painel.tabelas import carregar_json
+from painel.rolagem import resolver_dados_em_texto
 
 destino_bp = Blueprint('destino', __name__, template_folder='templates', static_folder='static')
 bp_dir = os.path.abspath(os.path.dirname(__file__))
@@ -43,8 +45,7 @@ EVENTOS_REINO = {
 # --- CARREGAMENTO ---
 def load_data_from_bp(filename):
     filepath = os.path.join(bp_dir, filename)
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f: return json.load(f)
+    try: return carregar_json(filepath)
     except: return {}
 
 def load_reino_state():
@@ -61,14 +62,20 @@ def save_reino_state(state):
             json.dump(state, f, indent=4, ensure_ascii=False)
     except Exception as e: print(f"Erro save state: {e}")
 
-OPTIONS_NPC_IMPORTANTE = load_data_from_bp("eventos_npcs.json")
-EVENTOS_NPC_IRRELEVANTE = load_data_from_bp("eventos_npcs_comuns.json")
-ALL_VIZINHOS = load_data_from_bp("vizinhos.json")
-REGRAS_PILARES = load_data_from_bp("regras_pilares.json")
-EVENTOS_MAIORES_DB = load_data_from_bp("eventos_maiores.json")
-EVENTOS_DUPLOS_DB = load_data_from_bp("eventos_duplos.json")
-# NOVA IMPLEMENTAÇÃO: Carregando os efeitos
-EFEITOS_DESTINO_DB = load_data_from_bp("efeitos_destino.json")
+# Tabelas do blueprint: consultadas no registro a cada uso (nada é lido na importação)
+ARQUIVOS_TABELAS = {
+    'npc_importante': "eventos_npcs.json",
+    'npc_irrelevante': "eventos_npcs_comuns.json",
+    'vizinhos': "vizinhos.json",
+    'regras_pilares': "regras_pilares.json",
+    'eventos_maiores': "eventos_maiores.json",
+    'eventos_duplos': "eventos_duplos.json",
+    'efeitos_destino': "efeitos_destino.json",
+}
+
+def tabela(nome):
+    """Tabela 'nome' de ARQUIVOS_TABELAS (imutável, via registro; {} se faltar)."""
+    return load_data_from_bp(ARQUIVOS_TABELAS[nome])
 
 # --- LÓGICA DE CÁLCULO ---
 def normalize_string(s):
@@ -81,16 +88,17 @@ def get_efeitos_por_nome(evento_nome):
     Ex: 'Turbulência política' (Python) vs 'Turbulencia politica' (JSON)
     """
     nome_norm = normalize_string(evento_nome)
+    efeitos_destino = tabela('efeitos_destino')
     
     # Tentativa 1: Busca normalizada
-    for key, val in EFEITOS_DESTINO_DB.items():
+    for key, val in efeitos_destino.items():
         if normalize_string(key) == nome_norm:
             return val
             
     # Tentativa 2: Caso específico do "Nada muito fora do habitual" vs "Nada fora do habitual"
     if "nada" in nome_norm and "habitual" in nome_norm:
         # Tenta achar a chave que tem 'nada' e 'habitual' no JSON
-        for key, val in EFEITOS_DESTINO_DB.items():
+        for key, val in efeitos_destino.items():
             k_norm = normalize_string(key)
             if "nada" in k_norm and "habitual" in k_norm:
                 return val
@@ -98,7 +106,7 @@ def get_efeitos_por_nome(evento_nome):
     return None
 
 def calcular_novos_status(status_atual, evento_nome):
-    regras = REGRAS_PILARES.get(evento_nome, {})
+    regras = tabela('regras_pilares').get(evento_nome, {})
     novo = status_atual.copy() if status_atual else {"militar":0, "economica":0, "social":0, "magica":0}
     
     for p in ["militar", "economica", "social", "magica"]:
@@ -118,25 +126,25 @@ def verificar_gatilhos(status):
     reset_list = [] 
     if len(extremos_pos) >= 2:
         pilares_str = " e ".join([p.upper() for p in extremos_pos])
-        opcoes = EVENTOS_DUPLOS_DB.get("positivo", [])
+        opcoes = tabela('eventos_duplos').get("positivo", [])
         template = random.choice(opcoes) if opcoes else "CRISE DE HEGEMONIA: Disputa sangrenta entre facções de {pilares}."
         evento_maior.append(template.replace("{pilares}", pilares_str))
         reset_list.extend(extremos_pos)
         
     elif len(extremos_neg) >= 2:
         pilares_str = " e ".join([p.upper() for p in extremos_neg])
-        opcoes = EVENTOS_DUPLOS_DB.get("negativo", [])
+        opcoes = tabela('eventos_duplos').get("negativo", [])
         template = random.choice(opcoes) if opcoes else "RENASCIMENTO: Ajuda externa salva o reino do colapso em {pilares}."
         evento_maior.append(template.replace("{pilares}", pilares_str))
         reset_list.extend(extremos_neg)
     else:
         for p in extremos_pos:
-            opcoes = EVENTOS_MAIORES_DB.get(p, {}).get("positivo", [])
+            opcoes = tabela('eventos_maiores').get(p, {}).get("positivo", [])
             texto = random.choice(opcoes) if opcoes else f"{p.upper()} NO ÁPICE."
             evento_maior.append(texto)
             reset_list.append(p)
         for p in extremos_neg:
-            opcoes = EVENTOS_MAIORES_DB.get(p, {}).get("negativo", [])
+            opcoes = tabela('eventos_maiores').get(p, {}).get("negativo", [])
             texto = random.choice(opcoes) if opcoes else f"{p.upper()} EM COLAPSO."
             evento_maior.append(texto)
             reset_list.append(p)
@@ -374,21 +382,12 @@ def roll_reino_destino():
     r = random.randint(1, 20)
     return r, EVENTOS_REINO[r]
 
-def _roll_match(match):
-    full_text = match.group(0); num_dice = int(match.group(1)); die_face = int(match.group(2))
-    operator = match.group(4); modifier = int(match.group(5) or 0)
-    roll_total = sum(random.randint(1, die_face) for _ in range(num_dice))
-    final_total = roll_total
-    if operator == '+': final_total = roll_total + modifier
-    elif operator == '-': final_total = max(1, roll_total - modifier) 
-    return f"{full_text} (rolado {final_total})"
-
 def resolve_dice_in_string(text):
-    pattern = r'(\d+)d(\d+)(([+-])(\d+))?'
-    return re.sub(pattern, _roll_match, text)
+    # Motor de dados compartilhado: expressões compiladas uma vez e reaproveitadas
+    return resolver_dados_em_texto(text)
 
 def resolve_movement_in_string(text, current_reino, all_reinos_map):
-    neighbors = ALL_VIZINHOS.get(current_reino, [])
+    neighbors = tabela('vizinhos').get(current_reino, [])
     destination = None; resolved_text = text
     if not neighbors and ("vizinho" in text or "próximo" in text): return f"{text} (S/ Vizinhos)", None
     if "pior condição" in text:
@@ -414,13 +413,13 @@ def resolve_movement_in_string(text, current_reino, all_reinos_map):
     return resolved_text, destination
 
 def roll_npc_importante(current_reino_name, evento_nome, date, all_reinos_map):
-    tabela = next((opt for opt in OPTIONS_NPC_IMPORTANTE 
-                   if normalize_string(opt.get("name", "")) == normalize_string(evento_nome)), None)
+    tabela_evento = next((opt for opt in tabela('npc_importante') 
+                          if normalize_string(opt.get("name", "")) == normalize_string(evento_nome)), None)
     
-    if not tabela: 
+    if not tabela_evento: 
         return f"| {date}: Sem alteração", None
 
-    opcoes = tabela.get("options", [])
+    opcoes = tabela_evento.get("options", [])
 
     if not opcoes:
         return f"| {date}: Sem alteração (Opções vazias)", None
@@ -432,9 +431,10 @@ def roll_npc_importante(current_reino_name, evento_nome, date, all_reinos_map):
 
 def roll_npc_irrelevante(num, date, current_reino, all_reinos_map):
     res = []
-    if not EVENTOS_NPC_IRRELEVANTE: return ["Erro: sem eventos irrelevantes"]
+    eventos_irrelevantes = tabela('npc_irrelevante')
+    if not eventos_irrelevantes: return ["Erro: sem eventos irrelevantes"]
     for i in range(1, num + 1):
-        evt = random.choice(EVENTOS_NPC_IRRELEVANTE)
+        evt = random.choice(eventos_irrelevantes)
         t_evt = resolve_movement_in_string(resolve_dice_in_string(evt.get('evento','')), current_reino, all_reinos_map)[0]
         t_eff = resolve_movement_in_string(resolve_dice_in_string(evt.get('efeito','')), current_reino, all_reinos_map)[0]
         res.append(f"Irrelevante {i} | {date}: {t_evt} (Efeito: {t_eff})")
@@ -3,6 +3,7 @@ import json
 import random
 import math
 from flask import Blueprint, render_template, request, jsonify
+from painel.tabelas import obter_registro
 
 # 1. Cria o Blueprint
 encontros_bp = Blueprint('encontros', __name__,
@@ -24,15 +25,13 @@ def load_monsters(allowed_types, allowed_origins, min_creature_nd, max_creature_
     for type_name in allowed_types:
         filepath = os.path.join(DATA_DIR, f"{type_name}.json") # Usa o DATA_DIR
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for source_book, monsters in data.items():
-                    if source_book in allowed_origins:
-                        for monster in monsters:
-                            monster['origem'] = source_book
-                            monster['categoria'] = type_name
-                            if min_creature_nd <= monster['nd'] <= max_creature_nd:
-                                all_monsters.append(monster)
+            data = obter_registro().obter(filepath)
+            for source_book, monsters in data.items():
+                if source_book in allowed_origins:
+                    for monster in monsters:
+                        if min_creature_nd <= monster['nd'] <= max_creature_nd:
+                            # Cópia: as tabelas do registro são compartilhadas e imutáveis
+                            all_monsters.append({**monster, 'origem': source_book, 'categoria': type_name})
         except FileNotFoundError:
             print(f"Aviso: Arquivo {filepath} não encontrado.")
         except json.JSONDecodeError:
@@ -48,14 +47,14 @@ def index():
     available_origins = set() 
     # ... (lógica para carregar tipos e origens) ...
     try:
-        all_files = [f for f in os.listdir(DATA_DIR) if f.endswith('.json')]
+        registro = obter_registro()
+        all_files = registro.listar(DATA_DIR) or [f for f in os.listdir(DATA_DIR) if f.endswith('.json')]
         available_types = [f.replace('.json', '') for f in all_files]
         for filename in all_files:
             filepath = os.path.join(DATA_DIR, filename)
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    available_origins.update(data.keys())
+                data = registro.obter(filepath)
+                available_origins.update(data.keys())
             except json.JSONDecodeError:
                 print(f"Erro ao ler origens de {filename}")
     except FileNotFoundError:
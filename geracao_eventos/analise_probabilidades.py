@@ -0,0 +1,289 @@
+"""
+Análise exata das probabilidades de encontro de um terreno, a partir do
+modelo compilado (modelo_encontros): tipo de encontro x categoria x raridade
+x tipo de criatura x condição (x raça), incluindo o aninhamento do double_roll.
+
+A verificação por Monte Carlo é opcional e vetorizada (NumPy): sorteia as
+mesmas tabelas alias usadas na geração e compara as frequências observadas
+com as exatas.
+"""
+import heapq
+import math
+import time
+
+from painel.opcional import numpy_opcional
+from painel.sorteio import gerador_numpy
+
+from .modelo_encontros import probabilidades
+
+# Nomes exibidos de cada tipo (os mesmos de generate_single_encounter)
+NOMES_TIPOS = {
+    'false_alarm': 'Alarme falso', 'creatures': 'Criaturas', 'anomaly': 'Anomalia',
+    'creatures_anomaly': 'Criaturas + Anomalia', 'temporary_obstacle': 'Obstáculo temporário',
+    'obstacle_creatures': 'Obstáculo + Criaturas', 'event': 'Evento especial',
+    'double_roll': 'Evento duplo'
+}
+
+# Fatores de cada tipo final, na ordem em que aparecem na descrição ('criatura' = cadeia de criaturas)
+FATORES_TIPOS = {
+    'false_alarm': ('false_alarms',),
+    'creatures': ('criatura',),
+    'anomaly': ('anomalies',),
+    'creatures_anomaly': ('criatura', 'anomalies'),
+    'temporary_obstacle': ('temporary_obstacles',),
+    'obstacle_creatures': ('temporary_obstacles', 'criatura'),
+    'event': ('events',),
+}
+
+DOUBLE_ROLL = 'double_roll'
+FOLHAS_LISTADAS = 6          # P(k encontros) mostrada para k = 1..6
+MAX_RODADAS_DUPLAS = 64      # Limite de expansões do double_roll no Monte Carlo
+MAX_SORTEIOS_DUPLAS = 5_000_000   # Limite de rolagens somadas em todas as expansões
+
+
+def _arredondar(p):
+    return round(p, 10)
+
+
+# ========== ANÁLISE EXATA ==========
+
+def _fator_criatura(modelo):
+    """
+    [(probabilidade, {categoria, raridade, tipo, condicao[, raca]})] da cadeia de
+    criaturas, sem podar, e a quantidade total de resultados distintos.
+    """
+    if modelo.criaturas is None or isinstance(modelo.criaturas, str):
+        descricao = modelo.criaturas if isinstance(modelo.criaturas, str) else "Criatura indefinida (erro)"
+        return [(1.0, {'criatura': descricao})], 1
+    resultados = []
+    total = 0
+    for indice, p_categoria, raridades in modelo.arvore:
+        if indice is None:
+            resultados.append((p_categoria, {'criatura': "Criatura desconhecida (rolagem fora da faixa)"}))
+            total += 1
+            continue
+        categoria = modelo.categorias[indice]
+        condicoes = probabilidades(categoria.condicoes) if categoria.condicoes else [("Indefinido", 1.0)]
+        racas = None
+        if categoria.humanoide:
+            racas = probabilidades(categoria.racas) if categoria.racas else [("Indefinido", 1.0)]
+        for raridade, p_raridade, tipos in raridades:
+            for tipo, p_tipo in tipos:
+                base = p_categoria * p_raridade * p_tipo
+                for condicao, p_condicao in condicoes:
+                    rotulo = {'categoria': categoria.nome, 'raridade': raridade, 'tipo': tipo, 'condicao': condicao}
+                    if racas is None:
+                        resultados.append((base * p_condicao, rotulo))
+                        continue
+                    for raca, p_raca in racas:
+                        resultados.append((base * p_condicao * p_raca, dict(rotulo, raca=raca)))
+                total += len(condicoes) * (len(racas) if racas else 1)
+    return resultados, total
+
+
+def _fator_evento(modelo, nome):
+    tabela = modelo.eventos.get(nome)
+    if not tabela:
+        return [(1.0, {nome: "Indefinido"})]
+    return [(p, {nome: opcao}) for opcao, p in probabilidades(tabela)]
+
+
+def _produto_top(fatores, limite):
+    """
+    Os 'limite' resultados mais prováveis do produto de distribuições independentes.
+    Como todos os fatores são não negativos, basta combinar os 'limite' maiores de cada um.
+    """
+    chave = lambda par: par[0]
+    acumulado = [(1.0, {})]
+    for fator in fatores:
+        melhores = heapq.nlargest(limite, fator, key=chave)
+        acumulado = heapq.nlargest(limite, ((pa * pf, {**da, **df}) for pa, da in acumulado for pf, df in melhores),
+                                   key=chave)
+    return acumulado
+
+
+def _distribuicao_folhas(p_dupla):
+    """P(k encontros finais) por rolagem: Catalan(k-1) * p^(k-1) * (1-p)^k."""
+    saida = {}
+    catalan = 1
+    for k in range(1, FOLHAS_LISTADAS + 1):
+        saida[k] = _arredondar(catalan * p_dupla ** (k - 1) * (1 - p_dupla) ** k)
+        catalan = catalan * 2 * (2 * k - 1) // (k + 1)
+    return saida
+
+
+def analisar_terreno(modelo, limite=25, chances=None):
+    """
+    Probabilidades exatas do terreno do 'modelo'. 'limite' é quantos resultados
+    finais (os mais prováveis) são listados; a contagem total é sempre exata.
+    'chances' = {'dia': p, 'noite': p} de haver encontro num dia (opcional).
+    """
+    tabela = modelo.tipos_encontro
+    tipos = probabilidades(tabela) if tabela else [(None, 1.0)]
+    p_dupla = math.fsum(p for t, p in tipos if t == DOUBLE_ROLL)
+    p_folha = 1.0 - p_dupla
+    # Cada double_roll vira duas rolagens: E[encontros finais] = (1 - p) / (1 - 2p)
+    if p_dupla < 0.5:
+        encontros_esperados = p_folha / (1 - 2 * p_dupla)
+        multiplicador = 1 / (1 - 2 * p_dupla)
+    else:
+        encontros_esperados = multiplicador = None   # A recursão não termina em média
+
+    criatura, total_criatura = _fator_criatura(modelo)
+    fatores_base = {'criatura': (criatura, total_criatura)}
+    for nome in modelo.eventos:
+        fator = _fator_evento(modelo, nome)
+        fatores_base[nome] = (fator, len(fator))
+
+    tipos_saida = []
+    finais = []
+    total_finais = 0
+    for tipo, p in tipos:
+        item = {'tipo': tipo, 'nome': NOMES_TIPOS.get(tipo, "Encontro indefinido" if tipo is None else tipo),
+                'probabilidade': _arredondar(p)}
+        if tipo != DOUBLE_ROLL:
+            item['probabilidade_por_encontro_final'] = _arredondar(p / p_folha) if p_folha > 0 else None
+        item['esperado_por_rolagem'] = _arredondar(p * multiplicador) if multiplicador is not None else None
+        tipos_saida.append(item)
+        if tipo == DOUBLE_ROLL or p_folha <= 0:
+            continue
+        nomes_fatores = FATORES_TIPOS.get(tipo)
+        if nomes_fatores is None:   # Indefinido ou chave desconhecida: um único resultado
+            finais.append((p / p_folha, {'tipo_encontro': tipo, 'descricao': item['nome']}))
+            total_finais += 1
+            continue
+        fatores = [fatores_base[n][0] for n in nomes_fatores]
+        quantidade = math.prod(fatores_base[n][1] for n in nomes_fatores)
+        total_finais += quantidade
+        for prob, rotulo in _produto_top(fatores, limite):
+            finais.append((p / p_folha * prob, dict(rotulo, tipo_encontro=tipo)))
+
+    categorias = []
+    raridades = []
+    for indice, p_categoria, ramos in modelo.arvore:
+        nome = modelo.categorias[indice].nome if indice is not None else None
+        categorias.append({'categoria': nome, 'probabilidade': _arredondar(p_categoria)})
+        for raridade, p_raridade, tipos_raridade in ramos:
+            raridades.append({'categoria': nome, 'raridade': raridade,
+                              'probabilidade': _arredondar(p_categoria * p_raridade),
+                              'tipos': len(tipos_raridade)})
+
+    return {
+        'terreno': modelo.terreno,
+        'chance_encontro_diaria': chances,
+        'tipos_encontro': tipos_saida,
+        'double_roll': {
+            'probabilidade': _arredondar(p_dupla),
+            'encontros_finais_esperados_por_rolagem': (_arredondar(encontros_esperados)
+                                                       if encontros_esperados is not None else None),
+            'distribuicao_encontros_finais': _distribuicao_folhas(p_dupla),
+        },
+        'categorias': categorias,
+        'raridades': raridades,
+        'erro_criaturas': modelo.erro_criaturas,
+        'resultados_finais': {
+            'total': total_finais,
+            'listados': limite,
+            # Probabilidade de cada resultado por encontro final (descontado o double_roll)
+            'mais_provaveis': [dict(rotulo, probabilidade=_arredondar(p))
+                               for p, rotulo in heapq.nlargest(limite, finais, key=lambda par: par[0])],
+        },
+        'soma_tipos': _arredondar(math.fsum(p for _, p in tipos)),
+    }
+
+
+# ========== MONTE CARLO (VETORIZADO) ==========
+
+def _comparar(np, contagens, esperados, n):
+    """Erro absoluto máximo e maior desvio em desvios-padrão (binomial) entre observado e esperado."""
+    observados = contagens / n
+    erro = np.abs(observados - esperados)
+    sigma = np.sqrt(np.maximum(esperados * (1 - esperados), 1e-300) / n)
+    z = np.where(esperados > 0, erro / sigma, np.where(contagens > 0, np.inf, 0.0))
+    return observados, float(erro.max()) if len(erro) else 0.0, float(z.max()) if len(z) else 0.0
+
+
+def monte_carlo(modelo, amostras, gerador=None):
+    """
+    Sorteia 'amostras' rolagens de encontro (expandindo cada double_roll em duas)
+    e 'amostras' criaturas com as mesmas tabelas alias da geração. Devolve as
+    frequências observadas e o desvio em relação às probabilidades exatas.
+    """
+    np = numpy_opcional()
+    if np is None:
+        return {'aviso': "NumPy não está instalado: verificação por Monte Carlo indisponível."}
+    if amostras <= 0:
+        return None
+    gerador = gerador if gerador is not None else gerador_numpy()
+    inicio = time.perf_counter()
+    saida = {'amostras': amostras}
+
+    tabela = modelo.tipos_encontro
+    if tabela:
+        opcoes = tabela.opcoes
+        n_opcoes = len(opcoes)
+        duplas = np.asarray([i for i, o in enumerate(opcoes) if o == DOUBLE_ROLL], dtype=np.int64)
+        total = tabela.total
+        p = np.asarray(tabela.pesos) / total if total > 0 else np.full(n_opcoes, 1.0 / n_opcoes)
+        p_dupla = float(p[duplas].sum()) if len(duplas) else 0.0
+        contagens = np.zeros(n_opcoes, dtype=np.int64)
+        pendentes, rodadas, sorteios = amostras, 0, 0
+        aviso = None
+        while pendentes and rodadas < MAX_RODADAS_DUPLAS:
+            if rodadas and p_dupla >= 0.5:
+                # Cada rodada tem ~2p vezes as rolagens da anterior: a expansão não termina
+                aviso = (f"double_roll com probabilidade {p_dupla:.3f} >= 0,5: sem valor esperado, "
+                         f"só a primeira rodada foi sorteada.")
+                break
+            if sorteios + pendentes > MAX_SORTEIOS_DUPLAS:
+                aviso = f"Expansão do double_roll interrompida após {sorteios} rolagens (limite {MAX_SORTEIOS_DUPLAS})."
+                break
+            sorteados = np.asarray(tabela.sortear_indices_lote(pendentes, gerador))
+            sorteios += pendentes
+            por_opcao = np.bincount(sorteados, minlength=n_opcoes)
+            contagens += por_opcao
+            pendentes = int(2 * por_opcao[duplas].sum()) if len(duplas) else 0
+            rodadas += 1
+        if pendentes and aviso is None:
+            aviso = f"Expansão do double_roll interrompida após {rodadas} rodadas ({pendentes} rolagens pendentes)."
+        esperado = p / (1 - 2 * p_dupla) if p_dupla < 0.5 else np.full(n_opcoes, np.nan)
+        observado = contagens / amostras
+        saida['tipos_encontro'] = {
+            'rodadas_double_roll': rodadas,
+            'aviso': aviso,
+            'erro_maximo': float(np.nanmax(np.abs(observado - esperado))) if p_dupla < 0.5 and not aviso else None,
+            'itens': [{'tipo': o, 'esperado_por_rolagem': _arredondar(float(e)), 'observado': _arredondar(float(ob))}
+                      for o, e, ob in zip(opcoes, esperado, observado)],
+        }
+
+    criaturas = modelo.criaturas
+    if criaturas and not isinstance(criaturas, str):
+        sorteados = np.asarray(criaturas.sortear_indices_lote(amostras, gerador))
+        n_opcoes = len(criaturas.opcoes)
+        contagens = np.bincount(sorteados, minlength=n_opcoes)
+        esperados = np.asarray(criaturas.pesos) / criaturas.total
+        _, erro, z = _comparar(np, contagens, esperados, amostras)
+        saida['criaturas'] = {'resultados': n_opcoes, 'erro_maximo': erro, 'z_maximo': z}
+
+        # Categoria de cada entrada da tabela conjunta (-1 = fora da faixa)
+        categoria_de = np.asarray([o[0] if o is not None else -1 for o in criaturas.opcoes], dtype=np.int64)
+        cat_sorteadas = categoria_de[sorteados]
+        itens = []
+        erro_condicoes = z_condicoes = 0.0
+        for indice, categoria in enumerate(modelo.categorias):
+            n_cat = int((cat_sorteadas == indice).sum())
+            esperado = float(esperados[categoria_de == indice].sum())
+            itens.append({'categoria': categoria.nome, 'esperado': _arredondar(esperado),
+                          'observado': _arredondar(n_cat / amostras)})
+            if n_cat and categoria.condicoes:
+                cond = np.asarray(categoria.condicoes.sortear_indices_lote(n_cat, gerador))
+                tab = categoria.condicoes
+                esperados_cond = (np.asarray(tab.pesos) / tab.total if tab.total > 0
+                                  else np.full(len(tab.opcoes), 1.0 / len(tab.opcoes)))
+                _, e, zc = _comparar(np, np.bincount(cond, minlength=len(tab.opcoes)), esperados_cond, n_cat)
+                erro_condicoes, z_condicoes = max(erro_condicoes, e), max(z_condicoes, zc)
+        saida['categorias'] = itens
+        saida['condicoes'] = {'erro_maximo': erro_condicoes, 'z_maximo': z_condicoes}
+
+    saida['segundos'] = round(time.perf_counter() - inicio, 4)
+    return saida
@@ -0,0 +1,280 @@
+"""
+Arquivo indexado das viagens (SQLite): cada viagem e seus encontros, com
+busca textual (FTS5, quando o SQLite tiver) nas descrições dos encontros.
+
+As gravações saem do caminho da requisição: a viagem é enfileirada em lotes
+e uma thread própria grava tudo com executemany. As consultas abrem uma
+conexão curta por chamada (o banco fica em modo WAL).
+
+A coluna 'log' guarda o caminho do relatório como foi criado e não acompanha a
+rotação dos logs: o arquivo pode ter virado '.gz' (que /eventos/logs ainda
+serve) ou já ter sido apagado.
+"""
+import atexit
+import datetime
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+# Encontros juntados antes de ir para a fila
+LOTE_ENCONTROS = 500
+POR_PAGINA_PADRAO = 50
+POR_PAGINA_MAXIMO = 500
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS viagens (
+    id TEXT PRIMARY KEY,
+    criada_em TEXT NOT NULL,
+    terreno TEXT NOT NULL,          -- terreno (ou "A → B → C" numa rota)
+    periodo TEXT NOT NULL,
+    dias INTEGER NOT NULL,
+    encontros INTEGER NOT NULL DEFAULT 0,
+    log TEXT                        -- relatório .txt na criação; a rotação pode comprimi-lo (.gz) ou apagá-lo
+);
+CREATE INDEX IF NOT EXISTS viagens_criada_em ON viagens (criada_em);
+CREATE INDEX IF NOT EXISTS viagens_terreno ON viagens (terreno, criada_em);
+CREATE INDEX IF NOT EXISTS viagens_dias ON viagens (dias);
+
+CREATE TABLE IF NOT EXISTS encontros (
+    id INTEGER PRIMARY KEY,
+    viagem_id TEXT NOT NULL REFERENCES viagens (id),
+    dia INTEGER NOT NULL,
+    terreno TEXT NOT NULL,          -- terreno do trecho em que o encontro aconteceu
+    tipo TEXT,                      -- chave de tipos_encontro.json (creatures, anomaly...)
+    criatura TEXT,                  -- pasta da categoria da criatura (humanoide, lefeu...)
+    horario TEXT,
+    descricao TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS encontros_viagem ON encontros (viagem_id, dia);
+CREATE INDEX IF NOT EXISTS encontros_terreno ON encontros (terreno);
+CREATE INDEX IF NOT EXISTS encontros_tipo ON encontros (tipo);
+CREATE INDEX IF NOT EXISTS encontros_criatura ON encontros (criatura);
+"""
+
+_ESQUEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS encontros_fts USING fts5 (
+    descricao, content='encontros', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS encontros_fts_inserir AFTER INSERT ON encontros BEGIN
+    INSERT INTO encontros_fts (rowid, descricao) VALUES (new.id, new.descricao);
+END;
+"""
+
+
+def _conectar(caminho):
+    conexao = sqlite3.connect(caminho, timeout=10.0, check_same_thread=False)
+    conexao.row_factory = sqlite3.Row
+    return conexao
+
+
+def _termos_fts(texto):
+    """Texto livre -> consulta FTS5 segura: cada palavra entre aspas e com prefixo ("lef" acha "Lefeu")."""
+    return ' '.join('"' + termo.replace('"', '""') + '"*' for termo in texto.split())
+
+
+# ========== VIAGEM EM ANDAMENTO ==========
+
+class ViagemArquivada:
+    """Alça de uma viagem sendo gravada: junta os encontros e manda em lotes para a fila."""
+    __slots__ = ('arquivo', 'id', 'encontros', '_lote')
+
+    def __init__(self, arquivo, id_viagem):
+        self.arquivo = arquivo
+        self.id = id_viagem
+        self.encontros = 0
+        self._lote = []
+
+    def registrar(self, dia, terreno):
+        """Registra um dia da viagem (dias sem encontro são ignorados)."""
+        if not dia.get('encounter'):
+            return
+        dados = dia.get('encounter_data') or {}
+        self._lote.append((self.id, dia['day'], dia.get('terrain', terreno), dia.get('encounter_type'),
+                           dados.get('tipo'), dia.get('time_of_day'), dia['encounter']))
+        self.encontros += 1
+        if len(self._lote) >= LOTE_ENCONTROS:
+            self._enviar()
+
+    def _enviar(self):
+        if self._lote:
+            self.arquivo._fila.put(('encontros', self._lote))
+            self._lote = []
+
+    def finalizar(self):
+        self._enviar()
+        self.arquivo._fila.put(('total', (self.encontros, self.id)))
+
+
+# ========== ARQUIVO ==========
+
+class ArquivoViagens:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.fts = False
+        self.erros = 0
+        self._fila = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # --- Gravação (thread própria) ---
+
+    def _garantir_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._preparar_banco()
+                self._thread = threading.Thread(target=self._executar, name='painel-arquivo-viagens', daemon=True)
+                self._thread.start()
+                atexit.register(self.esvaziar)
+
+    def _preparar_banco(self):
+        conexao = _conectar(self.caminho)
+        try:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.executescript(_ESQUEMA)
+            try:
+                conexao.executescript(_ESQUEMA_FTS)
+                self.fts = True
+            except sqlite3.OperationalError:  # SQLite compilado sem FTS5: a busca usa LIKE
+                self.fts = False
+            conexao.commit()
+        finally:
+            conexao.close()
+
+    def _executar(self):
+        conexao = _conectar(self.caminho)
+        while True:
+            itens = [self._fila.get()]
+            try:
+                while len(itens) < 64:
+                    itens.append(self._fila.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                with conexao:  # Uma transação por lote
+                    for tipo, dados in itens:
+                        self._gravar(conexao, tipo, dados)
+            except sqlite3.Error:
+                # O lote foi desfeito inteiro: refaz item a item, perdendo só o que falhar
+                for tipo, dados in itens:
+                    try:
+                        with conexao:
+                            self._gravar(conexao, tipo, dados)
+                    except sqlite3.Error as e:
+                        self.erros += 1
+                        print(f"[ARQUIVO] Falha ao gravar '{tipo}' em '{self.caminho}': {e}")
+            for _ in itens:
+                self._fila.task_done()
+
+    def _gravar(self, conexao, tipo, dados):
+        if tipo == 'viagem':
+            conexao.execute("INSERT INTO viagens (id, criada_em, terreno, periodo, dias, log) "
+                            "VALUES (?, ?, ?, ?, ?, ?)", dados)
+        elif tipo == 'encontros':
+            # Com FTS5, um gatilho indexa cada descrição inserida
+            conexao.executemany(
+                "INSERT INTO encontros (viagem_id, dia, terreno, tipo, criatura, horario, descricao) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", dados)
+        elif tipo == 'total':
+            conexao.execute("UPDATE viagens SET encontros = ? WHERE id = ?", dados)
+
+    def iniciar(self, terreno, periodo, dias, log=None):
+        """Registra o início de uma viagem e devolve a alça para os encontros."""
+        self._garantir_thread()
+        id_viagem = uuid.uuid4().hex
+        criada_em = datetime.datetime.now().isoformat(timespec='seconds')
+        self._fila.put(('viagem', (id_viagem, criada_em, terreno, periodo, dias, log)))
+        return ViagemArquivada(self, id_viagem)
+
+    def esvaziar(self, timeout=10.0):
+        """Espera a fila ser toda gravada."""
+        if self._thread is None:
+            return True
+        limite = time.monotonic() + timeout
+        while self._fila.unfinished_tasks:
+            if time.monotonic() > limite:
+                return False
+            time.sleep(0.01)
+        return True
+
+    # --- Consultas ---
+
+    @staticmethod
+    def _pagina(pagina, por_pagina):
+        pagina = max(1, int(pagina or 1))
+        por_pagina = max(1, min(int(por_pagina or POR_PAGINA_PADRAO), POR_PAGINA_MAXIMO))
+        return pagina, por_pagina
+
+    def _consultar(self, sql_base, condicoes, parametros, ordem, colunas, pagina, por_pagina):
+        self._garantir_thread()
+        pagina, por_pagina = self._pagina(pagina, por_pagina)
+        where = f" WHERE {' AND '.join(condicoes)}" if condicoes else ''
+        conexao = _conectar(self.caminho)
+        try:
+            total = conexao.execute(f"SELECT COUNT(*) {sql_base}{where}", parametros).fetchone()[0]
+            linhas = conexao.execute(f"SELECT {colunas} {sql_base}{where} ORDER BY {ordem} LIMIT ? OFFSET ?",
+                                     parametros + [por_pagina, (pagina - 1) * por_pagina]).fetchall()
+        finally:
+            conexao.close()
+        return {
+            'pagina': pagina, 'por_pagina': por_pagina, 'total': total,
+            'paginas': (total + por_pagina - 1) // por_pagina,
+            'itens': [dict(linha) for linha in linhas],
+        }
+
+    def buscar_encontros(self, texto=None, terreno=None, tipo=None, criatura=None, desde=None, ate=None,
+                         dias_min=None, dias_max=None, viagem=None, pagina=1, por_pagina=POR_PAGINA_PADRAO):
+        """
+        Encontros que atendem a todos os filtros, dos mais recentes para os mais antigos.
+        'texto' é busca textual na descrição; 'desde'/'ate' são datas ISO (AAAA-MM-DD).
+        """
+        condicoes, parametros = self._filtros_viagem(terreno=None, desde=desde, ate=ate,
+                                                     dias_min=dias_min, dias_max=dias_max)
+        if viagem:
+            condicoes.append("e.viagem_id = ?"); parametros.append(viagem)
+        if terreno:
+            condicoes.append("e.terreno = ? COLLATE NOCASE"); parametros.append(terreno)
+        if tipo:
+            condicoes.append("e.tipo = ?"); parametros.append(tipo)
+        if criatura:
+            condicoes.append("e.criatura = ?"); parametros.append(criatura)
+        if texto and texto.strip():
+            if self.fts:
+                condicoes.append("e.id IN (SELECT rowid FROM encontros_fts WHERE encontros_fts MATCH ?)")
+                parametros.append(_termos_fts(texto))
+            else:
+                for termo in texto.split():
+                    condicoes.append("e.descricao LIKE ?"); parametros.append(f"%{termo}%")
+        return self._consultar(
+            "FROM encontros e JOIN viagens v ON v.id = e.viagem_id", condicoes, parametros,
+            "v.criada_em DESC, e.viagem_id, e.dia",
+            "e.viagem_id AS viagem, v.criada_em, e.dia, e.terreno, e.tipo, e.criatura, e.horario, "
+            "e.descricao, v.log", pagina, por_pagina)
+
+    def listar_viagens(self, terreno=None, desde=None, ate=None, dias_min=None, dias_max=None,
+                       pagina=1, por_pagina=POR_PAGINA_PADRAO):
+        condicoes, parametros = self._filtros_viagem(terreno, desde, ate, dias_min, dias_max)
+        return self._consultar("FROM viagens v", condicoes, parametros, "v.criada_em DESC",
+                               "v.id, v.criada_em, v.terreno, v.periodo, v.dias, v.encontros, v.log",
+                               pagina, por_pagina)
+
+    @staticmethod
+    def _filtros_viagem(terreno, desde, ate, dias_min, dias_max):
+        condicoes, parametros = [], []
+        if terreno:
+            # Também acha rotas que passam pelo terreno ("Floresta → Montanha")
+            condicoes.append("(v.terreno = ? COLLATE NOCASE OR v.terreno LIKE ?)")
+            parametros += [terreno, f"%{terreno}%"]
+        if desde:
+            condicoes.append("v.criada_em >= ?"); parametros.append(desde)
+        if ate:
+            # Data sem hora inclui o dia inteiro
+            condicoes.append("v.criada_em <= ?"); parametros.append(ate if 'T' in ate else ate + 'T23:59:59')
+        if dias_min is not None:
+            condicoes.append("v.dias >= ?"); parametros.append(int(dias_min))
+        if dias_max is not None:
+            condicoes.append("v.dias <= ?"); parametros.append(int(dias_max))
+        return condicoes, parametros
@@ -1,8 +1,67 @@
 import os
 from functools import lru_cache
+import itertools
 import json
+import math
 import random
 
+# Entradas com esse efeito são só títulos de seção ("ATRIBUTOS", "DANO"...)
+EFEITO_SECAO = '-'
+# Tentativas por criatura para achar um conjunto ainda não usado na horda
+TENTATIVAS_DISTINTAS = 8
+
+
+class TabelaCaracteristicas:
+    """
+    Características de um tipo de criatura em tuplas paralelas (nomes e efeitos),
+    montadas uma vez: cada sorteio é só random.sample sobre os índices, sem
+    copiar nem remover nada da lista de chaves.
+    """
+    __slots__ = ('chaves', 'efeitos')
+
+    def __init__(self, dados):
+        pares = [(c, e) for c, e in dados.items() if e != EFEITO_SECAO]
+        self.chaves = tuple(c for c, _ in pares)
+        self.efeitos = tuple(e for _, e in pares)
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def _itens(self, indices):
+        return [{'caracteristica': self.chaves[i], 'efeito': self.efeitos[i]} for i in indices]
+
+    def sortear(self, quantidade, rng=random):
+        """'quantidade' características distintas (sem reposição)."""
+        quantidade = max(0, min(quantidade, len(self.chaves)))
+        return self._itens(rng.sample(range(len(self.chaves)), quantidade))
+
+    def horda(self, criaturas, quantidade, rng=random):
+        """
+        Uma lista de características para cada uma das 'criaturas'. Dentro de cada
+        criatura não há repetição; entre criaturas, os conjuntos são diferentes
+        enquanto houver combinações possíveis suficientes.
+        """
+        n = len(self.chaves)
+        quantidade = max(0, min(quantidade, n))
+        combinacoes = math.comb(n, quantidade)
+        if combinacoes <= criaturas * TENTATIVAS_DISTINTAS:
+            # Poucas combinações: embaralha todas e distribui (só repete depois de usar todas)
+            todas = list(itertools.combinations(range(n), quantidade))
+            rng.shuffle(todas)
+            return [self._itens(todas[i % combinacoes]) for i in range(criaturas)]
+        usados = set()
+        saida = []
+        for _ in range(criaturas):
+            for _ in range(TENTATIVAS_DISTINTAS):
+                indices = rng.sample(range(n), quantidade)
+                conjunto = frozenset(indices)
+                if conjunto not in usados or len(usados) >= combinacoes:
+                    break
+            usados.add(conjunto)
+            saida.append(self._itens(indices))
+        return saida
+
+
 def carregar_caracteristicas(tipo):
     """Carrega características do JSON baseado no tipo de criatura"""
     caminho = os.path.join('encounters', 'caracteristicas', f"{tipo}.json")
@@ -18,18 +77,7 @@ def gerar_caracteristicas(tipo, quantidade=1):
     dados = carregar_caracteristicas(tipo)
     if not dados:
         return []
-    
-    chaves = list(dados.keys())
-    resultados = []
-    
-    for _ in range(quantidade):
-        caracteristica = random.choice(chaves)
-        resultados.append({
-            'caracteristica': caracteristica,
-            'efeito': dados[caracteristica]  # Corrigido: usa a variável definida acima
-        })
-    
-    return resultados
+    return TabelaCaracteristicas(dados).sortear(quantidade)
 
 # Interface de linha de comando (opcional)
 def main():
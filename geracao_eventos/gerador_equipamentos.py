@@ -1,8 +1,26 @@
 import json
 import random
+from collections import Counter
 from typing import Dict, List, Optional, Tuple
 import os
 
+try:
+    from painel.sorteio import TabelaPesos
+except ImportError:
+    # Execução standalone a partir desta pasta: adiciona a raiz do projeto ao path
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from painel.sorteio import TabelaPesos
+
+# Pesos para cada categoria de arma
+CATEGORIAS_ARMA = TabelaPesos(['uma_mao', 'duas_maos', 'leves'], [40, 40, 20])
+# Adicional de quem usa arma de uma mão: escudo, arma leve ou nada
+ADICIONAIS_UMA_MAO = TabelaPesos(['escudo', 'arma_leve', 'nada'], [70, 30, 20])
+# Chance de quem usa arma leve carregar uma segunda arma leve
+CHANCE_SEGUNDA_LEVE = 0.8
+# Campos de cada soldado no modo exército (ver equipar_exercito)
+CAMPOS_SOLDADO = ('arma', 'escudo', 'secundaria', 'armadura')
+
 class GeradorEquipamentos:
     def __init__(self, arquivo_json: str = "equipamentos.json", base_path: Optional[str] = None):
 
@@ -14,6 +32,37 @@ class GeradorEquipamentos:
             self.arquivo_json_completo = arquivo_json
         
         self.dados = self.carregar_dados()
+        self.mtime = self._mtime_arquivo()
+        self._tabelas = {}  # id(lista de itens) -> TabelaPesos compilada
+        # Todas as tabelas são compiladas aqui: depois disso o gerador só lê e pode
+        # ser compartilhado entre requisições (e threads)
+        for lista in self._listas().values():
+            self._tabela(lista)
+
+    def _mtime_arquivo(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.arquivo_json_completo)
+        except OSError:
+            return None
+
+    def atualizado(self) -> bool:
+        """False se o equipamentos.json mudou depois que o gerador foi criado."""
+        return self._mtime_arquivo() == self.mtime
+
+    def _listas(self) -> Dict[str, List[Dict]]:
+        armas = self.dados.get('armas', {})
+        listas = {categoria: armas.get(categoria, []) for categoria in CATEGORIAS_ARMA.opcoes}
+        listas['armaduras'] = self.dados.get('armaduras', [])
+        listas['escudos'] = self.dados.get('escudos', [])
+        return listas
+
+    def _tabela(self, lista_itens: List[Dict]) -> TabelaPesos:
+        # Compila uma vez por lista; se todos os pesos forem 0 o sorteio é uniforme
+        tabela = self._tabelas.get(id(lista_itens))
+        if tabela is None or len(tabela) != len(lista_itens):
+            tabela = TabelaPesos(lista_itens, [item.get('peso', 1) for item in lista_itens])
+            self._tabelas[id(lista_itens)] = tabela
+        return tabela
 
     def carregar_dados(self) -> Dict:
         """Carrega os dados de equipamentos do arquivo JSON"""
@@ -46,29 +95,12 @@ class GeradorEquipamentos:
         """Escolhe um item aleatório considerando os pesos"""
         if not lista_itens:
             return None
-        
-        pesos = [item.get('peso', 1) for item in lista_itens]
-        
-        # Se todos os pesos forem 0, trata todos como se tivessem peso 1
-        if sum(pesos) == 0:
-            pesos = [1] * len(lista_itens)
-
-        return random.choices(lista_itens, weights=pesos, k=1)[0]
+        return self._tabela(lista_itens).sortear()
 
     def gerar_arma(self) -> Tuple[Optional[Dict], str]:
         """Gera uma arma aleatória e já retorna sua categoria para evitar buscas futuras."""
-        # Pesos para cada categoria de arma
-        categorias = {
-            'uma_mao': 40,
-            'duas_maos': 40,
-            'leves': 20
-        }
         # Escolhe a categoria com base nos pesos
-        categoria_escolhida = random.choices(
-            list(categorias.keys()),
-            weights=list(categorias.values()),
-            k=1
-        )[0]
+        categoria_escolhida = CATEGORIAS_ARMA.sortear()
         
         # Escolhe uma arma da lista da categoria sorteada
         lista_armas = self.dados['armas'].get(categoria_escolhida, [])
@@ -90,6 +122,8 @@ class GeradorEquipamentos:
         equipamentos = {
             "armas_primarias": [],
             "armaduras": [],
+            # Índice em armas_primarias -> escudo / arma secundária (duas armas
+            # iguais não se sobrescrevem)
             "armas_com_escudos": {},
             "armas_duplas": {}
         }
@@ -110,34 +144,101 @@ class GeradorEquipamentos:
                 equipamentos["armas_primarias"].append(arma)
         
         # Processa cada arma primária para gerar adicionais (escudo ou arma secundária)
-        for arma_primaria, categoria in armas_geradas_com_categoria:
-            nome_arma = arma_primaria.get('nome', 'Arma Desconhecida')
-
+        for indice, (arma_primaria, categoria) in enumerate(armas_geradas_com_categoria):
             if categoria == 'uma_mao':
                 # Lógica simplificada para escolher entre escudo, arma leve ou nada
-                opcoes_adicionais = ['escudo', 'arma_leve', 'nada']
-                pesos_adicionais = [70, 30, 20]
-                escolha = random.choices(opcoes_adicionais, weights=pesos_adicionais, k=1)[0]
+                escolha = ADICIONAIS_UMA_MAO.sortear()
 
                 if escolha == 'escudo' and self.dados.get("escudos"):
                     escudo = self.gerar_escudo()
                     if escudo:
-                        equipamentos["armas_com_escudos"][nome_arma] = escudo
+                        equipamentos["armas_com_escudos"][indice] = escudo
                 
                 elif escolha == 'arma_leve' and self.dados['armas'].get('leves'):
                     arma_leve = self.escolher_item_com_peso(self.dados['armas']['leves'])
                     if arma_leve:
-                        equipamentos["armas_duplas"][nome_arma] = arma_leve
+                        equipamentos["armas_duplas"][indice] = arma_leve
             
             elif categoria == 'leves':
-                # Chance de 50% de gerar uma segunda arma leve para ambidestria
-                if random.random() < 0.8 and self.dados['armas'].get('leves'):
+                # Chance de gerar uma segunda arma leve para ambidestria
+                if random.random() < CHANCE_SEGUNDA_LEVE and self.dados['armas'].get('leves'):
                     outra_arma_leve = self.escolher_item_com_peso(self.dados['armas']['leves'])
                     if outra_arma_leve:
-                        equipamentos["armas_duplas"][nome_arma] = outra_arma_leve
+                        equipamentos["armas_duplas"][indice] = outra_arma_leve
         
         return equipamentos
 
+    def equipar_exercito(self, soldados: int, com_armadura: bool = True, rng=random) -> Dict:
+        """
+        Equipa 'soldados' de uma vez, com as mesmas regras de gerar_equipamentos
+        (uma arma por soldado; escudo ou arma leve extra conforme a categoria).
+
+        Retorna uma representação compacta: cada soldado é uma lista de nomes na
+        ordem de CAMPOS_SOLDADO (None quando não tem o item), mais as contagens
+        agregadas e um resumo em texto ("37x Espada Longa (22 com escudo)").
+        """
+        listas = self._listas()
+        tabelas = {nome: self._tabela(lista) for nome, lista in listas.items() if lista}
+        leves = tabelas.get('leves')
+        escudos = tabelas.get('escudos')
+        armaduras = tabelas.get('armaduras') if com_armadura else None
+
+        def nome(tabela):
+            return tabela.opcoes[tabela.sortear_indice(rng)].get('nome', 'Item Desconhecido')
+
+        lista_soldados = []
+        armas = Counter(); com_escudo = Counter(); com_secundaria = Counter()
+        contagem_escudos = Counter(); contagem_secundarias = Counter(); contagem_armaduras = Counter()
+        for _ in range(soldados):
+            categoria = CATEGORIAS_ARMA.sortear(rng)
+            tabela = tabelas.get(categoria)
+            arma = nome(tabela) if tabela else None
+            escudo = secundaria = None
+            if arma is not None:
+                if categoria == 'uma_mao':
+                    escolha = ADICIONAIS_UMA_MAO.sortear(rng)
+                    if escolha == 'escudo' and escudos:
+                        escudo = nome(escudos)
+                    elif escolha == 'arma_leve' and leves:
+                        secundaria = nome(leves)
+                elif categoria == 'leves' and leves and rng.random() < CHANCE_SEGUNDA_LEVE:
+                    secundaria = nome(leves)
+                armas[arma] += 1
+                if escudo:
+                    com_escudo[arma] += 1; contagem_escudos[escudo] += 1
+                if secundaria:
+                    com_secundaria[arma] += 1; contagem_secundarias[secundaria] += 1
+            armadura = nome(armaduras) if armaduras else None
+            if armadura:
+                contagem_armaduras[armadura] += 1
+            lista_soldados.append([arma, escudo, secundaria, armadura])
+
+        resumo = []
+        for arma, total in armas.most_common():
+            extras = []
+            if com_escudo[arma]:
+                extras.append(f"{com_escudo[arma]} com escudo")
+            if com_secundaria[arma]:
+                extras.append(f"{com_secundaria[arma]} com arma secundária")
+            resumo.append(f"{total}x {arma}" + (f" ({', '.join(extras)})" if extras else ""))
+        for titulo, contagem in (("escudo", contagem_escudos), ("armadura", contagem_armaduras)):
+            resumo.extend(f"{total}x {item} ({titulo})" for item, total in contagem.most_common())
+
+        return {
+            'soldados': soldados,
+            'campos': list(CAMPOS_SOLDADO),
+            'equipamentos': lista_soldados,
+            'contagens': {
+                'armas': {arma: {'total': total, 'com_escudo': com_escudo[arma],
+                                 'com_secundaria': com_secundaria[arma]}
+                          for arma, total in armas.most_common()},
+                'escudos': dict(contagem_escudos.most_common()),
+                'secundarias': dict(contagem_secundarias.most_common()),
+                'armaduras': dict(contagem_armaduras.most_common()),
+            },
+            'resumo': resumo,
+        }
+
     def formatar_equipamento(self, equipamento: Dict, escudo: Optional[Dict] = None, arma_secundaria: Optional[Dict] = None) -> str:
         """Formata os detalhes de um equipamento como string, incluindo escudo e arma secundária se existirem"""
         if equipamento is None:
@@ -187,11 +288,10 @@ class GeradorEquipamentos:
             # Armas (com escudos e armas leves secundárias se aplicável)
             if equipamentos.get("armas_primarias"):
                 f.write("\n=== ARMAS GERADAS ===\n")
-                for i, arma_primaria in enumerate(equipamentos["armas_primarias"], 1):
-                    nome_arma = arma_primaria.get('nome', 'Arma Desconhecida')
-                    escudo = equipamentos.get("armas_com_escudos", {}).get(nome_arma)
-                    arma_secundaria = equipamentos.get("armas_duplas", {}).get(nome_arma)
-                    f.write(f"\nArma {i}:\n")
+                for i, arma_primaria in enumerate(equipamentos["armas_primarias"]):
+                    escudo = equipamentos.get("armas_com_escudos", {}).get(i)
+                    arma_secundaria = equipamentos.get("armas_duplas", {}).get(i)
+                    f.write(f"\nArma {i + 1}:\n")
                     f.write(self.formatar_equipamento(arma_primaria, escudo, arma_secundaria) + "\n")
             
             if not equipamentos.get("armaduras") and not equipamentos.get("armas_primarias"):
@@ -235,11 +335,10 @@ if __name__ == "__main__":
             
     if equipamentos.get("armas_primarias"):
         print("\n=== Armas Geradas ===")
-        for i, arma_primaria in enumerate(equipamentos["armas_primarias"], 1):
-            nome_arma = arma_primaria.get('nome', 'Arma Desconhecida')
-            escudo = equipamentos.get("armas_com_escudos", {}).get(nome_arma)
-            arma_secundaria = equipamentos.get("armas_duplas", {}).get(nome_arma)
-            print(f"\nArma {i}:")
+        for i, arma_primaria in enumerate(equipamentos["armas_primarias"]):
+            escudo = equipamentos.get("armas_com_escudos", {}).get(i)
+            arma_secundaria = equipamentos.get("armas_duplas", {}).get(i)
+            print(f"\nArma {i + 1}:")
             print(gerador.formatar_equipamento(arma_primaria, escudo, arma_secundaria))
             
     if not equipamentos.get("armaduras") and not equipamentos.get("armas_primarias"):
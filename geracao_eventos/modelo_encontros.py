@@ -0,0 +1,351 @@
+import json
+import os
+import threading
+import time
+
+from painel.sorteio import TabelaPesos, compilar
+from painel.tabelas import carregar_json, obter_registro
+
+# Pasta do blueprint (geracao_eventos/)
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+FACES_D20 = 20
+
+TIPOS_EVENTO_TERRENO = ('false_alarms', 'anomalies', 'temporary_obstacles', 'events')
+
+# Textos de saída (os mesmos que generate_creature sempre devolveu)
+TIPO_SEM_RARIDADE = "Tipo Padrão (sem raridade definida)"
+TIPO_ERRO = "Indefinido (Erro de sistema)"
+INDEFINIDO = "Indefinido"
+
+
+# ========== AUXILIARES DE COMPILAÇÃO ==========
+
+def normalizar_opcoes(options):
+    """Converte os formatos aceitos de tabela em (descrições, pesos)."""
+    if isinstance(options, dict) and all(isinstance(v, (int, float)) for v in options.values()):
+        # Formato "chave": peso
+        return list(options.keys()), list(options.values())
+    if isinstance(options, dict) and 'options' in options:
+        # Formato { "options": [{"description": ..., "weight": ...}] }
+        return ([opt['description'] for opt in options['options']],
+                [opt['weight'] for opt in options['options']])
+    if isinstance(options, dict) and any('-' in k for k in options.keys()):
+        # Formato "1-5": "descrição" (assume peso 1)
+        return list(options.values()), [1] * len(options)
+    # Fallback para listas simples ou formatos não reconhecidos (sorteio uniforme)
+    if isinstance(options, list):
+        return options, [1] * len(options)
+    return list(options.keys()), [1] * len(options)
+
+
+def tabela_opcoes(options):
+    """TabelaPesos de uma tabela simples (None se o formato não for sorteável)."""
+    if not isinstance(options, (dict, list)):
+        return None
+    tabela = compilar(options, normalizar_opcoes)
+    return tabela if tabela else None
+
+
+def probabilidades(tabela):
+    """[(opção, probabilidade)] com a semântica de TabelaPesos (peso <= 0 some; tudo zero = uniforme)."""
+    if tabela.total > 0:
+        return [(o, p / tabela.total) for o, p in zip(tabela.opcoes, tabela.pesos) if p > 0]
+    n = len(tabela.opcoes)
+    return [(o, 1.0 / n) for o in tabela.opcoes] if n else []
+
+
+def faces_d20(tabela, casa):
+    """
+    Formato antigo de faixas num d20 ("1-5": x, [1, 5], 7...): lista com o
+    resultado de cada face (índice 0 = face 1), com a primeira faixa que
+    contém a face vencendo (mesma ordem do laço original); None = sem faixa.
+    'casa(chave, valor)' devolve (mínimo, máximo, resultado) ou None.
+    """
+    faces = [None] * FACES_D20
+    for chave, valor in tabela.items():
+        faixa = casa(chave, valor)
+        if faixa is None:
+            continue
+        minimo, maximo, resultado = faixa
+        for face in range(max(minimo, 1), min(maximo, FACES_D20) + 1):
+            if faces[face - 1] is None:
+                faces[face - 1] = (resultado,)
+    return [face[0] if face is not None else None for face in faces]
+
+
+def faixas_d20(tabela, casa):
+    """{resultado: chance} das faixas de faces_d20 (faces sem faixa somam em None)."""
+    chances = {}
+    for resultado in faces_d20(tabela, casa):
+        chances[resultado] = chances.get(resultado, 0.0) + 1.0 / FACES_D20
+    return chances
+
+
+def _faixa_lista(tipo, valor):
+    """Faixa [mín, máx] ou face única (tipos_encontro.json antigo, horario.json)."""
+    if isinstance(valor, list) and len(valor) == 2:
+        return valor[0], valor[1], tipo
+    if isinstance(valor, int):
+        return valor, valor, tipo
+    return None
+
+
+def _faixa_categoria(chave, dados):
+    try:
+        if '-' in chave:
+            minimo, maximo = map(int, chave.split('-'))
+        else:
+            minimo = maximo = int(chave)
+    except ValueError:
+        return None
+    return minimo, maximo, dados['category']
+
+
+def pasta_categoria(categoria):
+    return categoria.lower().replace('í', 'i').replace(' ', '-')
+
+
+class TabelaFaces:
+    """Resultado de cada face de um d20 (ex: horario.json), para consulta direta pela rolagem."""
+    __slots__ = ('faces',)
+
+    def __init__(self, faces):
+        self.faces = [None] + list(faces)   # índice = valor rolado
+
+    def localizar(self, rolagem):
+        return self.faces[rolagem] if 1 <= rolagem <= FACES_D20 else None
+
+
+def _faces_horario(horarios):
+    return (faces_d20(horarios, _faixa_lista),)
+
+
+def tabela_horarios():
+    """horario.json compilado uma vez (faixas [mín, máx] ou face única -> período do dia)."""
+    return compilar(carregar_json(os.path.join(BASE_DIR, 'horario.json')), _faces_horario, TabelaFaces)
+
+
+# ========== MODELO DE UM TERRENO ==========
+
+class CategoriaCriatura:
+    """Categoria de criatura de um terreno (pasta, condições e raças já compiladas)."""
+    __slots__ = ('nome', 'pasta', 'humanoide', 'condicoes', 'racas')
+
+    def __init__(self, nome, pasta, condicoes, racas):
+        self.nome = nome
+        self.pasta = pasta
+        self.humanoide = nome.lower() == 'humanoide'
+        self.condicoes = condicoes   # TabelaPesos ou None (arquivo ausente/inválido)
+        self.racas = racas
+
+    def descrever(self, tipo, rng):
+        condicao = self.condicoes.sortear(rng) if self.condicoes else INDEFINIDO
+        if self.humanoide:
+            raca = self.racas.sortear(rng) if self.racas else INDEFINIDO
+            return {'descricao': f"Humanoide - {tipo} ({condicao}, {raca})", 'tipo': 'humanoide'}
+        return {'descricao': f"{self.nome} - {tipo} ({condicao})", 'tipo': self.pasta}
+
+
+class TerrainEncounterModel:
+    """
+    Cadeia de encontros de um terreno compilada uma única vez:
+    tipos_encontro -> categories -> rarity_weights -> tipos/condicoes/racas.
+
+    A escolha de categoria, raridade e tipo de criatura vira uma única
+    distribuição conjunta achatada (um sorteio alias); condição e raça são
+    independentes do tipo e ficam em tabelas próprias por categoria. Os
+    formatos antigos de faixas no d20 são convertidos em pesos (faces / 20).
+    """
+
+    def __init__(self, terreno, base_dir=BASE_DIR):
+        self.terreno = terreno
+        self.base_dir = base_dir
+        self._fontes = []            # [(caminho, tabela ou None)] usados para detectar mudanças
+        self.verificado_em = time.monotonic()
+
+        config = self._tabela(os.path.join(base_dir, 'tipos_encontro.json'), obrigatoria=True)
+        self.tipos_encontro = self._compilar_tipos_encontro(config.get(terreno, {}))
+
+        pasta_terreno = os.path.join(base_dir, 'encounters', terreno)
+        self.eventos = {}
+        for nome in TIPOS_EVENTO_TERRENO:
+            self.eventos[nome] = tabela_opcoes(self._tabela(os.path.join(pasta_terreno, f'{nome}.json'),
+                                                            obrigatoria=True))
+
+        self.categorias = []
+        # Cadeia antes de achatar (para análise): [(índice da categoria ou None, P(categoria),
+        #   [(raridade ou None, P(raridade), [(tipo, P(tipo | raridade))])])]
+        self.arvore = []
+        self.erro_criaturas = None
+        try:
+            self.criaturas = self._compilar_criaturas(os.path.join(pasta_terreno, 'creatures'))
+        except Exception as e:
+            print(f"Erro ao compilar criaturas de '{terreno}': {str(e)}")
+            self.criaturas = None
+            self.erro_criaturas = str(e)
+
+    # --- Leitura (registra as tabelas de origem) ---
+
+    def _tabela(self, caminho, obrigatoria=False):
+        try:
+            dados = carregar_json(caminho)
+        except (OSError, json.JSONDecodeError):
+            if obrigatoria:
+                raise
+            dados = None
+        self._fontes.append((caminho, dados))
+        return dados
+
+    def atualizado(self):
+        """True se nenhuma tabela de origem mudou no registro desde a compilação."""
+        for caminho, dados in self._fontes:
+            try:
+                atual = carregar_json(caminho)
+            except (OSError, json.JSONDecodeError):
+                atual = None
+            if atual is not dados:
+                return False
+        return True
+
+    # --- Compilação ---
+
+    def _compilar_tipos_encontro(self, config):
+        if isinstance(config, dict) and all(isinstance(v, (int, float)) for v in config.values()):
+            return tabela_opcoes(config)
+        # Formato antigo de 1-20: faces sem faixa dão "Encontro indefinido" (None)
+        chances = faixas_d20(config, _faixa_lista) if isinstance(config, dict) else {None: 1.0}
+        return TabelaPesos(chances.keys(), chances.values())
+
+    def _compilar_criaturas(self, pasta):
+        categorias_dados = self._tabela(os.path.join(pasta, 'categories.json'), obrigatoria=True)
+        if not isinstance(categorias_dados, dict):
+            return "Criatura desconhecida (formato categories.json inválido)"
+
+        if all('|' in chave for chave in categorias_dados.keys()):
+            tabela = tabela_opcoes(categorias_dados)
+            chances = {}
+            for opcao, p in probabilidades(tabela):
+                nome, _ = opcao.split('|')
+                chances[nome.strip()] = chances.get(nome.strip(), 0.0) + p
+        else:
+            chances = faixas_d20(categorias_dados, _faixa_categoria)
+
+        pesos_raridade = None
+        opcoes, pesos = [], []
+        for nome, p_categoria in chances.items():
+            if nome is None:
+                self.arvore.append((None, p_categoria, []))
+                opcoes.append(None)
+                pesos.append(p_categoria)
+                continue
+            categoria = self._compilar_categoria(pasta, nome)
+            indice = len(self.categorias)
+            self.categorias.append(categoria)
+
+            tipos = self._tabela(os.path.join(pasta, categoria.pasta, 'tipos.json'))
+            if isinstance(tipos, dict) and tipos and all(isinstance(v, dict) for v in tipos.values()):
+                # Tipos aninhados por raridade: P(tipo) = P(raridade) * P(tipo | raridade)
+                if pesos_raridade is None:
+                    pesos_raridade = self._tabela(os.path.join(pasta, 'rarity_weights.json'))
+                raridades = self._tipos_por_raridade(tipos, pesos_raridade)
+            elif isinstance(tipos, (dict, list)):
+                tabela_tipos = tabela_opcoes(tipos)
+                raridades = [(None, 1.0, probabilidades(tabela_tipos) if tabela_tipos else [(INDEFINIDO, 1.0)])]
+            else:
+                raridades = [(None, 1.0, [(TIPO_ERRO, 1.0)])]
+            self.arvore.append((indice, p_categoria, raridades))
+
+            # Achata raridade -> tipo (tipos repetidos em raridades diferentes somam)
+            distribuicao = {}
+            for _, p_raridade, pares in raridades:
+                for tipo, p_tipo in pares:
+                    distribuicao[tipo] = distribuicao.get(tipo, 0.0) + p_raridade * p_tipo
+            for tipo, p_tipo in distribuicao.items():
+                opcoes.append((indice, tipo))
+                pesos.append(p_categoria * p_tipo)
+        return TabelaPesos(opcoes, pesos)
+
+    def _compilar_categoria(self, pasta, nome):
+        pasta_cat = pasta_categoria(nome)
+        condicoes = self._tabela(os.path.join(pasta, pasta_cat, 'condicoes.json'))
+        racas = None
+        if nome.lower() == 'humanoide':
+            racas = tabela_opcoes(self._tabela(os.path.join(pasta, pasta_cat, 'racas.json')))
+        return CategoriaCriatura(nome, pasta_cat, tabela_opcoes(condicoes), racas)
+
+    @staticmethod
+    def _tipos_por_raridade(tipos, pesos_raridade):
+        """[(raridade, P(raridade), [(tipo, P(tipo | raridade))])] com os mesmos fallbacks do sorteio."""
+        if not isinstance(pesos_raridade, dict):
+            return [(None, 1.0, [(TIPO_ERRO, 1.0)])]
+        tabela_raridade = tabela_opcoes(pesos_raridade)
+        if tabela_raridade is None:
+            return [(None, 1.0, [(INDEFINIDO, 1.0)])]
+        primeira = next(iter(tipos.values()))
+        raridades = []
+        for raridade, p_raridade in probabilidades(tabela_raridade):
+            opcoes = tipos.get(raridade) or tipos.get('comum') or primeira
+            tabela_tipos = tabela_opcoes(opcoes) if opcoes else None
+            pares = probabilidades(tabela_tipos) if tabela_tipos else [(TIPO_SEM_RARIDADE, 1.0)]
+            raridades.append((raridade, p_raridade, pares))
+        return raridades
+
+    # --- Sorteios ---
+
+    def sortear_tipo_encontro(self, rng):
+        """Chave de tipos_encontro.json (None = encontro indefinido)."""
+        return self.tipos_encontro.sortear(rng) if self.tipos_encontro else None
+
+    def sortear_evento(self, nome, rng):
+        tabela = self.eventos[nome]
+        return tabela.sortear(rng) if tabela else INDEFINIDO
+
+    def gerar_criatura(self, rng):
+        """{'descricao', 'tipo'} como generate_creature: um sorteio conjunto + condição/raça."""
+        if self.criaturas is None:
+            return {'descricao': "Criatura indefinida (erro)", 'tipo': None}
+        if isinstance(self.criaturas, str):
+            return {'descricao': self.criaturas, 'tipo': None}
+        if not self.criaturas:
+            return {'descricao': "Criatura desconhecida (rolagem fora da faixa)", 'tipo': None}
+        resultado = self.criaturas.sortear(rng)
+        if resultado is None:
+            return {'descricao': "Criatura desconhecida (rolagem fora da faixa)", 'tipo': None}
+        indice, tipo = resultado
+        return self.categorias[indice].descrever(tipo, rng)
+
+
+# ========== CACHE POR TERRENO ==========
+
+_modelos = {}            # (base_dir, terreno) -> TerrainEncounterModel
+_modelos_lock = threading.Lock()
+
+
+def obter_modelo(terreno, base_dir=BASE_DIR):
+    """
+    Modelo compilado do terreno. É recompilado quando alguma tabela de origem
+    muda no registro (verificado no mesmo intervalo de revalidação do registro).
+    Levanta as exceções de leitura de tipos_encontro.json e das tabelas de eventos.
+    """
+    chave = (base_dir, terreno)
+    modelo = _modelos.get(chave)
+    if modelo is not None:
+        intervalo = obter_registro().intervalo_revalidacao
+        if intervalo is None or time.monotonic() - modelo.verificado_em < intervalo:
+            return modelo
+        if modelo.atualizado():
+            modelo.verificado_em = time.monotonic()
+            return modelo
+    with _modelos_lock:
+        atual = _modelos.get(chave)
+        if atual is not None and atual is not modelo:
+            return atual  # Outra thread acabou de recompilar
+        modelo = TerrainEncounterModel(terreno, base_dir)
+        _modelos[chave] = modelo
+    return modelo
+
+
+def limpar_modelos():
+    with _modelos_lock:
+        _modelos.clear()
@@ -1,13 +1,23 @@
-from flask import Blueprint, render_template, request, jsonify, send_from_directory, session
+from flask import (Blueprint, Response, render_template, request, jsonify,
+                   send_from_directory, session, stream_with_context)
 import json
 import random
 import os
-import datetime
 from functools import lru_cache
 from pathlib import Path
-import sys
 import re
-from io import StringIO
+import threading
+import time
+from painel.escritor_logs import EscritorLogs
+from painel.fluxo import transmitir_template
+from painel.tabelas import carregar_json, obter_registro
+from painel.opcional import numpy_opcional
+from painel.sorteio import compilar, gerador_numpy
+from painel.rolagem import resolver_dados_em_texto
+from .analise_probabilidades import analisar_terreno, monte_carlo
+from .arquivo_viagens import ArquivoViagens
+from .caracteristicas import TabelaCaracteristicas
+from .modelo_encontros import normalizar_opcoes as _normalizar_opcoes, obter_modelo, tabela_horarios
 
 # --- 1. CONFIGURAÇÃO DO BLUEPRINT ---
 eventos_bp = Blueprint('eventos', __name__,
@@ -26,6 +36,8 @@ except ImportError:
         def __init__(self, base_path=None): # Adicionado base_path para compatibilidade
             print("ERRO: Classe GeradorEquipamentos não carregada.")
         def gerar_equipamentos(self, **kwargs): return {}
+        def equipar_exercito(self, soldados, **kwargs): return {}
+        def atualizado(self): return True
         def formatar_equipamento(self, item, escudo=None, arma_secundaria=None): return "Erro ao formatar"
 
 # --- 2. FUNÇÃO HELPER DE CAMINHO ---
@@ -82,51 +94,43 @@ def create_folder_structure():
                 with open(file_path, 'w', encoding='utf-8') as f:
                     json.dump({"Exemplo": "Descrição do evento"}, f, indent=2)
 
-create_folder_structure()
+# A estrutura é criada no aquecimento do app (segundo plano) ou, no mais tardar,
+# na primeira requisição do blueprint — nunca na importação do módulo.
+_estrutura_criada = False
+_estrutura_lock = threading.Lock()
+
+def garantir_estrutura():
+    """Executa create_folder_structure() uma única vez por processo."""
+    global _estrutura_criada
+    if _estrutura_criada:
+        return
+    with _estrutura_lock:
+        if not _estrutura_criada:
+            create_folder_structure()
+            _estrutura_criada = True
+
+@eventos_bp.before_request
+def _garantir_estrutura_antes_da_rota():
+    garantir_estrutura()
 
 # ========== FUNÇÕES UTILITÁRIAS (Caminhos corrigidos) ==========
 
 def select_by_weight(options):
     """Seleciona uma opção baseada em pesos, compatível com múltiplos formatos"""
-    if isinstance(options, dict) and all(isinstance(v, (int, float)) for v in options.values()):
-        # Formato "chave": peso
-        items = list(options.items())
-        descriptions = [item[0] for item in items]
-        weights = [item[1] for item in items]
-    elif isinstance(options, dict) and 'options' in options:
-        # Formato { "options": [{"description": ..., "weight": ...}] }
-        descriptions = [opt['description'] for opt in options['options']]
-        weights = [opt['weight'] for opt in options['options']]
-    elif isinstance(options, dict) and any('-' in k for k in options.keys()):
-        # Formato "1-5": "descrição" (assume peso 1)
-        descriptions = list(options.values())
-        weights = [1] * len(descriptions)
-    else:
-        # Fallback para listas simples ou formatos não reconhecidos
-        if isinstance(options, list):
-            return random.choice(options) if options else "Indefinido"
-        if isinstance(options, dict):
-             return random.choice(list(options.keys())) if options else "Indefinido"
+    if not isinstance(options, (dict, list)):
         print(f"Erro: Formato de 'options' não reconhecido: {options}")
         return "Indefinido"
-    
-    total = sum(weights)
-    if total == 0:
-        return random.choice(descriptions) if descriptions else "Indefinido"
-    r = random.uniform(0, total)
-    upto = 0
-    for i, weight in enumerate(weights):
-        if upto + weight >= r:
-            return descriptions[i]
-        upto += weight
-    return descriptions[-1] # Fallback
+    # Tabelas do registro são compiladas uma vez (alias de Vose); o sorteio é O(1)
+    tabela = compilar(options, _normalizar_opcoes)
+    if not tabela:
+        return "Indefinido"
+    return tabela.sortear()
 
 def roll_for_detail(file_path):
     """Rola detalhes específicos, compatível com vários formatos"""
     try:
         # file_path JÁ DEVE ser absoluto
-        with open(file_path, 'r', encoding='utf-8') as f:
-            details = json.load(f)
+        details = carregar_json(file_path)
         return select_by_weight(details)
     except Exception as e:
         print(f"Erro ao rolar detalhe em {file_path}: {str(e)}")
@@ -136,12 +140,10 @@ def roll_for_type_by_rarity(file_path, terrain):
     """Rola um tipo de criatura baseado em um sistema de raridade aninhado."""
     try:
         rarity_weights_path = get_bp_path(f'encounters/{terrain}/creatures/rarity_weights.json')
-        with open(rarity_weights_path, 'r', encoding='utf-8') as f:
-            rarity_weights = json.load(f)
+        rarity_weights = carregar_json(rarity_weights_path)
         chosen_rarity = select_by_weight(rarity_weights)
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            types_by_rarity = json.load(f)
+        types_by_rarity = carregar_json(file_path)
 
         creature_options = types_by_rarity.get(chosen_rarity)
         if not creature_options:
@@ -156,29 +158,10 @@ def roll_for_type_by_rarity(file_path, terrain):
         print(f"Erro ao rolar tipo por raridade: {str(e)}")
         return "Indefinido (Erro de sistema)"
 
-# ========== FUNÇÕES DE ROLAGEM DE DADOS (COPIADAS DO DESTINO_NPC) ==========
-def _roll_match(match):
-    """Função auxiliar interna para o dice parser."""
-    full_text = match.group(0) # ex: "1d4-1"
-    num_dice = int(match.group(1)) # ex: 1
-    die_face = int(match.group(2)) # ex: 4
-    operator = match.group(4) # ex: "-"
-    modifier = int(match.group(5) or 0) # ex: 1
-    
-    roll_total = sum(random.randint(1, die_face) for _ in range(num_dice))
-    
-    final_total = roll_total
-    if operator == '+':
-        final_total = roll_total + modifier
-    elif operator == '-':
-        final_total = max(1, roll_total - modifier) # Garante que não seja menor que 1
-
-    return f"{full_text} (rolado {final_total})"
-
+# ========== FUNÇÕES DE ROLAGEM DE DADOS (MOTOR COMPARTILHADO EM painel.rolagem) ==========
 def resolve_dice_in_string(text):
     """Encontra e rola todas as notações de dado (ex: "1d6", "1d4-1") em uma string."""
-    pattern = r'(\d+)d(\d+)(([+-])(\d+))?'
-    return re.sub(pattern, _roll_match, text)
+    return resolver_dados_em_texto(text)
 
 # ========== FUNÇÕES DE DEBUG (Caminhos corrigidos) ==========
 def calculate_theoretical_chance(categories, target_category):
@@ -193,27 +176,31 @@ def calculate_theoretical_chance(categories, target_category):
                 total += 1
     return total / 20
 
+def analisar_probabilidades(terrain, samples=0, limite=25):
+    """Análise exata do terreno (analise_probabilidades) e, se samples > 0, a verificação por Monte Carlo."""
+    modelo = obter_modelo(terrain)
+    chances = {'dia': chance_de_encontro(terrain, False), 'noite': chance_de_encontro(terrain, True)}
+    analise = analisar_terreno(modelo, limite=limite, chances=chances)
+    analise['monte_carlo'] = monte_carlo(modelo, samples) if samples else None
+    return analise
+
 def debug_category_probabilities(terrain='floresta', samples=100000):
-    """Analisa as probabilidades reais de encontro por categoria"""
+    """Probabilidades exatas por categoria/raridade (e as observadas em 'samples' sorteios)"""
     try:
-        with open(get_bp_path(f'encounters/{terrain}/creatures/categories.json'), 'r', encoding='utf-8') as f:
-            categories_data = json.load(f)
-        
-        # ... (Sua lógica de debug original) ...
-        print(f"<br>=== DEBUG DE PROBABILIDADES ({terrain.upper()}) ===")
-        return {}
+        analise = analisar_probabilidades(terrain, samples)
+        mc = analise['monte_carlo'] or {}
+        return {'terreno': terrain, 'categorias': analise['categorias'], 'raridades': analise['raridades'],
+                'monte_carlo': {k: mc[k] for k in ('amostras', 'categorias', 'criaturas', 'condicoes', 'aviso') if k in mc}}
     except Exception as e:
         print(f"Erro no debug: {str(e)}"); return {}
 
 def debug_encounter_types(terrain='floresta', samples=10000):
-    """Analisa a distribuição dos tipos de encontro"""
+    """Probabilidades exatas dos tipos de encontro, com o double_roll expandido"""
     try:
-        with open(get_bp_path('tipos_encontro.json'), 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        
-        # ... (Sua lógica de debug original) ...
-        print(f"<br>=== DEBUG DE TIPOS DE ENCONTRO ({terrain.upper()}) ===")
-        return {}
+        analise = analisar_probabilidades(terrain, samples)
+        mc = analise['monte_carlo'] or {}
+        return {'terreno': terrain, 'tipos_encontro': analise['tipos_encontro'], 'double_roll': analise['double_roll'],
+                'monte_carlo': {k: mc[k] for k in ('amostras', 'tipos_encontro', 'aviso') if k in mc}}
     except Exception as e:
         print(f"Erro no debug: {str(e)}"); return {}
 
@@ -221,123 +208,78 @@ def debug_encounter_types(terrain='floresta', samples=10000):
 def load_terrain_encounters(terrain):
     """Carrega eventos específicos do terreno"""
     return {
-        'false_alarms': json.load(open(get_bp_path(f'encounters/{terrain}/false_alarms.json'), encoding='utf-8')),
-        'anomalies': json.load(open(get_bp_path(f'encounters/{terrain}/anomalies.json'), encoding='utf-8')),
-        'temporary_obstacles': json.load(open(get_bp_path(f'encounters/{terrain}/temporary_obstacles.json'), encoding='utf-8')),
-        'events': json.load(open(get_bp_path(f'encounters/{terrain}/events.json'), encoding='utf-8'))
+        'false_alarms': carregar_json(get_bp_path(f'encounters/{terrain}/false_alarms.json')),
+        'anomalies': carregar_json(get_bp_path(f'encounters/{terrain}/anomalies.json')),
+        'temporary_obstacles': carregar_json(get_bp_path(f'encounters/{terrain}/temporary_obstacles.json')),
+        'events': carregar_json(get_bp_path(f'encounters/{terrain}/events.json'))
     }
 
 def generate_creature(terrain):
     """Gera uma criatura com tipo e características"""
     try:
-        with open(get_bp_path(f'encounters/{terrain}/creatures/categories.json'), 'r', encoding='utf-8') as f:
-            categories_data = json.load(f)
-        
-        if isinstance(categories_data, dict) and all('|' in key for key in categories_data.keys()):
-            selected = select_by_weight(categories_data)
-            category, file_path = selected.split('|')
-            category_data = {'category': category.strip(), 'file': file_path.strip()}
-        elif isinstance(categories_data, dict):
-            roll = random.randint(1, 20); category_data = None
-            for range_str, data in categories_data.items():
-                if '-' in range_str:
-                    min_val, max_val = map(int, range_str.split('-'))
-                    if min_val <= roll <= max_val: category_data = data; break
-                elif int(range_str) == roll: category_data = data; break
-        else:
-            return {'descricao': "Criatura desconhecida (formato categories.json inválido)", 'tipo': None}
-
-        if not category_data:
-            return {'descricao': "Criatura desconhecida (rolagem fora da faixa)", 'tipo': None}
-
-        folder_name = category_data['category'].lower().replace('í', 'i').replace(' ', '-')
-        base_path = get_bp_path(f'encounters/{terrain}/creatures/{folder_name}/')
-        
-        tipos_file_path = os.path.join(base_path, 'tipos.json')
-        tipo = roll_for_type_by_rarity(tipos_file_path, terrain)
-        
-        condicao = roll_for_detail(os.path.join(base_path, 'condicoes.json'))
-        
-        if category_data['category'].lower() == 'humanoide':
-            raca = roll_for_detail(os.path.join(base_path, 'racas.json'))
-            return {'descricao': f"Humanoide - {tipo} ({condicao}, {raca})", 'tipo': 'humanoide'}
-        
-        return {'descricao': f"{category_data['category']} - {tipo} ({condicao})", 'tipo': folder_name}
-
+        return obter_modelo(terrain).gerar_criatura(random)
     except Exception as e:
         print(f"Erro ao gerar criatura: {str(e)}")
         return {'descricao': "Criatura indefinida (erro)", 'tipo': None}
 
+TYPE_NAMES = {
+    'false_alarm': 'Alarme falso', 'creatures': 'Criaturas', 'anomaly': 'Anomalia',
+    'creatures_anomaly': 'Criaturas + Anomalia', 'temporary_obstacle': 'Obstáculo temporário',
+    'obstacle_creatures': 'Obstáculo + Criaturas', 'event': 'Evento especial',
+    'double_roll': 'Evento duplo'
+}
+
+def _descrever_encontro(modelo, encounter_type):
+    """(descrição sem dados rolados, encounter_data) de um tipo de encontro já sorteado."""
+    description = "Tipo de encontro desconhecido"
+    encounter_data_out = None
+
+    if encounter_type == 'false_alarm':
+        description = f"{TYPE_NAMES['false_alarm']}: {modelo.sortear_evento('false_alarms', random)}"
+    elif encounter_type == 'creatures':
+        creature_data = modelo.gerar_criatura(random)
+        description = f"{TYPE_NAMES['creatures']}: {creature_data['descricao']}"
+        encounter_data_out = {'tipo': creature_data['tipo']}
+    elif encounter_type == 'anomaly':
+        description = f"{TYPE_NAMES['anomaly']}: {modelo.sortear_evento('anomalies', random)}"
+    elif encounter_type == 'creatures_anomaly':
+        creature_data = modelo.gerar_criatura(random); anomaly = modelo.sortear_evento('anomalies', random)
+        description = f"{TYPE_NAMES['creatures_anomaly']}: {creature_data['descricao']} e {anomaly}"
+        encounter_data_out = {'tipo': creature_data['tipo']}
+    elif encounter_type == 'temporary_obstacle':
+        description = f"{TYPE_NAMES['temporary_obstacle']}: {modelo.sortear_evento('temporary_obstacles', random)}"
+    elif encounter_type == 'obstacle_creatures':
+        obstacle = modelo.sortear_evento('temporary_obstacles', random); creature_data = modelo.gerar_criatura(random)
+        description = f"{TYPE_NAMES['obstacle_creatures']}: {obstacle} e {creature_data['descricao']}"
+        encounter_data_out = {'tipo': creature_data['tipo']}
+    elif encounter_type == 'event':
+        description = f"{TYPE_NAMES['event']}: {modelo.sortear_evento('events', random)}"
+    elif encounter_type == 'double_roll':
+        # As duas rolagens reaproveitam o mesmo modelo (nenhum arquivo é relido)
+        first = _encontro_do_modelo(modelo); second = _encontro_do_modelo(modelo)
+        if not first or not second:
+            description = "Evento duplo falhou"
+        else:
+            first_desc = first[0].split(": ", 1)[-1]; second_desc = second[0].split(": ", 1)[-1]
+            description = f"Evento duplo: {first_desc} e também {second_desc}"
+    return description, encounter_data_out
+
+def _encontro_do_modelo(modelo, encounter_type=None):
+    """Sorteia (se preciso) e descreve um encontro; None se o tipo for indefinido."""
+    encounter_type = encounter_type or modelo.sortear_tipo_encontro(random)
+    if not encounter_type:
+        return None
+    description, encounter_data_out = _descrever_encontro(modelo, encounter_type)
+    # Rola quaisquer dados (ex: "2d4 bandidos") na string de descrição final
+    return resolve_dice_in_string(description), encounter_data_out
+
 def generate_single_encounter(is_night, terrain, encounter_type=None):
     """Gera um encontro completo com probabilidades por terreno"""
     try:
-        encounters = load_terrain_encounters(terrain)
-        type_names = {
-            'false_alarm': 'Alarme falso', 'creatures': 'Criaturas', 'anomaly': 'Anomalia',
-            'creatures_anomaly': 'Criaturas + Anomalia', 'temporary_obstacle': 'Obstáculo temporário',
-            'obstacle_creatures': 'Obstáculo + Criaturas', 'event': 'Evento especial',
-            'double_roll': 'Evento duplo'
-        }
-
-        if not encounter_type:
-            with open(get_bp_path('tipos_encontro.json'), 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            terrain_config = config.get(terrain, {})
-            
-            if isinstance(terrain_config, dict) and all(isinstance(v, (int, float)) for v in terrain_config.values()):
-                encounter_type = select_by_weight(terrain_config)
-            else: # Fallback para o seu formato antigo de 1-20
-                roll = random.randint(1, 20)
-                for encounter, range_values in terrain_config.items():
-                    if isinstance(range_values, list) and len(range_values) == 2:
-                        if range_values[0] <= roll <= range_values[1]:
-                            encounter_type = encounter; break
-                    elif isinstance(range_values, int) and roll == range_values:
-                        encounter_type = encounter; break
-
-        if not encounter_type:
+        encontro = _encontro_do_modelo(obter_modelo(terrain), encounter_type)
+        if encontro is None:
             return {'description': "Encontro indefinido", 'time_roll': random.randint(1, 20), 'encounter_data': None}
-
-        # --- Bloco de Geração de Descrição ---
-        description = "Tipo de encontro desconhecido"
-        encounter_data_out = None
-
-        if encounter_type == 'false_alarm':
-            options = encounters['false_alarms']; chosen = select_by_weight(options)
-            description = f"{type_names['false_alarm']}: {chosen}"
-        elif encounter_type == 'creatures':
-            creature_data = generate_creature(terrain)
-            description = f"{type_names['creatures']}: {creature_data['descricao']}"
-            encounter_data_out = {'tipo': creature_data['tipo']}
-        elif encounter_type == 'anomaly':
-            options = encounters['anomalies']; chosen = select_by_weight(options)
-            description = f"{type_names['anomaly']}: {chosen}"
-        elif encounter_type == 'creatures_anomaly':
-            creature_data = generate_creature(terrain); anomaly = select_by_weight(encounters['anomalies'])
-            description = f"{type_names['creatures_anomaly']}: {creature_data['descricao']} e {anomaly}"
-            encounter_data_out = {'tipo': creature_data['tipo']}
-        elif encounter_type == 'temporary_obstacle':
-            options = encounters['temporary_obstacles']; chosen = select_by_weight(options)
-            description = f"{type_names['temporary_obstacle']}: {chosen}"
-        elif encounter_type == 'obstacle_creatures':
-            obstacle = select_by_weight(encounters['temporary_obstacles']); creature_data = generate_creature(terrain)
-            description = f"{type_names['obstacle_creatures']}: {obstacle} e {creature_data['descricao']}"
-            encounter_data_out = {'tipo': creature_data['tipo']}
-        elif encounter_type == 'event':
-            options = encounters['events']; chosen = select_by_weight(options)
-            description = f"{type_names['event']}: {chosen}"
-        elif encounter_type == 'double_roll':
-            first = generate_single_encounter(is_night, terrain); second = generate_single_encounter(is_night, terrain)
-            if not first or not second:
-                description = "Evento duplo falhou"
-            else:
-                first_desc = first['description'].split(": ", 1)[-1]; second_desc = second['description'].split(": ", 1)[-1]
-                description = f"Evento duplo: {first_desc} e também {second_desc}"
-        
-        # --- ATUALIZAÇÃO AQUI ---
-        # Rola quaisquer dados (ex: "2d4 bandidos") na string de descrição final
-        resolved_description = resolve_dice_in_string(description)
-        
+        resolved_description, encounter_data_out = encontro
         return {
             'description': resolved_description, # Retorna a descrição com os dados rolados
             'time_roll': random.randint(1, 20),
@@ -348,27 +290,264 @@ def generate_single_encounter(is_night, terrain, encounter_type=None):
         print(f"Erro ao gerar encontro: {str(e)}")
         return {'description': "Erro no sistema", 'time_roll': random.randint(1, 20), 'encounter_data': None}
 
+def _descrever_trechos(trechos):
+    return " → ".join(f"{nome} ({dias} dias, {'noite' if noite else 'dia'})" for nome, dias, noite in trechos)
+
+def _cabecalho_log(terrain, days, is_night, trechos=None):
+    if trechos:
+        return f"=== Relatório de Viagem ===\nRota: {_descrever_trechos(trechos)}\nDias: {days}\n\n"
+    return (f"=== Relatório de Viagem ===\n"
+            f"Terreno: {terrain}\nDias: {days}\nPeríodo: {'noite' if is_night else 'dia'}\n\n")
+
+def _linha_log(r):
+    linha = f"Dia {r['day']} [{r['terrain']}]: " if 'terrain' in r else f"Dia {r['day']}: "
+    return linha + (f"{r['encounter']} ({r['time_of_day']})\n" if r['encounter'] else "Sem eventos\n")
+
+# Relatórios são gravados por uma thread própria (painel.escritor_logs), fora da requisição
+_escritor_logs = None
+_escritor_lock = threading.Lock()
+
+def obter_escritor_logs():
+    global _escritor_logs
+    if _escritor_logs is None:
+        with _escritor_lock:
+            if _escritor_logs is None:
+                _escritor_logs = EscritorLogs(get_bp_path('logs'))
+    return _escritor_logs
+
+def reservar_log(terrain, days, is_night, trechos=None):
+    """
+    Escolhe o nome (único) do log da viagem, sem abrir o arquivo.
+    Retorna ((nome, cabeçalho), caminho relativo) ou (None, None).
+    'trechos' ([(nome do terreno, dias, is_night)]) descreve uma rota com vários terrenos.
+    """
+    try:
+        nome = obter_escritor_logs().novo_nome(f"viagem_{terrain}")
+        return (nome, _cabecalho_log(terrain, days, is_night, trechos)), f"logs/{nome}" # Caminho *relativo*
+    except Exception as e:
+        print(f"Erro ao salvar TXT: {str(e)}"); return None, None
+
+def registrar_no_log(dias, reserva):
+    """
+    Repassa os dias da viagem enfileirando cada um no log assim que é produzido.
+    O log (reserva de reservar_log) só é aberto no primeiro next(): se o corpo da
+    resposta nunca for lido (HEAD, cliente que desconecta antes), o finally não
+    rodaria e o relatório ficaria pendente para sempre no escritor.
+    """
+    arquivo = None
+    if reserva is not None:
+        try:
+            nome, cabecalho = reserva
+            arquivo = obter_escritor_logs().abrir(nome, cabecalho)
+        except Exception as e:
+            print(f"Erro ao salvar TXT: {str(e)}")
+    try:
+        for r in dias:
+            if arquivo is not None:
+                arquivo.escrever(_linha_log(r))
+            yield r
+    finally:
+        if arquivo is not None:
+            arquivo.fechar()
+
+# Cada viagem também vai para o arquivo indexado (SQLite), gravado em segundo plano
+_arquivo_viagens = None
+
+def obter_arquivo_viagens():
+    global _arquivo_viagens
+    if _arquivo_viagens is None:
+        with _escritor_lock:
+            if _arquivo_viagens is None:
+                os.makedirs(get_bp_path('logs'), exist_ok=True)
+                _arquivo_viagens = ArquivoViagens(get_bp_path(os.path.join('logs', 'viagens.db')))
+    return _arquivo_viagens
+
+def registrar_no_arquivo(dias, terrain, periodo, days, txt_file):
+    """
+    Repassa os dias da viagem enviando os encontros para o arquivo indexado.
+    Como em registrar_no_log, a viagem só é iniciada no primeiro next(), e
+    finalizar() roda sempre que ela foi iniciada.
+    """
+    try:
+        viagem = obter_arquivo_viagens().iniciar(terrain, periodo, days, txt_file)
+    except Exception as e:
+        print(f"Erro ao arquivar viagem: {str(e)}")
+        yield from dias
+        return
+    try:
+        for r in dias:
+            viagem.registrar(r, terrain)
+            yield r
+    finally:
+        viagem.finalizar()
+
 def save_to_txt(results, terrain, days, is_night):
     """Salva os resultados em arquivo TXT na pasta 'logs' do blueprint"""
+    reserva, caminho = reservar_log(terrain, days, is_night)
+    for _ in registrar_no_log(results, reserva):
+        pass
+    return caminho
+
+# ========== SIMULAÇÃO DA VIAGEM ==========
+# Dias sorteados por lote na viagem (limita a memória de viagens muito longas)
+BLOCO_DIAS = 1024
+# Acima disso /generate responde em streaming mesmo sem ?stream=1
+LIMITE_SEM_STREAMING = 365
+
+def chance_de_encontro(terrain, is_night, chances_data=None):
+    """Probabilidade (0 a 1) de haver encontro num dia, de chance_encontro.json (em %)."""
+    if chances_data is None:
+        chances_data = carregar_json(get_bp_path('chance_encontro.json'))
+    periodo = "noite" if is_night else "dia"
+    default_chance = 8
+    encounter_chance = chances_data.get(terrain, {}).get(periodo, default_chance)
+    return min(max(encounter_chance, 0), 100) / 100
+
+def _encontro_do_dia(modelo, tipo_indice, time_roll, horarios):
+    """Texto do encontro de um dia cujo tipo e hora já foram sorteados em lote."""
+    encounter_type = None
     try:
-        log_dir = get_bp_path('logs')
-        os.makedirs(log_dir, exist_ok=True)
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"viagem_{terrain}_{timestamp}.txt"
-        full_path = os.path.join(log_dir, filename)
-        
-        content = f"=== Relatório de Viagem ===\n"
-        content += f"Terreno: {terrain}\nDias: {days}\nPeríodo: {'noite' if is_night else 'dia'}\n\n"
-        for r in results:
-            content += f"Dia {r['day']}: "
-            content += f"{r['encounter']} ({r['time_of_day']})\n" if r['encounter'] else "Sem eventos\n"
-        
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        return f"logs/{filename}" # Retorna o caminho *relativo*
+        encounter_type = modelo.tipos_encontro.opcoes[tipo_indice]
+        encontro = _encontro_do_modelo(modelo, encounter_type) if encounter_type else None
+        if encontro is None:
+            description, encounter_data = "Encontro indefinido", None
+        else:
+            description, encounter_data = encontro
     except Exception as e:
-        print(f"Erro ao salvar TXT: {str(e)}"); return None
+        print(f"Erro ao gerar encontro: {str(e)}")
+        description, encounter_data = "Erro no sistema", None
+    return description, horarios.localizar(time_roll), encounter_data, encounter_type
+
+def iterar_viagem(terrain, days, is_night, bloco=BLOCO_DIAS, primeiro_dia=1, chances_data=None):
+    """
+    Gera os dias da viagem um a um, em ordem.
+
+    Tudo o que é sorteio de tabela sai em lote a cada 'bloco' dias (com NumPy,
+    vetorizado): a máscara de dias com encontro, o tipo de cada encontro e a
+    rolagem de horário. Só os dias com encontro passam pela geração de texto,
+    e a memória usada não depende do tamanho da viagem.
+    Os dias são numerados a partir de 'primeiro_dia' (trechos de uma rota).
+    """
+    chance = chance_de_encontro(terrain, is_night, chances_data)
+    deslocamento = primeiro_dia - 1
+    np = numpy_opcional()
+    gerador = gerador_numpy() if np is not None else None
+    modelo = None
+    descricao_sem_modelo = None
+    horarios = None
+
+    for inicio in range(0, days, bloco):
+        n = min(bloco, days - inicio)
+        if np is not None:
+            dias = (np.flatnonzero(gerador.random(n) < chance) + inicio + 1).tolist()
+            time_rolls = gerador.integers(1, 21, len(dias)).tolist()
+        else:
+            dias = [inicio + i for i in range(1, n + 1) if random.random() < chance]
+            time_rolls = [random.randint(1, 20) for _ in dias]
+
+        if dias and horarios is None:
+            # Modelo e horários só são compilados quando o primeiro encontro aparece
+            horarios = tabela_horarios()
+            try:
+                modelo = obter_modelo(terrain)
+                if not modelo.tipos_encontro:
+                    descricao_sem_modelo = "Encontro indefinido"
+            except Exception as e:
+                print(f"Erro ao gerar encontro: {str(e)}")
+                descricao_sem_modelo = "Erro no sistema"
+
+        if descricao_sem_modelo is None and dias:
+            tipos = modelo.tipos_encontro.sortear_indices_lote(len(dias), gerador)
+            tipos = tipos.tolist() if np is not None else tipos
+        else:
+            tipos = [None] * len(dias)
+
+        encontros = iter(zip(dias, tipos, time_rolls))
+        proximo = next(encontros, None)
+        for day in range(inicio + 1, inicio + n + 1):
+            if proximo is None or proximo[0] != day:
+                yield {'day': day + deslocamento, 'encounter': None, 'time_of_day': None, 'encounter_data': None,
+                       'encounter_type': None}
+                continue
+            _, tipo_indice, time_roll = proximo
+            if tipo_indice is None:
+                encounter, time_of_day, encounter_data, encounter_type = (
+                    descricao_sem_modelo, horarios.localizar(time_roll), None, None)
+            else:
+                encounter, time_of_day, encounter_data, encounter_type = _encontro_do_dia(
+                    modelo, tipo_indice, time_roll, horarios)
+            yield {'day': day + deslocamento, 'encounter': encounter, 'time_of_day': time_of_day,
+                   'encounter_data': encounter_data, 'encounter_type': encounter_type}
+            proximo = next(encontros, None)
+
+def simular_viagem(terrain, days, is_night):
+    """Rola os encontros de cada dia da viagem e devolve a lista de resultados."""
+    return list(iterar_viagem(terrain, days, is_night))
+
+# ========== ROTAS COM VÁRIOS TRECHOS ==========
+_SEPARADORES_ROTA = re.compile(r'\s*(?:[,;>]|→|->)\s*')
+_PERIODOS = {'dia': False, 'day': False, 'd': False, 'noite': True, 'night': True, 'n': True}
+
+def ler_rota(rota, is_night_padrao=False, terrenos_validos=None):
+    """
+    Converte uma rota em [(terreno, dias, is_night)]. Aceita:
+      - texto: "floresta:3:noite > montanha:5 > costa:2" (separadores , ; > ou →);
+      - lista de listas: [["floresta", 3, "night"], ["montanha", 5]];
+      - lista de objetos: [{"terrain": "floresta", "days": 3, "time": "night"}, ...].
+    O período omitido usa 'is_night_padrao'. Com 'terrenos_validos', terrenos fora
+    dele são recusados. Levanta ValueError com a mensagem para o usuário.
+    """
+    if isinstance(rota, str):
+        rota = [parte.split(':') for parte in _SEPARADORES_ROTA.split(rota.strip()) if parte]
+    if not isinstance(rota, list) or not rota:
+        raise ValueError("Rota vazia ou em formato não reconhecido.")
+    segmentos = []
+    for i, trecho in enumerate(rota, 1):
+        if isinstance(trecho, dict):
+            trecho = [trecho.get('terrain', trecho.get('terreno')), trecho.get('days', trecho.get('dias')),
+                      trecho.get('time', trecho.get('periodo'))]
+        if not isinstance(trecho, (list, tuple)) or not 2 <= len(trecho) <= 3:
+            raise ValueError(f"Trecho {i} da rota inválido: use terreno:dias[:dia|noite].")
+        terreno = str(trecho[0] or '').strip().lower()
+        try:
+            dias = int(str(trecho[1]).strip())
+        except (TypeError, ValueError):
+            raise ValueError(f"Trecho {i} da rota: número de dias inválido ({trecho[1]!r}).")
+        if not terreno or dias < 1:
+            raise ValueError(f"Trecho {i} da rota: informe o terreno e ao menos 1 dia.")
+        if terrenos_validos is not None and terreno not in terrenos_validos:
+            raise ValueError(f"Trecho {i} da rota: terreno '{terreno}' desconhecido "
+                             f"(use {', '.join(sorted(terrenos_validos))}).")
+        periodo = trecho[2] if len(trecho) == 3 and trecho[2] not in (None, '') else None
+        if periodo is None:
+            is_night = is_night_padrao
+        elif isinstance(periodo, bool):
+            is_night = periodo
+        elif str(periodo).strip().lower() in _PERIODOS:
+            is_night = _PERIODOS[str(periodo).strip().lower()]
+        else:
+            raise ValueError(f"Trecho {i} da rota: período '{periodo}' inválido (use dia ou noite).")
+        segmentos.append((terreno, dias, is_night))
+    return segmentos
+
+def iterar_rota(segmentos, terrains):
+    """
+    Encadeia os trechos da rota numa única viagem (dias numerados de 1 até o total).
+    chance_encontro.json é lido uma vez; o modelo compilado de cada terreno é
+    reaproveitado por todos os trechos que passam por ele. Cada dia leva o
+    nome do terreno e o índice do trecho.
+    """
+    chances_data = carregar_json(get_bp_path('chance_encontro.json'))
+    primeiro_dia = 1
+    for indice, (terrain, days, is_night) in enumerate(segmentos):
+        nome_terreno = terrains.get(terrain, terrain)
+        for r in iterar_viagem(terrain, days, is_night, primeiro_dia=primeiro_dia, chances_data=chances_data):
+            r['terrain'] = nome_terreno; r['segmento'] = indice
+            yield r
+        primeiro_dia += days
+
+# Máximo de criaturas por chamada no modo horda de /gerar-caracteristicas
+MAX_CRIATURAS_HORDA = 500
 
 @lru_cache(maxsize=8)
 def load_characteristics_file(tipo: str) -> dict:
@@ -382,105 +561,156 @@ def load_characteristics_file(tipo: str) -> dict:
     if not arquivo: raise ValueError(f"Tipo {tipo} não suportado")
     
     caminho = get_bp_path(os.path.join('encounters', 'caracteristicas', arquivo))
-    if not os.path.exists(caminho):
+    try:
+        return carregar_json(caminho)
+    except FileNotFoundError:
         raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
-    
-    with open(caminho, 'r', encoding='utf-8') as f:
-        return json.load(f)
+
+@lru_cache(maxsize=8)
+def tabela_caracteristicas(tipo: str) -> TabelaCaracteristicas:
+    """Chaves e efeitos do tipo já separados em tuplas (ver caracteristicas.py)"""
+    return TabelaCaracteristicas(load_characteristics_file(tipo))
 
 # ========== ROTAS PRINCIPAIS (Convertidas para Blueprint) ==========
 @eventos_bp.route('/')
 def index():
-    terrains = json.load(open(get_bp_path('tipos_terreno.json'), encoding='utf-8'))
+    terrains = carregar_json(get_bp_path('tipos_terreno.json'))
     return render_template('eventos.html', terrains=terrains)
 
 @eventos_bp.route('/generate', methods=['POST', 'GET'])
 def generate():
-    terrains = json.load(open(get_bp_path('tipos_terreno.json'), encoding='utf-8'))
+    terrains = carregar_json(get_bp_path('tipos_terreno.json'))
     
     if request.method == 'POST':
-        terrain = request.form['terrain']; days = int(request.form['days'])
-        is_night = request.form.get('time') == 'night'
-        session['viagem_params'] = {'terrain': terrain, 'days': days, 'is_night': is_night}
+        dados = request.get_json(silent=True) if request.is_json else request.form
+        dados = dados or {}
+        is_night = dados.get('time') in ('night', 'noite') or dados.get('is_night') is True
+        if dados.get('rota'):
+            # Rota com vários trechos: "floresta:3 > montanha:5:noite > costa:2"
+            try:
+                segmentos = ler_rota(dados['rota'], is_night, terrains)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            try:
+                segmentos = [(dados['terrain'], int(dados['days']), is_night)]
+            except (KeyError, TypeError, ValueError):
+                return jsonify({'error': "Informe o terreno e os dias de viagem (ou uma rota)."}), 400
+            if segmentos[0][0] not in terrains or segmentos[0][1] < 1:
+                return jsonify({'error': "Terreno desconhecido ou dias de viagem menor que 1."}), 400
+        session['viagem_params'] = {'rota': [list(t) for t in segmentos]}
     else:
         params = session.get('viagem_params', {})
-        terrain = params.get('terrain', 'floresta'); days = params.get('days', 1)
-        is_night = params.get('is_night', False)
-    
-    with open(get_bp_path('chance_encontro.json'), 'r', encoding='utf-8') as f:
-        chances_data = json.load(f)
-
-    periodo = "noite" if is_night else "dia"
-    default_chance = 8 
-    encounter_chance = chances_data.get(terrain, {}).get(periodo, default_chance)
-
-    results = []
-    for day in range(1, days + 1):
-        peso_encontro = encounter_chance
-        peso_sem_encontro = max(0, 100 - peso_encontro)
-        opcoes_de_evento = {"encontro": peso_encontro, "sem_encontro": peso_sem_encontro}
-        resultado_do_dia = select_by_weight(opcoes_de_evento)
-
-        if resultado_do_dia == "encontro":
-            encounter_data = generate_single_encounter(is_night, terrain)
-            horarios = json.load(open(get_bp_path('horario.json'), encoding='utf-8'))
-            time_of_day = None
-            for time, time_range in horarios.items():
-                if isinstance(time_range, list):
-                    if time_range[0] <= encounter_data['time_roll'] <= time_range[1]:
-                        time_of_day = time; break
-                elif time_range == encounter_data['time_roll']:
-                    time_of_day = time; break
-            
-            results.append({
-                'day': day, 'encounter': encounter_data['description'],
-                'time_of_day': time_of_day, 'encounter_data': encounter_data['encounter_data']
-            })
-        else: # sem_encontro
-            results.append({
-                'day': day, 'encounter': None, 'time_of_day': None, 'encounter_data': None
-            })
-    
-    txt_file = save_to_txt(results, terrains.get(terrain, terrain), days, is_night)
+        if params.get('rota'):
+            segmentos = [tuple(t) for t in params['rota']]
+        else:
+            segmentos = [(params.get('terrain', 'floresta'), params.get('days', 1), params.get('is_night', False))]
+
+    days = sum(t[1] for t in segmentos)
+    if len(segmentos) == 1:
+        terrain, _, is_night = segmentos[0]
+        nome_terreno = terrains.get(terrain, terrain)
+        reserva_log, txt_file = reservar_log(nome_terreno, days, is_night)
+        # Os dias são produzidos sob demanda e vão para o log à medida que saem
+        results = registrar_no_log(iterar_viagem(terrain, days, is_night), reserva_log)
+        periodo = 'noite' if is_night else 'dia'
+    else:
+        trechos = [(terrains.get(t, t), d, n) for t, d, n in segmentos]
+        nome_terreno = " → ".join(nome for nome, _, _ in trechos)
+        reserva_log, txt_file = reservar_log('rota', days, False, trechos)
+        results = registrar_no_log(iterar_rota(segmentos, terrains), reserva_log)
+        periodo = _descrever_trechos(trechos)
+    results = registrar_no_arquivo(results, nome_terreno, periodo, days, txt_file)
     caracteristicas_qtd = request.args.get('qtd_carac', default=1, type=int)
-    
-    return render_template('eventos_results.html',
-                           results=results,
-                           terrain=terrains.get(terrain, terrain),
-                           days=days,
-                           txt_file=txt_file,
-                           qtd_caracteristicas=caracteristicas_qtd)
+
+    if request.args.get('formato') == 'ndjson':
+        viagem = {'viagem': {'terreno': nome_terreno, 'dias': days, 'periodo': periodo, 'log': txt_file,
+                             'trechos': [{'terreno': terrains.get(t, t), 'dias': d, 'periodo': 'noite' if n else 'dia'}
+                                         for t, d, n in segmentos]}}
+        return Response(stream_with_context(_linhas_ndjson(viagem, results)),
+                        mimetype='application/x-ndjson')
+
+    contexto = dict(results=results,
+                    terrain=nome_terreno,
+                    days=days,
+                    txt_file=txt_file,
+                    qtd_caracteristicas=caracteristicas_qtd)
+    if request.args.get('stream') or days > LIMITE_SEM_STREAMING:
+        return transmitir_template('eventos_results.html', **contexto)
+
+    contexto['results'] = list(results)
+    return render_template('eventos_results.html', **contexto)
+
+def _linhas_ndjson(cabecalho, results):
+    yield json.dumps(cabecalho, ensure_ascii=False) + "\n"
+    for r in results:
+        yield json.dumps(r, ensure_ascii=False) + "\n"
 
 @eventos_bp.route('/gerar-caracteristicas/<tipo>')
 def gerar_caracteristicas(tipo):
-    """Gera múltiplas características para o tipo especificado"""
+    """
+    Gera características para o tipo especificado. Com ?criaturas=N (modo horda)
+    devolve uma lista de características para cada uma das N criaturas.
+    """
     try:
         qtd = request.args.get('qtd', default=1, type=int)
-        caracteristicas = load_characteristics_file(tipo)
-        qtd = min(qtd, len(caracteristicas)); resultados = []
-        chaves = list(caracteristicas.keys())
-        
-        for _ in range(qtd):
-            if not chaves: break
-            chave = random.choice(chaves)
-            resultados.append({'caracteristica': chave, 'efeito': caracteristicas[chave]})
-            chaves.remove(chave)
-        return jsonify(resultados)
+        tabela = tabela_caracteristicas(tipo)
+        criaturas = request.args.get('criaturas', type=int)
+        if criaturas is None:
+            return jsonify(tabela.sortear(qtd))
+        criaturas = max(1, min(criaturas, MAX_CRIATURAS_HORDA))
+        return jsonify({'tipo': tipo, 'qtd': min(max(qtd, 0), len(tabela)),
+                        'criaturas': tabela.horda(criaturas, qtd)})
     except Exception as e:
         print(f"Erro ao gerar características: {str(e)}")
         return jsonify({'error': str(e)}), 400
     
+# Máximo de soldados por chamada no modo exército de /gerar-equipamentos
+MAX_SOLDADOS = 5000
+
+_gerador_equipamentos = None
+_gerador_verificado_em = 0.0
+_gerador_lock = threading.Lock()
+
+def obter_gerador_equipamentos():
+    """
+    GeradorEquipamentos compartilhado (tabelas já compiladas). É recriado quando
+    o equipamentos.json muda, verificado no intervalo de revalidação do registro.
+    """
+    global _gerador_equipamentos, _gerador_verificado_em
+    gerador = _gerador_equipamentos
+    if gerador is not None:
+        intervalo = obter_registro().intervalo_revalidacao
+        if intervalo is None or time.monotonic() - _gerador_verificado_em < intervalo:
+            return gerador
+        if gerador.atualizado():
+            _gerador_verificado_em = time.monotonic()
+            return gerador
+    with _gerador_lock:
+        if _gerador_equipamentos is not None and _gerador_equipamentos is not gerador:
+            return _gerador_equipamentos  # Outra thread acabou de recriar
+        _gerador_equipamentos = GeradorEquipamentos(base_path=bp_dir)
+        _gerador_verificado_em = time.monotonic()
+    return _gerador_equipamentos
+
 @eventos_bp.route('/gerar-equipamentos')
 def gerar_equipamentos_route():
-    """Gera armas e armaduras usando o GeradorEquipamentos."""
+    """
+    Gera armas e armaduras usando o GeradorEquipamentos compartilhado.
+    Com ?soldados=N (modo exército) equipa N soldados de uma vez e devolve a
+    lista compacta por soldado e as contagens agregadas.
+    """
     try:
+        gerador = obter_gerador_equipamentos()
+
+        soldados = request.args.get('soldados', type=int)
+        if soldados is not None:
+            soldados = max(0, min(soldados, MAX_SOLDADOS))
+            com_armadura = request.args.get('armadura', default='1') not in ('0', 'false', 'nao')
+            return jsonify(gerador.equipar_exercito(soldados, com_armadura=com_armadura))
+
         qtd_armas = request.args.get('qtd_armas', default=0, type=int)
         qtd_armaduras = request.args.get('qtd_armaduras', default=0, type=int)
-        
-        # A importação de GeradorEquipamentos está no topo do arquivo
-        # Passa o caminho base do blueprint para o gerador
-        gerador = GeradorEquipamentos(base_path=bp_dir) 
-
         equipamentos = gerador.gerar_equipamentos(qtd_armas=qtd_armas, qtd_armaduras=qtd_armaduras)
 
         armaduras_formatadas = []
@@ -488,10 +718,9 @@ def gerar_equipamentos_route():
             armaduras_formatadas.append(gerador.formatar_equipamento(armadura))
 
         armas_formatadas = []
-        for arma_primaria in equipamentos.get("armas_primarias", []):
-            nome_arma = arma_primaria.get('nome', '')
-            escudo = equipamentos["armas_com_escudos"].get(nome_arma)
-            arma_secundaria = equipamentos["armas_duplas"].get(nome_arma)
+        for indice, arma_primaria in enumerate(equipamentos.get("armas_primarias", [])):
+            escudo = equipamentos["armas_com_escudos"].get(indice)
+            arma_secundaria = equipamentos["armas_duplas"].get(indice)
             armas_formatadas.append(gerador.formatar_equipamento(arma_primaria, escudo, arma_secundaria))
             
         return jsonify({'armaduras': armaduras_formatadas, 'armas': armas_formatadas})
@@ -510,39 +739,96 @@ def gerar_equipamentos_route():
 @eventos_bp.route('/limpar-cache')
 def limpar_cache():
     load_characteristics_file.cache_clear()
+    tabela_caracteristicas.cache_clear()
+    global _gerador_equipamentos
+    _gerador_equipamentos = None
     return jsonify({'status': 'Cache de características limpo'})
 
 @eventos_bp.route('/logs/<filename>')
 def serve_log(filename):
     # Serve arquivos do diretório de logs do blueprint
-    return send_from_directory(get_bp_path('logs'), filename)
+    escritor = obter_escritor_logs()
+    if escritor.pendente(filename):
+        escritor.aguardar(filename)   # Relatório ainda na fila de gravação
+    log_dir = get_bp_path('logs')
+    if not os.path.exists(os.path.join(log_dir, filename)):
+        # Logs antigos são comprimidos e, depois, apagados na rotação; o caminho
+        # guardado no arquivo de viagens não é atualizado
+        if os.path.exists(os.path.join(log_dir, filename + '.gz')):
+            return send_from_directory(log_dir, filename + '.gz', mimetype='application/gzip', as_attachment=True)
+        return jsonify({'error': f"Relatório '{filename}' não existe mais (removido na rotação dos logs)."}), 404
+    return send_from_directory(log_dir, filename)
+
+# ========== ARQUIVO DE VIAGENS (CONSULTA) ==========
+def _filtros_arquivo():
+    args = request.args
+    return dict(terreno=args.get('terreno'), desde=args.get('desde'), ate=args.get('ate'),
+                dias_min=args.get('dias_min', type=int), dias_max=args.get('dias_max', type=int),
+                pagina=args.get('pagina', default=1, type=int), por_pagina=args.get('por_pagina', type=int))
+
+@eventos_bp.route('/arquivo/encontros')
+def arquivo_encontros():
+    """
+    Encontros arquivados, paginados. Filtros: q (busca textual), terreno, tipo
+    (creatures, anomaly...), criatura (humanoide, lefeu...), viagem, desde/ate
+    (AAAA-MM-DD), dias_min/dias_max (tamanho da viagem), pagina, por_pagina.
+    """
+    try:
+        return jsonify(obter_arquivo_viagens().buscar_encontros(
+            texto=request.args.get('q'), tipo=request.args.get('tipo'),
+            criatura=request.args.get('criatura'), viagem=request.args.get('viagem'), **_filtros_arquivo()))
+    except Exception as e:
+        print(f"Erro ao consultar o arquivo de viagens: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+@eventos_bp.route('/arquivo/viagens')
+def arquivo_viagens():
+    """Viagens arquivadas, paginadas (filtros: terreno, desde, ate, dias_min, dias_max)."""
+    try:
+        return jsonify(obter_arquivo_viagens().listar_viagens(**_filtros_arquivo()))
+    except Exception as e:
+        print(f"Erro ao consultar o arquivo de viagens: {str(e)}")
+        return jsonify({'error': str(e)}), 400
 
 # ========== ROTAS DE DEBUG (Convertidas para Blueprint) ==========
+# Monte Carlo por rota de debug: ?amostras=N (0 desliga), limitado a MAX_AMOSTRAS_DEBUG
+MAX_AMOSTRAS_DEBUG = 1_000_000
+
+def _parametros_debug(amostras_padrao):
+    amostras = request.args.get('amostras', default=amostras_padrao, type=int)
+    limite = request.args.get('limite', default=25, type=int)
+    return max(0, min(amostras, MAX_AMOSTRAS_DEBUG)), max(1, min(limite, 500))
+
+def _terrenos_debug():
+    tipos = carregar_json(get_bp_path('tipos_encontro.json'))
+    terrains = carregar_json(get_bp_path('tipos_terreno.json'))
+    return sorted(set(tipos) | set(terrains))
+
+def _responder_debug(analises, titulo):
+    if request.args.get('formato') == 'json':
+        return jsonify(analises)
+    return render_template('debug_probabilidades.html', analises=analises, titulo=titulo,
+                           nomes=carregar_json(get_bp_path('tipos_terreno.json')))
+
+def _analise_ou_erro(terrain, amostras, limite):
+    try:
+        return analisar_probabilidades(terrain, amostras, limite)
+    except Exception as e:
+        print(f"Erro no debug: {str(e)}")
+        return {'terreno': terrain, 'erro': str(e)}
+
 @eventos_bp.route('/debug/probabilidades/<terrain>')
 def debug_probabilidades_route(terrain):
-    old_stdout = sys.stdout; sys.stdout = buffer = StringIO()
-    debug_category_probabilities(terrain)
-    sys.stdout = old_stdout
-    return f"<pre>{buffer.getvalue()}</pre>"
+    amostras, limite = _parametros_debug(100000)
+    return _responder_debug([_analise_ou_erro(terrain, amostras, limite)], f"Probabilidades — {terrain}")
 
 @eventos_bp.route('/debug/eventos/<terrain>')
 def debug_eventos_route(terrain):
-    old_stdout = sys.stdout; sys.stdout = buffer = StringIO()
-    debug_encounter_types(terrain)
-    sys.stdout = old_stdout
-    return f"<pre>{buffer.getvalue()}</pre>"
+    amostras, limite = _parametros_debug(10000)
+    return _responder_debug([_analise_ou_erro(terrain, amostras, limite)], f"Tipos de encontro — {terrain}")
 
 @eventos_bp.route('/debug/all')
 def debug_all():
-    results = []; terrains = ['floresta', 'deserto', 'cidade', 'planicie', 'costa']
-    for terrain in terrains:
-        old_stdout = sys.stdout; sys.stdout = buffer = StringIO()
-        debug_category_probabilities(terrain, samples=5000)
-        sys.stdout = old_stdout
-        results.append(f"<h2>{terrain.upper()}</h2><pre>{buffer.getvalue()}</pre>")
-        
-        old_stdout = sys.stdout; sys.stdout = buffer = StringIO()
-        debug_encounter_types(terrain, samples=5000)
-        sys.stdout = old_stdout
-        results.append(f"<pre>{buffer.getvalue()}</pre><hr>")
-    return ''.join(results)
\ No newline at end of file
+    amostras, limite = _parametros_debug(5000)
+    return _responder_debug([_analise_ou_erro(t, amostras, limite) for t in _terrenos_debug()],
+                            "Probabilidades de todos os terrenos")
@@ -0,0 +1,100 @@
+"""
+Campo de terreno procedural para regiões grandes, numa passada vetorizada (NumPy).
+
+Cada terreno recebe um campo de ruído de valor suave (algumas oitavas),
+amostrado nos centros reais dos hexes (linhas ímpares deslocadas meio hex,
+altura de linha sqrt(3)/2), então as manchas não ficam esticadas pela grade
+odd-r. Cada célula fica com o terreno de maior valor somado a um viés, ajustado
+em poucas iterações para que as proporções sigam os pesos pedidos. Por fim,
+passadas de autômato celular (maioria entre o hex e seus 6 vizinhos) limpam
+células isoladas.
+
+Sem NumPy o campo não está disponível: campo_terreno levanta ValueError (e
+/hex/regiao com procedural=1 responde 400). O sorteio independente por célula
+continua disponível sem o modo procedural.
+"""
+import math
+
+from painel.opcional import numpy_opcional
+from painel.sorteio import gerador_numpy
+
+ESCALA_PADRAO = 8.0          # Tamanho típico (em hexes) de uma mancha de terreno
+OITAVAS = 3                  # Camadas de ruído (cada uma com metade da escala e da amplitude)
+AJUSTES_PROPORCAO = 8        # Iterações de ajuste do viés de cada terreno
+SUAVIZACAO_PADRAO = 2        # Passadas do autômato celular
+MAIORIA_MINIMA = 4           # Vizinhança (7 hexes) que precisa concordar para trocar o terreno
+
+
+def _ruido_valor(np, gerador, k, xs, ys, escala):
+    """k campos de ruído de valor em [0, 1] nos pontos (xs, ys), com interpolação suave."""
+    gx, gy = xs / escala, ys / escala
+    x0, y0 = np.floor(gx).astype(np.intp), np.floor(gy).astype(np.intp)
+    tx, ty = gx - x0, gy - y0
+    tx, ty = tx * tx * (3 - 2 * tx), ty * ty * (3 - 2 * ty)
+    grade = gerador.random((k, int(y0.max()) + 2, int(x0.max()) + 2))
+    topo = grade[:, y0, x0] + (grade[:, y0, x0 + 1] - grade[:, y0, x0]) * tx
+    baixo = grade[:, y0 + 1, x0] + (grade[:, y0 + 1, x0 + 1] - grade[:, y0 + 1, x0]) * tx
+    return topo + (baixo - topo) * ty
+
+
+def _contar_vizinhanca(np, rotulos, k):
+    """Contagem de cada terreno entre o hex e seus vizinhos (grade odd-r): array (k, altura, largura)."""
+    um = np.moveaxis(np.eye(k, dtype=np.int16)[rotulos], -1, 0)
+    contagens = um.copy()
+    contagens[:, :, 1:] += um[:, :, :-1]
+    contagens[:, :, :-1] += um[:, :, 1:]
+    # Linhas vizinhas: a linha par vê as colunas (col-1, col); a ímpar, (col, col+1)
+    impar = (np.arange(rotulos.shape[0]) & 1).astype(bool)[None, :, None]
+    for origem, destino in ((slice(None, -1), slice(1, None)), (slice(1, None), slice(None, -1))):
+        linha = np.zeros_like(um)
+        linha[:, destino, :] = um[:, origem, :]
+        esquerda = np.zeros_like(um)
+        esquerda[:, :, 1:] = linha[:, :, :-1]
+        direita = np.zeros_like(um)
+        direita[:, :, :-1] = linha[:, :, 1:]
+        contagens += linha + np.where(impar, direita, esquerda)
+    return contagens
+
+
+def campo_terreno(largura, altura, pesos, escala=ESCALA_PADRAO, suavizacao=SUAVIZACAO_PADRAO, gerador=None):
+    """
+    Terreno de cada célula (ordem row * largura + col) para uma grade
+    largura x altura, em manchas coerentes com proporções próximas de
+    'pesos' ({terreno: peso}). 'gerador' é um numpy.random.Generator (padrão:
+    semeado pelo 'random'). Levanta ValueError sem NumPy ou com pesos inválidos.
+    """
+    np = numpy_opcional()
+    if np is None:
+        raise ValueError("NumPy não está instalado: terreno procedural indisponível.")
+    terrenos = [t for t, p in pesos.items() if p > 0]
+    if not terrenos:
+        raise ValueError("Nenhum terreno com peso positivo para o campo procedural.")
+    if not math.isfinite(escala) or escala <= 0:
+        raise ValueError("A escala do terreno procedural precisa ser um número finito e positivo.")
+    gerador = gerador if gerador is not None else gerador_numpy()
+    k, n = len(terrenos), largura * altura
+    if k == 1:
+        return [terrenos[0]] * n
+
+    rows, cols = np.divmod(np.arange(n), largura)
+    xs = cols + 0.5 * (rows & 1)
+    ys = rows * (math.sqrt(3) / 2)
+    campo = np.zeros((k, n))
+    amplitude = 1.0
+    for oitava in range(OITAVAS):
+        campo += amplitude * _ruido_valor(np, gerador, k, xs, ys, max(escala / 2 ** oitava, 1.0))
+        amplitude /= 2
+
+    # Viés por terreno: parte do log dos pesos e é corrigido pela proporção obtida
+    alvo = np.asarray([pesos[t] for t in terrenos], dtype=float)
+    alvo /= alvo.sum()
+    vies = 0.1 * np.log(alvo)
+    for _ in range(AJUSTES_PROPORCAO):
+        obtido = np.bincount(np.argmax(campo + vies[:, None], axis=0), minlength=k) / n
+        vies += 0.5 * (alvo - obtido)
+
+    rotulos = np.argmax(campo + vies[:, None], axis=0).reshape(altura, largura)
+    for _ in range(suavizacao):
+        contagens = _contar_vizinhanca(np, rotulos, k)
+        rotulos = np.where(contagens.max(axis=0) >= MAIORIA_MINIMA, contagens.argmax(axis=0), rotulos)
+    return np.asarray(terrenos, dtype=object)[rotulos.ravel()].tolist()
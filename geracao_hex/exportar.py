@@ -0,0 +1,93 @@
+"""
+Exportação de regiões geradas: mapa SVG (um hexágono por célula, com o
+conteúdo no tooltip) e gazetteer HTML paginado.
+
+Os templates são renderizados aos pedaços (painel.fluxo.transmitir_template);
+aqui ficam a geometria do mapa e os iteradores que entregam uma célula por vez
+ao template, consumidos durante o envio: o documento nunca existe inteiro na
+memória. O conteúdo de cada hex é gerado no primeiro acesso (Regiao.preencher).
+"""
+import math
+
+# Raio (centro ao vértice, em px) de cada hexágono do SVG
+RAIO_SVG = 12
+# Hexes por página do gazetteer
+POR_PAGINA_PADRAO = 100
+MAX_POR_PAGINA = 1000
+
+CORES_TERRENO = {
+    'artico': '#dfe9ee',
+    'cidade': '#9a8f86',
+    'costa': '#e6d29a',
+    'deserto': '#e2b86b',
+    'floresta': '#3f7a3a',
+    'montanha': '#7b6f64',
+    'pantano': '#5d6b45',
+    'planicie': '#a9c46c',
+}
+COR_PADRAO = '#8c8c8c'
+
+
+def linhas_detalhes(detalhes):
+    """Detalhes estruturados em linhas de texto ("Seção - Campo: valor")."""
+    for item in detalhes or ():
+        prefixo = f"{item['secao']} - " if item.get('secao') else ""
+        yield f"{prefixo}{item['campo']}: {item['valor']}"
+
+
+def titulo_hex(hexagono, nomes_terreno):
+    """Texto do tooltip de um hex: coordenada, terreno, sensorial e detalhes."""
+    linhas = [f"({hexagono.q}, {hexagono.r}) {nomes_terreno.get(hexagono.terreno, hexagono.terreno)}"
+              f" - {hexagono.conteudo}",
+              f"Paisagem: {hexagono.paisagem}", f"Sons: {hexagono.sons}", f"Odores: {hexagono.odores}"]
+    linhas.extend(linhas_detalhes(hexagono.detalhes))
+    return "\n".join(linhas)
+
+
+# ========== MAPA SVG ==========
+
+def geometria_svg(regiao, raio=RAIO_SVG):
+    """
+    Tamanho do desenho e vértices do hexágono (pontudo em cima, como a grade
+    odd-r), relativos ao centro: {'largura', 'altura', 'pontos'}.
+    """
+    largura_hex = math.sqrt(3) * raio
+    pontos = " ".join(f"{raio * math.cos(math.radians(60 * i - 30)):.2f},{raio * math.sin(math.radians(60 * i - 30)):.2f}"
+                      for i in range(6))
+    return {
+        'largura': round(largura_hex * (regiao.largura + 0.5), 2),
+        'altura': round(raio * (1.5 * regiao.altura + 0.5), 2),
+        'pontos': pontos,
+    }
+
+
+def celulas_svg(regiao, nomes_terreno, raio=RAIO_SVG):
+    """(x, y, índice do terreno, tooltip) de cada célula, em ordem de linha."""
+    largura_hex = math.sqrt(3) * raio
+    for i, hexagono in enumerate(regiao):
+        row, col = divmod(i, regiao.largura)
+        x = largura_hex * (col + 0.5 * (row & 1) + 0.5)
+        y = raio * (1.5 * row + 1)
+        yield f"{x:.2f}", f"{y:.2f}", regiao.indices_terreno[i], titulo_hex(hexagono, nomes_terreno)
+
+
+def legenda_svg(regiao, nomes_terreno):
+    """[(índice, nome, cor)] dos terrenos presentes na região."""
+    return [(i, nomes_terreno.get(t, t), CORES_TERRENO.get(t, COR_PADRAO)) for i, t in enumerate(regiao.terrenos)]
+
+
+# ========== GAZETTEER ==========
+
+def paginar(regiao, pagina, por_pagina=POR_PAGINA_PADRAO):
+    """
+    Página 'pagina' (a partir de 1) dos hexes da região: (iterador dos hexes,
+    total de páginas). Só os hexes da página são gerados, conforme o template
+    os consome. Levanta ValueError para página ou tamanho inválidos.
+    """
+    if not 1 <= por_pagina <= MAX_POR_PAGINA:
+        raise ValueError(f"'por_pagina' deve estar entre 1 e {MAX_POR_PAGINA}.")
+    total = max(1, -(-len(regiao) // por_pagina))
+    if not 1 <= pagina <= total:
+        raise ValueError(f"Página {pagina} inexistente (a região tem {total}).")
+    inicio = (pagina - 1) * por_pagina
+    return regiao.fatia(inicio, inicio + por_pagina), total
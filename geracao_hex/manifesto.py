@@ -0,0 +1,157 @@
+"""
+Manifesto das árvores 'marcos_paisagem' e 'obstaculo' de cada terreno.
+
+Resolve uma vez (por terreno) quais tabelas existem: para cada tipo de marco em
+'tipos.json', as tabelas opcionais presentes na pasta do tipo; para cada
+categoria de 'categorias.json', o arquivo do obstáculo. Assim a geração de um
+hex não consulta o disco, e nomes que não resolvem para arquivo aparecem como
+problemas na construção (e no aquecimento do app), não só como
+"Detalhe não encontrado" em tempo de execução.
+
+O manifesto de um terreno é refeito quando o registro recarrega 'tipos.json'
+ou 'categorias.json' (conferido no intervalo de revalidação do registro).
+Arquivos de detalhe criados depois só entram após limpar_manifestos() (ou ao
+reiniciar o app).
+
+Uso: python -m geracao_hex.manifesto   (lista os problemas; código 1 se houver)
+"""
+import os
+import sys
+import threading
+import time
+import unicodedata
+
+from painel.tabelas import carregar_json, obter_registro
+
+BP_DIR = os.path.dirname(os.path.abspath(__file__))
+RAIZ_HEX = os.path.join(BP_DIR, 'encounters', 'hex')
+
+# Tabelas opcionais na pasta de cada tipo de marco, na ordem em que aparecem nos detalhes
+OPCIONAIS_MARCO = (
+    ("Interior", "interior.json"),
+    ("Peculiaridade Específica", "peculiaridade.json"),
+    ("Habitantes", "habitantes.json"),
+)
+# Tabelas obrigatórias da pasta 'marcos_paisagem' (além de tipos.json)
+COMUNS_MARCO = ('peculiaridade.json', 'palavras_chave.json')
+
+
+def nome_arquivo(categoria):
+    """Arquivo de uma categoria de obstáculo: 'Perigos da Floresta' -> 'perigos_da_floresta.json'."""
+    sem_acento = ''.join(c for c in unicodedata.normalize('NFKD', categoria) if not unicodedata.combining(c))
+    return sem_acento.lower().replace(' ', '_') + '.json'
+
+
+def _tabela(caminho):
+    """Tabela do registro, ou None se o arquivo não existir ou for inválido."""
+    try:
+        return carregar_json(caminho)
+    except (OSError, ValueError):
+        return None
+
+
+class ManifestoTerreno:
+    """Tabelas resolvidas de um terreno (caminhos absolutos) e os problemas encontrados."""
+    __slots__ = ('terreno', 'tipos', 'categorias', 'marcos', 'obstaculos', 'problemas', 'verificado_em')
+
+    def __init__(self, terreno, raiz=RAIZ_HEX):
+        self.terreno = terreno
+        self.verificado_em = time.monotonic()
+        registro = obter_registro()
+        self.problemas = []
+        pasta_marcos = os.path.join(raiz, terreno, 'marcos_paisagem')
+        pasta_obstaculos = os.path.join(raiz, terreno, 'obstaculo')
+
+        # Tabelas de origem guardadas para detectar recarga (o registro troca o objeto)
+        self.tipos = _tabela(os.path.join(pasta_marcos, 'tipos.json'))
+        self.categorias = _tabela(os.path.join(pasta_obstaculos, 'categorias.json'))
+
+        # {tipo de marco: ((rótulo, caminho), ...) das tabelas opcionais presentes}
+        self.marcos = {}
+        if not isinstance(self.tipos, dict):
+            self._problema('marcos_paisagem/tipos.json', "ausente ou inválido")
+        else:
+            for arquivo in COMUNS_MARCO:
+                if not registro.existe(os.path.join(pasta_marcos, arquivo)):
+                    self._problema(f'marcos_paisagem/{arquivo}', "ausente")
+            for tipo in self.tipos:
+                pasta = os.path.join(pasta_marcos, tipo)
+                if not registro.existe(os.path.join(pasta, 'entrada.json')):
+                    self._problema(f'marcos_paisagem/{tipo}/entrada.json', f"ausente (tipo '{tipo}' de tipos.json)")
+                self.marcos[tipo] = tuple((rotulo, os.path.join(pasta, arquivo)) for rotulo, arquivo in OPCIONAIS_MARCO
+                                          if registro.existe(os.path.join(pasta, arquivo)))
+
+        # {categoria: caminho da tabela do obstáculo}; categorias sem arquivo ficam de fora
+        self.obstaculos = {}
+        if not isinstance(self.categorias, dict):
+            self._problema('obstaculo/categorias.json', "ausente ou inválido")
+        else:
+            for categoria in self.categorias:
+                caminho = os.path.join(pasta_obstaculos, nome_arquivo(categoria))
+                if registro.existe(caminho):
+                    self.obstaculos[categoria] = caminho
+                else:
+                    self._problema(f'obstaculo/{nome_arquivo(categoria)}',
+                                   f"ausente (categoria '{categoria}' de categorias.json)")
+
+    def _problema(self, relativo, descricao):
+        self.problemas.append(f"{self.terreno}/{relativo}: {descricao}")
+
+    def atual(self, raiz=RAIZ_HEX):
+        """False se o registro recarregou tipos.json ou categorias.json desde a construção."""
+        return (_tabela(os.path.join(raiz, self.terreno, 'marcos_paisagem', 'tipos.json')) is self.tipos
+                and _tabela(os.path.join(raiz, self.terreno, 'obstaculo', 'categorias.json')) is self.categorias)
+
+
+# ========== CACHE POR TERRENO ==========
+
+_manifestos = {}
+_manifestos_lock = threading.Lock()
+
+
+def obter_manifesto(terreno):
+    """Manifesto do terreno, construído no primeiro uso (os problemas são impressos uma vez)."""
+    manifesto = _manifestos.get(terreno)
+    if manifesto is not None:
+        intervalo = obter_registro().intervalo_revalidacao
+        if intervalo is None or time.monotonic() - manifesto.verificado_em < intervalo:
+            return manifesto
+    with _manifestos_lock:
+        manifesto = _manifestos.get(terreno)
+        if manifesto is not None and manifesto.atual():
+            manifesto.verificado_em = time.monotonic()
+        else:
+            manifesto = ManifestoTerreno(terreno)
+            for problema in manifesto.problemas:
+                print(f"[MANIFESTO HEX] {problema}")
+            _manifestos[terreno] = manifesto
+    return manifesto
+
+
+def limpar_manifestos():
+    with _manifestos_lock:
+        _manifestos.clear()
+
+
+def terrenos():
+    """Terrenos de tipos_terreno.json (os que a interface oferece)."""
+    return list(carregar_json(os.path.join(BP_DIR, 'tipos_terreno.json')))
+
+
+def validar_manifestos():
+    """Constrói o manifesto de todos os terrenos. Retorna {terreno: [problemas]} (só os com problemas)."""
+    return {t: m.problemas for t in terrenos() if (m := obter_manifesto(t)).problemas}
+
+
+def main():
+    problemas = validar_manifestos()
+    if problemas:
+        total = sum(len(p) for p in problemas.values())
+        print(f"ERRO: {total} tabela(s) referenciada(s) sem arquivo em {len(problemas)} terreno(s).")
+        return 1
+    print(f"Manifesto OK: {len(terrenos())} terrenos, todos os nomes resolvem para arquivos.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Estrutura compacta de uma região de hexágonos em coordenadas axiais (q, r).
+
+A grade é retangular em "odd-r" (linhas ímpares deslocadas meio hex para a
+direita): a célula (col, row) tem q = col - (row - (row & 1)) // 2 e r = row.
+Os hexes ficam numa lista plana indexada por row * largura + col, e o terreno
+de cada célula também num array de bytes (índice em 'terrenos'). Cada Hex só é
+criado (e tem o conteúdo gerado, por 'preencher') quando é acessado: uma
+página do gazetteer materializa só os seus hexes.
+"""
+from array import array
+
+# Vizinhos de um hex em coordenadas axiais (leste, nordeste, noroeste, oeste, sudoeste, sudeste)
+DIRECOES = ((1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1))
+
+# Campos do hex na ordem em que aparecem no JSON (fora q/r, sempre presentes)
+CAMPOS_HEX = ('terreno', 'paisagem', 'sons', 'odores', 'tipo', 'conteudo', 'detalhes')
+
+
+def axial_de_offset(col, row):
+    return col - (row - (row & 1)) // 2, row
+
+
+def offset_de_axial(q, r):
+    return q + (r - (r & 1)) // 2, r
+
+
+def semente_hex(semente, q, r):
+    """Semente determinística do hex (q, r) de uma região ou sessão."""
+    return f"{semente}:{q}:{r}"
+
+
+def distancia(a, b):
+    """Distância em hexes entre duas coordenadas axiais (q, r)."""
+    dq, dr = a[0] - b[0], a[1] - b[1]
+    return (abs(dq) + abs(dr) + abs(dq + dr)) // 2
+
+
+class Hex:
+    """Um hexágono gerado. 'extras' guarda campos específicos do conteúdo (ex: categoria do obstáculo)."""
+    __slots__ = ('q', 'r') + CAMPOS_HEX + ('extras',)
+
+    def __init__(self, q, r, terreno):
+        self.q = q
+        self.r = r
+        self.terreno = terreno
+        self.paisagem = self.sons = self.odores = None
+        self.tipo = None
+        self.conteudo = "Não definido"
+        self.detalhes = []
+        self.extras = None
+
+    def atualizar(self, dados):
+        """Aplica o dicionário devolvido pelos geradores de conteúdo (conteudo, detalhes estruturados e extras)."""
+        for chave, valor in dados.items():
+            if chave in ('conteudo', 'detalhes'):
+                setattr(self, chave, valor)
+            else:
+                if self.extras is None:
+                    self.extras = {}
+                self.extras[chave] = valor
+
+    def como_dict(self):
+        saida = {'q': self.q, 'r': self.r}
+        for campo in CAMPOS_HEX:
+            saida[campo] = getattr(self, campo)
+        if self.extras:
+            saida.update(self.extras)
+        return saida
+
+
+class Regiao:
+    """Grade de largura x altura hexes, acessível por coordenada axial."""
+    __slots__ = ('largura', 'altura', 'terrenos', 'indices_terreno', 'preencher', '_hexes')
+
+    def __init__(self, largura, altura, terrenos_celulas, preencher=None):
+        """
+        'terrenos_celulas': código do terreno de cada célula, na ordem row * largura + col.
+        'preencher(hex)': gera o conteúdo de um hex na primeira vez que ele é acessado
+        (sem ele, os hexes só têm coordenada e terreno).
+        """
+        self.largura = largura
+        self.altura = altura
+        self.terrenos = list(dict.fromkeys(terrenos_celulas))   # Códigos distintos, na ordem de aparição
+        posicao = {t: i for i, t in enumerate(self.terrenos)}
+        self.indices_terreno = array('B', (posicao[t] for t in terrenos_celulas))
+        self.preencher = preencher
+        self._hexes = [None] * len(self.indices_terreno)
+
+    def __len__(self):
+        return len(self._hexes)
+
+    def __iter__(self):
+        return map(self.hex_na_posicao, range(len(self._hexes)))
+
+    def hex_na_posicao(self, i):
+        """Hex da posição i da lista plana, criado (e preenchido) no primeiro acesso."""
+        hexagono = self._hexes[i]
+        if hexagono is None:
+            hexagono = Hex(*axial_de_offset(i % self.largura, i // self.largura),
+                           self.terrenos[self.indices_terreno[i]])
+            if self.preencher is not None:
+                self.preencher(hexagono)
+            self._hexes[i] = hexagono
+        return hexagono
+
+    def fatia(self, inicio, fim):
+        """Hexes das posições [inicio, fim), materializados um a um conforme o iterador é consumido."""
+        return map(self.hex_na_posicao, range(max(inicio, 0), min(fim, len(self._hexes))))
+
+    @property
+    def hexes(self):
+        """Todos os hexes (materializa a região inteira)."""
+        return list(self)
+
+    def indice(self, q, r):
+        """Posição do hex (q, r) na lista plana, ou None fora da grade."""
+        col, row = offset_de_axial(q, r)
+        if 0 <= row < self.altura and 0 <= col < self.largura:
+            return row * self.largura + col
+        return None
+
+    def hex_em(self, q, r):
+        i = self.indice(q, r)
+        return self.hex_na_posicao(i) if i is not None else None
+
+    def vizinhos(self, q, r):
+        """Hexes vizinhos de (q, r) que estão dentro da grade."""
+        return [h for dq, dr in DIRECOES if (h := self.hex_em(q + dq, r + dr)) is not None]
+
+    def celulas_por_terreno(self):
+        """{código do terreno: [posições na lista plana]} (para gerar cada terreno em lote)."""
+        grupos = {t: [] for t in self.terrenos}
+        for i, indice in enumerate(self.indices_terreno):
+            grupos[self.terrenos[indice]].append(i)
+        return grupos
+
+    def como_dict(self):
+        return {
+            'largura': self.largura,
+            'altura': self.altura,
+            'coordenadas': 'axial (q, r), grade odd-r',
+            'hexes': [h.como_dict() for h in self],
+        }
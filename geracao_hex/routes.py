@@ -1,7 +1,18 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, render_template, request, jsonify
 import json
+import math
 import random
 import os
+import threading
+from painel.fluxo import transmitir_template
+from painel.tabelas import carregar_json
+from painel.opcional import numpy_opcional
+from painel.sorteio import compilar, gerador_numpy
+from .campo_terreno import ESCALA_PADRAO, campo_terreno
+from .exportar import POR_PAGINA_PADRAO, celulas_svg, geometria_svg, legenda_svg, paginar
+from .manifesto import obter_manifesto
+from .regiao import Regiao, semente_hex
+from .sessoes_hex import SessoesHex
 
 # 1. Cria o Blueprint e define o caminho base (bp_dir)
 hex_bp = Blueprint('hex', __name__,
@@ -18,27 +29,20 @@ def get_bp_path(relative_path: str):
 
 # ========== FUNÇÕES UTILITÁRIAS (Lógica original, mas usa 'file_path' absoluto) ==========
 
-def select_by_weight(options: dict):
+def select_by_weight(options: dict, rng=random):
     """Seleciona uma chave de um dicionário com base em seus valores (pesos)."""
     if not isinstance(options, dict):
         print(f"Erro: 'select_by_weight' esperava um dicionário, mas recebeu {type(options)}")
         return "Opção Inválida"
-    items = list(options.items()); total_weight = sum(item[1] for item in items)
-    if total_weight == 0:
-        if items: return random.choice([item[0] for item in items])
-        else: return "Dicionário Vazio"
-    r = random.uniform(0, total_weight); upto = 0
-    for key, weight in items:
-        if upto + weight >= r: return key
-        upto += weight
-    return items[-1][0] if items else "Dicionário Vazio" # Fallback
-
-def roll_for_detail(file_path: str):
+    if not options: return "Dicionário Vazio"
+    # Compilada uma vez por tabela (alias de Vose); pesos zero nunca são sorteados
+    return compilar(options).sortear(rng)
+
+def roll_for_detail(file_path: str, rng=random):
     """Carrega um arquivo JSON (caminho absoluto) e seleciona um item."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            details = json.load(f)
-        return select_by_weight(details)
+        details = carregar_json(file_path)
+        return select_by_weight(details, rng)
     except FileNotFoundError:
         print(f"AVISO: Arquivo não encontrado em '{file_path}'")
         return "Detalhe não encontrado (arquivo ausente)"
@@ -46,15 +50,14 @@ def roll_for_detail(file_path: str):
         print(f"Erro ao processar o arquivo JSON '{file_path}': {e}")
         return "Detalhe não encontrado (erro no JSON)"
 
-def select_multiple(file_path: str, min_select: int = 1, max_select: int = 3):
+def select_multiple(file_path: str, min_select: int = 1, max_select: int = 3, rng=random):
     """Seleciona múltiplos itens de um arquivo JSON (caminho absoluto)."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            options = json.load(f)
+        options = carregar_json(file_path)
         if isinstance(options, dict): options = list(options.keys())
         if not options: return ""
-        num_to_select = random.randint(min_select, min(max_select, len(options)))
-        selected = random.sample(options, num_to_select)
+        num_to_select = rng.randint(min_select, min(max_select, len(options)))
+        selected = rng.sample(options, num_to_select)
         return ", ".join(selected)
     except FileNotFoundError:
         print(f"AVISO: Arquivo não encontrado em '{file_path}'")
@@ -65,6 +68,12 @@ def select_multiple(file_path: str, min_select: int = 1, max_select: int = 3):
 
 
 # ========== FUNÇÕES DE GERAÇÃO (Caminhos de arquivo corrigidos com get_bp_path) ==========
+# 'detalhes' de cada conteúdo é uma lista estruturada de {'campo', 'valor'} (e 'secao',
+# quando o hex junta dois conteúdos), na ordem de exibição; quem exibe decide o formato.
+
+def campos_detalhes(detalhes_dict: dict):
+    """Converte {rótulo: valor} em detalhes estruturados, sem os valores vazios."""
+    return [{'campo': campo, 'valor': valor} for campo, valor in detalhes_dict.items() if valor]
 
 def load_hex_tables(terrain: str):
     """Carrega as tabelas sensoriais para um terreno."""
@@ -74,91 +83,112 @@ def load_hex_tables(terrain: str):
     for table_name in ['paisagens', 'sons', 'odores', 'eventos']:
         file_path = os.path.join(terrain_path, f'{table_name}.json')
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                tables[table_name] = json.load(f)
+            tables[table_name] = carregar_json(file_path)
         except Exception as e:
             print(f"Erro ao carregar '{file_path}': {e}")
             tables[table_name] = {"Erro": f"Arquivo {table_name}.json não encontrado ou inválido"}
     return tables
 
-def generate_assentamento(terrain: str):
+def generate_assentamento(terrain: str, rng=random):
     """Gera detalhes completos de um assentamento."""
     base_path = get_bp_path(os.path.join('encounters', 'hex', terrain, 'assentamentos'))
-    ocupacao = roll_for_detail(os.path.join(base_path, 'ocupacao.json'))
-    condicoes = roll_for_detail(os.path.join(base_path, 'condicoes.json'))
-    tipo = roll_for_detail(os.path.join(base_path, 'tipos.json'))
+    ocupacao = roll_for_detail(os.path.join(base_path, 'ocupacao.json'), rng)
+    condicoes = roll_for_detail(os.path.join(base_path, 'condicoes.json'), rng)
+    tipo = roll_for_detail(os.path.join(base_path, 'tipos.json'), rng)
 
-    detalhes = f"Tipo: {tipo}<br>Ocupação: {ocupacao}<br>Condições: {condicoes}"
+    detalhes_dict = {"Tipo": tipo, "Ocupação": ocupacao, "Condições": condicoes}
     
     if 'Ocupado' in ocupacao:
-        ocupantes = roll_for_detail(os.path.join(base_path, 'ocupantes.json'))
-        detalhes += f"<br>Ocupantes: {ocupantes}"
+        detalhes_dict["Ocupantes"] = roll_for_detail(os.path.join(base_path, 'ocupantes.json'), rng)
     else: 
-        motivo_abandono = roll_for_detail(os.path.join(base_path, 'abandono.json'))
-        detalhes += f"<br>Motivo do Abandono: {motivo_abandono}"
-    return {'conteudo': f"Assentamento: {tipo}", 'detalhes': detalhes}
+        detalhes_dict["Motivo do Abandono"] = roll_for_detail(os.path.join(base_path, 'abandono.json'), rng)
+    return {'conteudo': f"Assentamento: {tipo}", 'detalhes': campos_detalhes(detalhes_dict)}
 
-def generate_ruina(terrain: str):
+def generate_ruina(terrain: str, rng=random):
     """Gera detalhes completos de uma ruína."""
     base_path = get_bp_path(os.path.join('encounters', 'hex', terrain, 'ruinas'))
-    tipo_ruina = roll_for_detail(os.path.join(base_path, 'tipos.json'))
-    ocupacao = roll_for_detail(os.path.join(base_path, 'ocupacao.json'))
+    tipo_ruina = roll_for_detail(os.path.join(base_path, 'tipos.json'), rng)
+    ocupacao = roll_for_detail(os.path.join(base_path, 'ocupacao.json'), rng)
     detalhes_dict = {
         "Tipo": tipo_ruina,
-        "Propósito Original": roll_for_detail(os.path.join(base_path, 'proposito_original.json')),
-        "Propósito Atual": roll_for_detail(os.path.join(base_path, 'proposito_atual.json')),
-        "Localização": roll_for_detail(os.path.join(base_path, 'localizacao.json')),
-        "Peculiaridade": roll_for_detail(os.path.join(base_path, 'peculiaridade.json')),
-        "Idade": roll_for_detail(os.path.join(base_path, 'idade.json')),
+        "Propósito Original": roll_for_detail(os.path.join(base_path, 'proposito_original.json'), rng),
+        "Propósito Atual": roll_for_detail(os.path.join(base_path, 'proposito_atual.json'), rng),
+        "Localização": roll_for_detail(os.path.join(base_path, 'localizacao.json'), rng),
+        "Peculiaridade": roll_for_detail(os.path.join(base_path, 'peculiaridade.json'), rng),
+        "Idade": roll_for_detail(os.path.join(base_path, 'idade.json'), rng),
         "Ocupação": ocupacao
     }
     if 'Ocupado' in ocupacao:
-        detalhes_dict["Ocupantes"] = roll_for_detail(os.path.join(base_path, 'ocupantes.json'))
-    detalhes_dict["Palavras-chave"] = select_multiple(os.path.join(base_path, 'palavras_chave.json'), 1, 3)
-    detalhes = "<br>".join(f"<b>{key}:</b> {value}" for key, value in detalhes_dict.items() if value)
-    return {'conteudo': f"Ruína: {tipo_ruina}", 'detalhes': detalhes}
+        detalhes_dict["Ocupantes"] = roll_for_detail(os.path.join(base_path, 'ocupantes.json'), rng)
+    detalhes_dict["Palavras-chave"] = select_multiple(os.path.join(base_path, 'palavras_chave.json'), 1, 3, rng=rng)
+    return {'conteudo': f"Ruína: {tipo_ruina}", 'detalhes': campos_detalhes(detalhes_dict)}
 
-def generate_obstaculo(terrain: str):
+def generate_obstaculo(terrain: str, rng=random):
     """Gera detalhes completos de um obstáculo."""
     base_path = get_bp_path(os.path.join('encounters', 'hex', terrain, 'obstaculo'))
-    categoria = roll_for_detail(os.path.join(base_path, 'categorias.json'))
-    file_name = categoria.lower().replace("ç", "c").replace("ã", "a").replace(" ", "_") + ".json"
-    obstaculo_especifico = roll_for_detail(os.path.join(base_path, file_name))
-    detalhes = f"Categoria: {categoria}<br>Obstáculo: {obstaculo_especifico}"
+    manifesto = obter_manifesto(terrain)
+    categoria = roll_for_detail(os.path.join(base_path, 'categorias.json'), rng)
+    caminho = manifesto.obstaculos.get(categoria)
+    # Categorias sem arquivo já foram apontadas na construção do manifesto
+    obstaculo_especifico = roll_for_detail(caminho, rng) if caminho else "Detalhe não encontrado (arquivo ausente)"
+    detalhes = campos_detalhes({"Categoria": categoria, "Obstáculo": obstaculo_especifico})
     return {'conteudo': f"Obstáculo:", 'detalhes': detalhes, 'categoria': categoria}
 
-def generate_marco_paisagem(terrain: str):
+def generate_marco_paisagem(terrain: str, rng=random):
     """Gera detalhes completos de um marco na paisagem."""
     base_path = get_bp_path(os.path.join('encounters', 'hex', terrain, 'marcos_paisagem'))
-    tipo_marco = roll_for_detail(os.path.join(base_path, 'tipos.json'))
+    manifesto = obter_manifesto(terrain)
+    tipo_marco = roll_for_detail(os.path.join(base_path, 'tipos.json'), rng)
     
-    if "não encontrado" in tipo_marco:
-        return {'conteudo': "Erro: Tipo de Marco inválido.", 'detalhes': f"Verifique 'tipos.json' em {base_path}"}
+    if tipo_marco not in manifesto.marcos:
+        return {'conteudo': "Erro: Tipo de Marco inválido.",
+                'detalhes': campos_detalhes({"Verificar": f"'tipos.json' em {base_path}"})}
         
     marco_path = os.path.join(base_path, tipo_marco)
     detalhes_dict = {
         "Tipo": tipo_marco,
-        "Entrada": roll_for_detail(os.path.join(marco_path, 'entrada.json')),
-        "Peculiaridade Geral": roll_for_detail(os.path.join(base_path, 'peculiaridade.json'))
-    }
-    optional_files = {
-        "Interior": "interior.json", "Peculiaridade Específica": "peculiaridade.json", "Habitantes": "habitantes.json"
+        "Entrada": roll_for_detail(os.path.join(marco_path, 'entrada.json'), rng),
+        "Peculiaridade Geral": roll_for_detail(os.path.join(base_path, 'peculiaridade.json'), rng)
     }
-    for display_name, file_name in optional_files.items():
-        file_path_to_check = os.path.join(marco_path, file_name)
-        if os.path.exists(file_path_to_check):
-            detalhes_dict[display_name] = roll_for_detail(file_path_to_check)
+    # Tabelas opcionais presentes na pasta do tipo, resolvidas no manifesto (sem os.path.exists por hex)
+    for display_name, file_path in manifesto.marcos[tipo_marco]:
+        detalhes_dict[display_name] = roll_for_detail(file_path, rng)
     
-    detalhes_dict["Palavras-chave"] = select_multiple(os.path.join(base_path, 'palavras_chave.json'), 0, 3)
-    detalhes = "<br>".join(f"<b>{key}:</b> {value}" for key, value in detalhes_dict.items() if value)
-    return {'conteudo': f"Marco na Paisagem: {tipo_marco}", 'detalhes': detalhes}
+    detalhes_dict["Palavras-chave"] = select_multiple(os.path.join(base_path, 'palavras_chave.json'), 0, 3, rng=rng)
+    return {'conteudo': f"Marco na Paisagem: {tipo_marco}", 'detalhes': campos_detalhes(detalhes_dict)}
+
+def carregar_distribuicao():
+    """Distribuição dos tipos de conteúdo por terreno (distribuicao.json)."""
+    return carregar_json(get_bp_path(os.path.join('encounters', 'hex', 'distribuicao.json')))
+
+def gerar_conteudo(terrain: str, tipo_conteudo: str, tabelas: dict, rng=random):
+    """Conteúdo principal do hex ('conteudo', 'detalhes' e extras) para um tipo já sorteado."""
+    if tipo_conteudo == 'paisagem_mundana':
+        return {'conteudo': "Paisagem Mundana",
+                'detalhes': campos_detalhes({"Descrição": "Nada de especial além da paisagem, sons e odores típicos do terreno."})}
+    elif tipo_conteudo == 'assentamento':
+        return generate_assentamento(terrain, rng)
+    elif tipo_conteudo == 'ruina':
+        return generate_ruina(terrain, rng)
+    elif tipo_conteudo == 'obstaculo':
+        return generate_obstaculo(terrain, rng)
+    elif tipo_conteudo == 'marco_paisagem':
+        return generate_marco_paisagem(terrain, rng)
+    elif tipo_conteudo == 'evento':
+        return {'conteudo': "Evento Especial",
+                'detalhes': campos_detalhes({"Evento": select_by_weight(tabelas.get('eventos', {}), rng)})}
+    elif tipo_conteudo == 'obstaculo_ruina':
+        obstaculo_data = generate_obstaculo(terrain, rng)
+        ruina_data = generate_ruina(terrain, rng)
+        detalhes = ([dict(item, secao="Obstáculo") for item in obstaculo_data['detalhes']]
+                    + [dict(item, secao="Ruína") for item in ruina_data['detalhes']])
+        return {'conteudo': f"Obstáculo e Ruína", 'detalhes': detalhes}
+    return {}
 
-def generate_hex_description(terrain: str):
+def generate_hex_description(terrain: str, rng=random):
     """Gera a descrição completa de um hexágono."""
-    dist_path = get_bp_path(os.path.join('encounters', 'hex', 'distribuicao.json'))
     try:
-        with open(dist_path, 'r', encoding='utf-8') as f:
-            distribuicao = json.load(f).get(terrain, {})
+        distribuicao = carregar_distribuicao().get(terrain, {})
     except Exception as e:
         print(f"Erro ao carregar 'distribuicao.json': {e}")
         return {'error': "Arquivo 'distribuicao.json' não encontrado ou inválido."}
@@ -166,47 +196,123 @@ def generate_hex_description(terrain: str):
     if not distribuicao:
         return {'error': f"Dados de distribuição não encontrados para '{terrain}'."}
 
-    tipo_conteudo = select_by_weight(distribuicao)
+    tipo_conteudo = select_by_weight(distribuicao, rng)
     tabelas = load_hex_tables(terrain)
 
     resultado = {
         'terreno': terrain,
-        'paisagem': select_by_weight(tabelas.get('paisagens', {})),
-        'sons': select_by_weight(tabelas.get('sons', {})),
-        'odores': select_by_weight(tabelas.get('odores', {})),
-        'conteudo': "Não definido", 'detalhes': ""
+        'paisagem': select_by_weight(tabelas.get('paisagens', {}), rng),
+        'sons': select_by_weight(tabelas.get('sons', {}), rng),
+        'odores': select_by_weight(tabelas.get('odores', {}), rng),
+        'conteudo': "Não definido", 'detalhes': []
     }
-
-    if tipo_conteudo == 'paisagem_mundana':
-        resultado['conteudo'] = "Paisagem Mundana"
-        resultado['detalhes'] = "Nada de especial além da paisagem, sons e odores típicos do terreno."
-    elif tipo_conteudo == 'assentamento':
-        resultado.update(generate_assentamento(terrain))
-    elif tipo_conteudo == 'ruina':
-        resultado.update(generate_ruina(terrain))
-    elif tipo_conteudo == 'obstaculo':
-        resultado.update(generate_obstaculo(terrain))
-    elif tipo_conteudo == 'marco_paisagem':
-        resultado.update(generate_marco_paisagem(terrain))
-    elif tipo_conteudo == 'evento':
-        resultado['conteudo'] = "Evento Especial"
-        resultado['detalhes'] = select_by_weight(tabelas.get('eventos', {}))
-    elif tipo_conteudo == 'obstaculo_ruina':
-        obstaculo_data = generate_obstaculo(terrain)
-        ruina_data = generate_ruina(terrain)
-        resultado['conteudo'] = f"Obstáculo e Ruína"
-        resultado['detalhes'] = f"<b>Obstáculo:</b><br>{obstaculo_data['detalhes']}<br><br><b>Ruína:</b><br>{ruina_data['detalhes']}"
-    
+    resultado.update(gerar_conteudo(terrain, tipo_conteudo, tabelas, rng))
     return resultado
 
+# ========== REGIÃO (VÁRIOS HEXES DE UMA VEZ) ==========
+# Maior grade aceita por /hex/regiao (largura x altura)
+MAX_HEXES_REGIAO = 200 * 200
+
+def _sortear_lote(options, n, rng=random):
+    """n sorteios de uma tabela de pesos (vetorizado quando há NumPy)."""
+    if not isinstance(options, dict) or not options:
+        return [select_by_weight(options, rng)] * n
+    return compilar(options).sortear_lote(n, gerador_numpy(rng) if numpy_opcional() else rng)
+
+def layout_regiao(largura: int, altura: int, layout=None, pesos=None, padrao='floresta', rng=random,
+                  procedural=False, escala=ESCALA_PADRAO):
+    """
+    Terreno de cada célula (ordem row * largura + col). 'layout' pode ser uma
+    lista de linhas ([["floresta", "costa", ...], ...]) ou {"q,r": terreno}; as
+    células que ele não cobre são sorteadas por 'pesos' ({terreno: peso}) ou
+    ficam com 'padrao'. Com 'procedural', essas células vêm de um campo de
+    terreno em manchas (campo_terreno.py) com os 'pesos' (padrão: todos os
+    terrenos de tipos_terreno.json com o mesmo peso).
+    """
+    n = largura * altura
+    celulas = [None] * n
+    if isinstance(layout, list):
+        for row, linha in enumerate(layout[:altura]):
+            for col, terreno in enumerate(linha[:largura]):
+                celulas[row * largura + col] = terreno
+    elif isinstance(layout, dict):
+        regiao = Regiao(largura, altura, [padrao] * n)
+        for chave, terreno in layout.items():
+            q, r = (int(x) for x in str(chave).split(','))
+            i = regiao.indice(q, r)
+            if i is None:
+                raise ValueError(f"Coordenada ({q}, {r}) fora da grade {largura}x{altura}.")
+            celulas[i] = terreno
+    faltando = [i for i, t in enumerate(celulas) if t is None]
+    if faltando and procedural:
+        pesos = dict(pesos) if pesos else dict.fromkeys(get_terrains(), 1)
+        campo = campo_terreno(largura, altura, pesos, escala, gerador=gerador_numpy(rng) if numpy_opcional() else None)
+        for i in faltando:
+            celulas[i] = campo[i]
+    elif faltando and pesos:
+        for i, terreno in zip(faltando, _sortear_lote(dict(pesos), len(faltando), rng)):
+            celulas[i] = terreno
+    return [t if t is not None else padrao for t in celulas]
+
+def _sorteador(options):
+    """rng -> sorteio de 'options', com a tabela compilada uma vez (mesmo resultado de select_by_weight)."""
+    if isinstance(options, dict) and options:
+        return compilar(options).sortear
+    return lambda rng: select_by_weight(options, rng)
+
+def preencher_hex(hexagono, semente, sorteadores, tabelas, rng):
+    """
+    Sorteia tipo de conteúdo, paisagem, sons, odores ('sorteadores', nessa
+    ordem) e conteúdo de um hex da região com a semente própria dele
+    ("semente:q:r"), ressemeando 'rng': o resultado não depende de quais outros
+    hexes foram gerados.
+    """
+    rng.seed(semente_hex(semente, hexagono.q, hexagono.r))
+    tipo, paisagem, sons, odores = sorteadores
+    hexagono.tipo = tipo(rng)
+    hexagono.paisagem, hexagono.sons, hexagono.odores = paisagem(rng), sons(rng), odores(rng)
+    hexagono.atualizar(gerar_conteudo(hexagono.terreno, hexagono.tipo, tabelas, rng))
+
+def gerar_regiao(largura: int, altura: int, layout=None, pesos=None, padrao='floresta', semente=None,
+                 procedural=False, escala=ESCALA_PADRAO):
+    """
+    Região de largura x altura hexes. Só a grade de terrenos é sorteada aqui
+    (com 'semente'; sem ela, uma aleatória); o conteúdo de cada hex é gerado
+    por preencher_hex no primeiro acesso, então exportar uma página não custa
+    a região inteira. A distribuição e as tabelas sensoriais de cada terreno
+    são carregadas e compiladas uma única vez. Levanta ValueError para tamanho
+    ou terreno inválidos.
+    """
+    if largura < 1 or altura < 1 or largura * altura > MAX_HEXES_REGIAO:
+        raise ValueError(f"Tamanho inválido: a região deve ter entre 1 e {MAX_HEXES_REGIAO} hexes.")
+    if semente is None:
+        semente = random.SystemRandom().randrange(2 ** 32)
+    celulas = layout_regiao(largura, altura, layout, pesos, padrao, random.Random(semente), procedural, escala)
+    distribuicao = carregar_distribuicao()
+    desconhecidos = sorted(set(celulas) - set(distribuicao))
+    if desconhecidos:
+        raise ValueError(f"Terreno(s) sem distribuição em 'distribuicao.json': {', '.join(map(str, desconhecidos))}")
+
+    por_terreno = {}
+    for terrain in set(celulas):
+        tabelas = load_hex_tables(terrain)
+        sorteadores = tuple(_sorteador(tabela) for tabela in (distribuicao[terrain], tabelas.get('paisagens', {}),
+                                                               tabelas.get('sons', {}), tabelas.get('odores', {})))
+        por_terreno[terrain] = (sorteadores, tabelas)
+    rng = random.Random()
+
+    def preencher(hexagono):
+        preencher_hex(hexagono, semente, *por_terreno[hexagono.terreno], rng)
+
+    return Regiao(largura, altura, celulas, preencher)
+
 # ========== ROTAS FLASK (Convertidas para Blueprint) ==========
 
 def get_terrains():
     """Carrega os tipos de terreno do JSON."""
     terrains_path = get_bp_path('tipos_terreno.json')
     try:
-        with open(terrains_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return carregar_json(terrains_path)
     except Exception as e:
         print(f"Erro ao carregar 'tipos_terreno.json': {e}")
         return {'floresta': 'Floresta (Padrão)'} # Fallback
@@ -228,4 +334,175 @@ def generate_hex():
     
     # --- CORREÇÃO AQUI ---
     # Renderiza o novo nome do template
-    return render_template('hex_results.html', hex=hex_data, terrains=terrains)
\ No newline at end of file
+    return render_template('hex_results.html', hex=hex_data, terrains=terrains)
+def ler_pesos_terreno(valor):
+    """
+    Pesos {terreno: peso} de um dicionário (JSON) ou de "floresta:3,planicie:1"
+    (formulário/query string; peso omitido vale 1). None se vazio. Levanta
+    ValueError se algum peso não for um número finito >= 0 ou se a soma não for positiva.
+    """
+    if not valor:
+        return None
+    if isinstance(valor, str):
+        valor = {t.strip(): (p.strip() or 1) for t, _, p in (par.partition(':') for par in valor.split(','))
+                 if t.strip()}
+    if not isinstance(valor, dict):
+        raise ValueError("'terrenos' deve ser {terreno: peso} ou \"terreno:peso,...\".")
+    pesos = {}
+    for terreno, peso in valor.items():
+        try:
+            if isinstance(peso, bool):
+                raise TypeError
+            peso = float(peso)
+        except (TypeError, ValueError):
+            raise ValueError(f"Peso inválido para '{terreno}': {peso!r}") from None
+        if not math.isfinite(peso) or peso < 0:
+            raise ValueError(f"Peso inválido para '{terreno}': {peso} (use um número finito >= 0).")
+        pesos[str(terreno)] = peso
+    if not pesos or sum(pesos.values()) <= 0:
+        raise ValueError("A soma dos pesos de 'terrenos' precisa ser positiva.")
+    return pesos
+
+def regiao_da_requisicao():
+    """
+    Gera a região descrita pela requisição (JSON no POST ou query string no GET):
+      largura, altura: tamanho da grade;
+      layout: lista de linhas de terrenos ou {"q,r": terreno} (opcional);
+      terrenos: pesos {terreno: peso} (ou "floresta:3,planicie:1" no GET) para as células sem layout;
+      terreno: terreno padrão das células restantes (padrão: floresta);
+      procedural: 1 para preencher as células sem layout com manchas coerentes de terreno
+      (proporções pelos 'terrenos'; requer NumPy); escala: tamanho típico da mancha em hexes;
+      semente: mesma semente e parâmetros, mesma região (padrão: aleatória).
+    Retorna (região, semente). Levanta TypeError/ValueError para parâmetros inválidos.
+    """
+    dados = request.get_json(silent=True) if request.is_json else None
+    if dados is None:
+        dados = request.values.to_dict()
+    largura = int(dados.get('largura', 10))
+    altura = int(dados.get('altura', largura))
+    procedural = str(dados.get('procedural', '')).lower() in ('1', 'true', 'sim')
+    semente = dados.get('semente')
+    semente = int(semente) if semente not in (None, '') else random.SystemRandom().randrange(2 ** 32)
+    regiao = gerar_regiao(largura, altura, dados.get('layout'), ler_pesos_terreno(dados.get('terrenos')),
+                          dados.get('terreno') or 'floresta', semente=semente,
+                          procedural=procedural, escala=float(dados.get('escala') or ESCALA_PADRAO))
+    return regiao, semente
+
+@hex_bp.route('/regiao', methods=['GET', 'POST'])
+def gerar_regiao_route():
+    """Gera uma região inteira em JSON (parâmetros em regiao_da_requisicao)."""
+    try:
+        regiao, semente = regiao_da_requisicao()
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    saida = regiao.como_dict()
+    saida['semente'] = semente
+    saida['terrenos'] = {t: get_terrains().get(t, t) for t in regiao.terrenos}
+    return jsonify(saida)
+
+@hex_bp.route('/regiao.svg', methods=['GET', 'POST'])
+def mapa_regiao_svg():
+    """
+    Mapa SVG da região (mesmos parâmetros de /regiao), com o conteúdo de cada
+    hex no tooltip. Enviado aos pedaços: serve para regiões de milhares de hexes.
+    """
+    try:
+        regiao, semente = regiao_da_requisicao()
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    nomes = get_terrains()
+    return transmitir_template('hex_mapa.svg', mimetype='image/svg+xml', regiao=regiao, semente=semente,
+                               geometria=geometria_svg(regiao), legenda=legenda_svg(regiao, nomes),
+                               celulas=celulas_svg(regiao, nomes))
+
+@hex_bp.route('/regiao/gazetteer', methods=['GET'])
+def gazetteer_regiao():
+    """
+    Gazetteer HTML paginado da região (parâmetros de /regiao na query string,
+    mais pagina e por_pagina). Os links de página repetem a semente, então
+    todas as páginas descrevem a mesma região.
+    """
+    try:
+        regiao, semente = regiao_da_requisicao()
+        pagina = int(request.args.get('pagina', 1))
+        hexes, total_paginas = paginar(regiao, pagina, int(request.args.get('por_pagina', POR_PAGINA_PADRAO)))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    parametros = dict(request.args.to_dict(), semente=semente)
+    parametros.pop('pagina', None)
+    return transmitir_template('hex_gazetteer.html', regiao=regiao, semente=semente, hexes=hexes,
+                               pagina=pagina, total_paginas=total_paginas, parametros=parametros,
+                               terrains=get_terrains())
+
+# ========== SESSÕES DE HEXCRAWL (HEXES GERADOS AO SEREM EXPLORADOS) ==========
+
+_sessoes_hex = None
+_sessoes_lock = threading.Lock()
+
+def obter_sessoes_hex():
+    global _sessoes_hex
+    if _sessoes_hex is None:
+        with _sessoes_lock:
+            if _sessoes_hex is None:
+                os.makedirs(get_bp_path('sessoes'), exist_ok=True)
+                _sessoes_hex = SessoesHex(get_bp_path(os.path.join('sessoes', 'hexcrawl.db')))
+    return _sessoes_hex
+
+@hex_bp.route('/sessoes', methods=['POST'])
+def criar_sessao_route():
+    """
+    Cria uma sessão de hexcrawl. JSON (ou formulário): nome, semente (opcional,
+    0 a 2**63-1), terreno padrão e/ou terrenos {terreno: peso} (no formulário,
+    "floresta:3,planicie:1") para sortear o terreno de cada hex.
+    """
+    dados = (request.get_json(silent=True) if request.is_json else request.form.to_dict()) or {}
+    terreno = dados.get('terreno') or 'floresta'
+    try:
+        pesos = ler_pesos_terreno(dados.get('terrenos'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    validos = carregar_distribuicao()
+    desconhecidos = sorted(set([terreno] + list(pesos or [])) - set(validos))
+    if desconhecidos:
+        return jsonify({'error': f"Terreno(s) inválido(s): {', '.join(map(str, desconhecidos))}"}), 400
+    try:
+        sessao = obter_sessoes_hex().criar_sessao(dados.get('nome'), dados.get('semente'), terreno, pesos)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(sessao), 201
+
+@hex_bp.route('/sessoes/<id_sessao>')
+def obter_sessao_route(id_sessao):
+    sessao = obter_sessoes_hex().obter_sessao(id_sessao)
+    if sessao is None:
+        return jsonify({'error': "Sessão não encontrada."}), 404
+    return jsonify(sessao)
+
+@hex_bp.route('/sessoes/<id_sessao>/hex/<int(signed=True):q>/<int(signed=True):r>', methods=['GET', 'POST'])
+def entrar_hex_route(id_sessao, q, r):
+    """
+    O grupo entra no hex (q, r): na primeira vez ele é gerado (semente própria do
+    hex) e gravado; nas seguintes volta o mesmo resultado direto do banco.
+    ?terreno= define o terreno de um hex ainda não explorado.
+    """
+    sessoes = obter_sessoes_hex()
+    sessao = sessoes.obter_sessao(id_sessao, contar=False)
+    if sessao is None:
+        return jsonify({'error': "Sessão não encontrada."}), 404
+    terreno = request.values.get('terreno')
+    if terreno and terreno not in carregar_distribuicao():
+        return jsonify({'error': f"Terreno inválido: {terreno}"}), 400
+    dados, novo = sessoes.entrar(sessao, q, r, generate_hex_description, terreno)
+    if 'error' in dados:
+        return jsonify(dados), 500
+    return jsonify({'sessao': id_sessao, 'q': q, 'r': r, 'novo': novo, 'hex': dados})
+
+@hex_bp.route('/sessoes/<id_sessao>/hexes')
+def listar_hexes_route(id_sessao):
+    """Hexes já explorados (opcionalmente num retângulo: q_min, q_max, r_min, r_max)."""
+    try:
+        limites = {k: request.args.get(k, type=int) for k in ('q_min', 'q_max', 'r_min', 'r_max')}
+        hexes = obter_sessoes_hex().listar_hexes(id_sessao, **limites)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'sessao': id_sessao, 'total': len(hexes), 'hexes': hexes})
@@ -0,0 +1,162 @@
+"""
+Sessões de hexcrawl persistentes (SQLite): cada hex só é gerado quando o grupo
+entra nele pela primeira vez e fica gravado, indexado pela coordenada axial.
+
+A geração usa uma semente própria por hex ("<semente da sessão>:<q>:<r>"), então
+o resultado de uma coordenada não depende da ordem em que o mapa é explorado.
+Mapas enormes não custam nada até serem visitados.
+"""
+import datetime
+import json
+import random
+import sqlite3
+import threading
+import uuid
+
+from .regiao import semente_hex
+
+# Maior retângulo devolvido de uma vez por listar_hexes
+MAX_HEXES_LISTAGEM = 10000
+# Maior semente gravável (INTEGER do SQLite tem 64 bits com sinal)
+MAX_SEMENTE = 2 ** 63 - 1
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS sessoes (
+    id TEXT PRIMARY KEY,
+    nome TEXT,
+    criada_em TEXT NOT NULL,
+    semente INTEGER NOT NULL,
+    terreno TEXT NOT NULL,          -- terreno padrão dos hexes
+    pesos TEXT                      -- JSON {terreno: peso}; se houver, o terreno de cada hex é sorteado
+);
+
+-- A chave primária (sessao_id, q, r) é o índice por coordenada
+CREATE TABLE IF NOT EXISTS hexes (
+    sessao_id TEXT NOT NULL REFERENCES sessoes (id),
+    q INTEGER NOT NULL,
+    r INTEGER NOT NULL,
+    terreno TEXT NOT NULL,
+    dados TEXT NOT NULL,            -- JSON do hex gerado
+    explorado_em TEXT NOT NULL,
+    PRIMARY KEY (sessao_id, q, r)
+) WITHOUT ROWID;
+"""
+
+
+def _agora():
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+
+class SessoesHex:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._preparado = False
+        self._lock = threading.Lock()
+        self._local = threading.local()   # Uma conexão por thread, reaproveitada entre requisições
+
+    def _conectar(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is not None:
+            return conexao
+        if not self._preparado:
+            with self._lock:
+                if not self._preparado:
+                    conexao = sqlite3.connect(self.caminho, timeout=10.0)
+                    try:
+                        conexao.execute("PRAGMA journal_mode=WAL")
+                        conexao.executescript(_ESQUEMA)
+                        conexao.commit()
+                    finally:
+                        conexao.close()
+                    self._preparado = True
+        conexao = sqlite3.connect(self.caminho, timeout=10.0)
+        conexao.row_factory = sqlite3.Row
+        self._local.conexao = conexao
+        return conexao
+
+    # --- Sessões ---
+
+    def criar_sessao(self, nome=None, semente=None, terreno='floresta', pesos=None):
+        """Grava uma sessão nova. Levanta ValueError se a semente não couber no INTEGER do SQLite."""
+        if semente is not None:
+            try:
+                semente = int(semente)
+            except (TypeError, ValueError):
+                raise ValueError(f"Semente inválida: {semente!r}") from None
+            if not 0 <= semente <= MAX_SEMENTE:
+                raise ValueError(f"A semente deve estar entre 0 e {MAX_SEMENTE}.")
+        sessao = {
+            'id': uuid.uuid4().hex,
+            'nome': nome,
+            'criada_em': _agora(),
+            'semente': semente if semente is not None else random.SystemRandom().randrange(2 ** 53),
+            'terreno': terreno,
+            'pesos': dict(pesos) if pesos else None,
+        }
+        conexao = self._conectar()
+        with conexao:
+            conexao.execute("INSERT INTO sessoes (id, nome, criada_em, semente, terreno, pesos) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            (sessao['id'], nome, sessao['criada_em'], sessao['semente'], terreno,
+                             json.dumps(sessao['pesos'], ensure_ascii=False) if sessao['pesos'] else None))
+        return sessao
+
+    def obter_sessao(self, id_sessao, contar=True):
+        """
+        Dados da sessão (None se não existir). Com 'contar', inclui quantos hexes
+        já foram explorados (uma contagem no índice; desnecessária para entrar num hex).
+        """
+        conexao = self._conectar()
+        linha = conexao.execute("SELECT * FROM sessoes WHERE id = ?", (id_sessao,)).fetchone()
+        if linha is None:
+            return None
+        sessao = dict(linha)
+        sessao['pesos'] = json.loads(sessao['pesos']) if sessao['pesos'] else None
+        if contar:
+            sessao['hexes_explorados'] = conexao.execute(
+                "SELECT COUNT(*) FROM hexes WHERE sessao_id = ?", (id_sessao,)).fetchone()[0]
+        return sessao
+
+    # --- Hexes ---
+
+    def entrar(self, sessao, q, r, gerar, terreno=None):
+        """
+        Hex (q, r) da sessão: o gravado, se já foi explorado, ou um novo gerado
+        com a semente do hex por gerar(terreno, rng) e gravado. Retorna (dados, novo).
+        'terreno' só vale para um hex ainda não explorado (senão vem das regras da sessão).
+        """
+        conexao = self._conectar()
+        linha = conexao.execute("SELECT dados FROM hexes WHERE sessao_id = ? AND q = ? AND r = ?",
+                                (sessao['id'], q, r)).fetchone()
+        if linha is not None:
+            return json.loads(linha['dados']), False
+
+        rng = random.Random(semente_hex(sessao['semente'], q, r))
+        if not terreno:
+            pesos = sessao.get('pesos')
+            terreno = rng.choices(list(pesos), weights=list(pesos.values()))[0] if pesos else sessao['terreno']
+        dados = gerar(terreno, rng)
+        if 'error' in dados:
+            return dados, False   # Erros não são gravados (o hex continua inexplorado)
+        dados = dict(dados, q=q, r=r)
+        with conexao:
+            cursor = conexao.execute(
+                "INSERT OR IGNORE INTO hexes (sessao_id, q, r, terreno, dados, explorado_em) VALUES (?, ?, ?, ?, ?, ?)",
+                (sessao['id'], q, r, terreno, json.dumps(dados, ensure_ascii=False), _agora()))
+        if cursor.rowcount == 0:
+            # Outra requisição gravou o mesmo hex primeiro: vale o que está no banco
+            linha = conexao.execute("SELECT dados FROM hexes WHERE sessao_id = ? AND q = ? AND r = ?",
+                                    (sessao['id'], q, r)).fetchone()
+            return json.loads(linha['dados']), False
+        return dados, True
+
+    def listar_hexes(self, id_sessao, q_min=None, q_max=None, r_min=None, r_max=None):
+        """Hexes já explorados da sessão dentro do retângulo axial (limites opcionais e inclusivos)."""
+        condicoes, parametros = ["sessao_id = ?"], [id_sessao]
+        for coluna, operador, valor in (('q', '>=', q_min), ('q', '<=', q_max), ('r', '>=', r_min), ('r', '<=', r_max)):
+            if valor is not None:
+                condicoes.append(f"{coluna} {operador} ?"); parametros.append(int(valor))
+        linhas = self._conectar().execute(
+            f"SELECT dados FROM hexes WHERE {' AND '.join(condicoes)} ORDER BY q, r LIMIT ?",
+            parametros + [MAX_HEXES_LISTAGEM]).fetchall()
+        return [json.loads(linha['dados']) for linha in linhas]
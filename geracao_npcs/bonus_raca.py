@@ -73,6 +73,10 @@ def aplicar_bonus_raca(atributos, raca):
     if isinstance(bonus, dict):  
         # Aplica os bônus fixos diretamente
         for atributo, valor in bonus.items():
+            if atributo not in atributos:
+                # Bônus livre (ex: Meio-Orc "Outro atributo (exceto Carisma)"): sorteia entre os que sobraram
+                livres = [a for a in atributos if a not in bonus and a not in atributo]
+                atributo = random.choice(livres)
             atributos[atributo] += valor
     else:
         # Regras especiais para raças que escolhem bônus
@@ -1,9 +1,10 @@
 from flask import Blueprint, render_template, jsonify, request
 import random
-import json
 import os
 import re
 from .bonus_raca import aplicar_bonus_raca 
+from painel.tabelas import obter_registro
+from painel.sorteio import TabelaPesos, compilar
 
 # Definição do Blueprint
 npcs_bp = Blueprint('npcs', __name__,
@@ -17,21 +18,18 @@ bp_dir = os.path.abspath(os.path.dirname(__file__))
 # =========================================
 
 def carregar_dados(nome_arquivo):
-    pasta_data = os.path.join(bp_dir, 'data')
-    for pasta_raiz, _, arquivos in os.walk(pasta_data):
-        if nome_arquivo in arquivos:
-            caminho = os.path.join(pasta_raiz, nome_arquivo)
-            with open(caminho, 'r', encoding='utf-8') as f:
-                return json.load(f)
+    """Busca a tabela pelo nome dentro de data/ no registro (sem os.walk a cada chamada)."""
+    registro = obter_registro()
+    caminho = registro.procurar(nome_arquivo, os.path.join(bp_dir, 'data'))
+    if caminho:
+        return registro.obter(caminho)
     print(f"Arquivo não encontrado: {nome_arquivo}")
     return {} # Retorna dict vazio para evitar quebras
 
 def escolher_por_peso(opcoes_dict):
     """Seleciona uma chave de um dicionário onde os valores são pesos."""
     if not opcoes_dict: return "Indefinido"
-    opcoes = list(opcoes_dict.keys())
-    pesos = list(opcoes_dict.values())
-    return random.choices(opcoes, weights=pesos, k=1)[0]
+    return compilar(opcoes_dict).sortear()
 
 # =========================================
 # GERADORES ESPECÍFICOS
@@ -44,10 +42,10 @@ def gerar_atributos():
         "Sabedoria": random.randint(-2, 5), "Carisma": random.randint(-2, 5)
     }
 
+FAIXAS_IDADE = TabelaPesos([(16, 40), (40, 55), (55, 100)], [7, 2, 1])
+
 def gerar_idade():
-    faixas_idade = [(16, 40), (40, 55), (55, 100)]
-    pesos = [7, 2, 1] 
-    faixa = random.choices(faixas_idade, weights=pesos, k=1)[0]
+    faixa = FAIXAS_IDADE.sortear()
     return random.randint(faixa[0], faixa[1])
 
 def escolher_raca():
@@ -106,13 +104,13 @@ def carregar_tracos_aparencia():
 
 def carregar_alturas_raciais(): return carregar_dados('alturas_raciais.json')
 
+def _intervalos_pesos(faixas):
+    return [f["intervalo"] for f in faixas], [f["peso"] for f in faixas]
+
 def gerar_altura(raca):
     alturas = carregar_alturas_raciais()
     if raca not in alturas: return random.randint(100, 200)
-    faixas = alturas[raca]["faixas_altura"]
-    intervalos = [f["intervalo"] for f in faixas]
-    pesos = [f["peso"] for f in faixas]
-    faixa = random.choices(intervalos, weights=pesos, k=1)[0]
+    faixa = compilar(alturas[raca]["faixas_altura"], _intervalos_pesos).sortear()
     return random.randint(faixa[0], faixa[1])
 
 def carregar_tipo_corporal(): return carregar_dados('tipo_corporal.json')
@@ -1,8 +1,9 @@
-import json
 import random
 import os
 import re
 from flask import Blueprint, render_template, request, jsonify
+from painel.tabelas import carregar_json as carregar_tabela
+from painel.sorteio import TabelaPesos
 
 # =====================================================
 # CONFIGURAÇÃO DO BLUEPRINT
@@ -28,12 +29,11 @@ ESTADOS_DIR = os.path.join(BASE_DIR, "estados")
 def carregar_json(path):
     """Carrega JSON a partir de um caminho relativo ao módulo."""
     caminho = os.path.join(BASE_DIR, path)
-    if not os.path.exists(caminho):
+    try:
+        return carregar_tabela(caminho)
+    except FileNotFoundError:
         # Silencioso ou log leve, pois estados.json é opcional se tivermos fallback
         return None
-    try:
-        with open(caminho, "r", encoding="utf-8") as f:
-            return json.load(f)
     except Exception as e:
         print(f"[ERRO] Falha ao ler {caminho}: {e}")
         return None
@@ -42,11 +42,10 @@ def carregar_json(path):
 def carregar_json_data(filename):
     """Carrega JSON do diretório /data."""
     caminho = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(caminho):
-        return []
     try:
-        with open(caminho, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return carregar_tabela(caminho)
+    except FileNotFoundError:
+        return []
     except Exception as e:
         print(f"[ERRO] Falha ao ler {caminho}: {e}")
         return []
@@ -55,12 +54,11 @@ def carregar_json_data(filename):
 def carregar_json_estado(filename):
     """Carrega JSON do diretório /estados."""
     caminho = os.path.join(ESTADOS_DIR, filename)
-    if not os.path.exists(caminho):
+    try:
+        return carregar_tabela(caminho)
+    except FileNotFoundError:
         # Retorna estrutura vazia segura
         return {"templates": [], "boost": {}, "veracidade_mod": {}}
-    try:
-        with open(caminho, "r", encoding="utf-8") as f:
-            return json.load(f)
     except Exception as e:
         print(f"[ERRO] Falha ao ler {caminho}: {e}")
         return {"templates": [], "boost": {}, "veracidade_mod": {}}
@@ -168,7 +166,7 @@ def gerar_rumor_por_estado(estado):
         peso_calc = max(0.01, peso_original * multiplicador)
         pesos_finais.append(peso_calc)
 
-    veracidade_chave = random.choices(categorias_v, weights=pesos_finais, k=1)[0]
+    veracidade_chave = TabelaPesos(categorias_v, pesos_finais).sortear()
 
     # Opcional: Formatar a chave para exibição (ex: "ameaca_maior" -> "Ameaca Maior")
     # Se preferir exibir exatamente como no JSON, remova a linha abaixo.
@@ -1,9 +1,11 @@
 import os
-import json
 import random
 import re
 import math
 from flask import Blueprint, render_template, request, jsonify
+from painel.tabelas import carregar_json
+from painel.sorteio import TabelaCumulativa, compilar
+from painel.rolagem import Dados, Operacao, compilar_prefixo
 
 # 1. Cria o Blueprint
 tesouros_bp = Blueprint('tesouros', __name__,
@@ -18,28 +20,39 @@ def load_data(filename):
     """Carrega um arquivo JSON relativo a este blueprint."""
     filepath = os.path.join(bp_dir, filename)
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return carregar_json(filepath)
     except Exception as e:
         print(f"ERRO: Não foi possível carregar {filepath}: {e}")
         return {}
 
-ALL_NDS = load_data("nds.json")
-ALL_RIQUEZAS = load_data("riquezas.json")
-ALL_DIVERSOS = load_data("diversos.json")
-ALL_EQUIPAMENTOS = load_data("equipamentos.json")
-ALL_SUPERIORES = load_data("superiores.json")
-ALL_POCOES = load_data("pocoes.json")
+# Tabelas do gerador: consultadas no registro a cada uso (nada é lido na importação
+# do módulo e edições nos JSON valem sem reiniciar o app)
+ARQUIVOS_TABELAS = {
+    'nds': "nds.json",
+    'riquezas': "riquezas.json",
+    'diversos': "diversos.json",
+    'equipamentos': "equipamentos.json",
+    'superiores': "superiores.json",
+    'pocoes': "pocoes.json",
+}
+
+def tabela(nome):
+    """Tabela 'nome' de ARQUIVOS_TABELAS (imutável, via registro)."""
+    return load_data(ARQUIVOS_TABELAS[nome])
+
+class TabelaNaoEncontrada(LookupError):
+    """O ND pedido (ou a tabela de Dinheiro/Itens dele) não existe em nds.json."""
 
 
 # 4. Rotas (mudam de @app.route para @tesouros_bp.route)
 @tesouros_bp.route('/')
 def index():
     """Renderiza a página inicial do rolador de tesouros."""
-    if not ALL_NDS:
+    all_nds = tabela('nds')
+    if not all_nds:
         return "ERRO: nds.json não carregado.", 500
     nd_levels = sorted(
-        ALL_NDS.keys(), 
+        all_nds.keys(), 
         key=lambda x: float(x.replace("nd ", ""))
     )
     # CORREÇÃO: Renderiza o template com nome único
@@ -50,59 +63,66 @@ def rolar_tesouro():
     """Executa a rolagem ponderada para Dinheiro E Itens."""
     try:
         data = request.json
-        nd_key = data.get('nd')
-        treasure_type = data.get('treasure_type', 'padrao')
-        
-        if nd_key not in ALL_NDS:
-            return jsonify({'error': f'ND "{nd_key}" não encontrado no JSON.'}), 404
-            
-        nd_tables = ALL_NDS[nd_key]
+        return jsonify(rolar_tesouro_nd(data.get('nd'), data.get('treasure_type', 'padrao')))
+    except TabelaNaoEncontrada as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        print(f"Erro na rota /rolar_tesouro: {e}")
+        return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
 
-        num_rolls = 2 if treasure_type == 'dobro' else 1
+def rolar_tesouro_nd(nd_key, treasure_type='padrao'):
+    """
+    Rolagem completa (Dinheiro e Itens) de um ND; 'dobro' rola as duas tabelas
+    duas vezes. Levanta TabelaNaoEncontrada se o ND ou uma das tabelas não existir.
+    Usada pela rota /rolar_tesouro e pela geração em lote (python -m painel generate treasure).
+    """
+    all_nds = tabela('nds')
+    if nd_key not in all_nds:
+        raise TabelaNaoEncontrada(f'ND "{nd_key}" não encontrado no JSON.')
         
-        all_dinheiro_results = []
-        all_item_results = []
-        all_dinheiro_tabela_rolls = []
-        all_item_tabela_rolls = []
-        all_d100_dinheiro_rolls = []
-        all_d100_item_rolls = []
-
-        for _ in range(num_rolls):
-            dinheiro_table = nd_tables.get("Dinheiro", {})
-            if not dinheiro_table:
-                return jsonify({'error': f'Tabela "Dinheiro" não encontrada para {nd_key}.'}), 404
-            
-            rolled_dinheiro_str, d100_dinheiro = get_weighted_roll_d100(dinheiro_table, 0)
-            all_dinheiro_tabela_rolls.append(rolled_dinheiro_str)
-            all_d100_dinheiro_rolls.append(d100_dinheiro)
-            
-            dinheiro_results_list = resolve_treasure_roll(rolled_dinheiro_str, treasure_type)
-            all_dinheiro_results.extend(dinheiro_results_list)
-
-            itens_table = nd_tables.get("Itens", {})
-            if not itens_table:
-                return jsonify({'error': f'Tabela "Itens" não encontrada para {nd_key}.'}), 404
-
-            rolled_item_str, d100_item = get_weighted_roll_d100(itens_table, 0)
-            all_item_tabela_rolls.append(rolled_item_str)
-            all_d100_item_rolls.append(d100_item)
-            
-            item_results_list = resolve_treasure_roll(rolled_item_str, "padrao")
-            all_item_results.extend(item_results_list)
+    nd_tables = all_nds[nd_key]
+
+    num_rolls = 2 if treasure_type == 'dobro' else 1
+    
+    all_dinheiro_results = []
+    all_item_results = []
+    all_dinheiro_tabela_rolls = []
+    all_item_tabela_rolls = []
+    all_d100_dinheiro_rolls = []
+    all_d100_item_rolls = []
+
+    for _ in range(num_rolls):
+        dinheiro_table = nd_tables.get("Dinheiro", {})
+        if not dinheiro_table:
+            raise TabelaNaoEncontrada(f'Tabela "Dinheiro" não encontrada para {nd_key}.')
         
-        return jsonify({
-            'nd': nd_key,
-            'dinheiro_tabela_roll': ", ".join(all_dinheiro_tabela_rolls),
-            'item_tabela_roll': ", ".join(all_item_tabela_rolls),
-            'dinheiro_results': all_dinheiro_results,
-            'item_results': all_item_results,
-            'd100_dinheiro_rolls': all_d100_dinheiro_rolls,
-            'd100_item_rolls': all_d100_item_rolls
-        })
+        rolled_dinheiro_str, d100_dinheiro = get_weighted_roll_d100(dinheiro_table, 0)
+        all_dinheiro_tabela_rolls.append(rolled_dinheiro_str)
+        all_d100_dinheiro_rolls.append(d100_dinheiro)
         
-    except Exception as e:
-        print(f"Erro na rota /rolar_tesouro: {e}")
-        return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
+        dinheiro_results_list = resolve_treasure_roll(rolled_dinheiro_str, treasure_type)
+        all_dinheiro_results.extend(dinheiro_results_list)
+
+        itens_table = nd_tables.get("Itens", {})
+        if not itens_table:
+            raise TabelaNaoEncontrada(f'Tabela "Itens" não encontrada para {nd_key}.')
+
+        rolled_item_str, d100_item = get_weighted_roll_d100(itens_table, 0)
+        all_item_tabela_rolls.append(rolled_item_str)
+        all_d100_item_rolls.append(d100_item)
+        
+        item_results_list = resolve_treasure_roll(rolled_item_str, "padrao")
+        all_item_results.extend(item_results_list)
+    
+    return {
+        'nd': nd_key,
+        'dinheiro_tabela_roll': ", ".join(all_dinheiro_tabela_rolls),
+        'item_tabela_roll': ", ".join(all_item_tabela_rolls),
+        'dinheiro_results': all_dinheiro_results,
+        'item_results': all_item_results,
+        'd100_dinheiro_rolls': all_d100_dinheiro_rolls,
+        'd100_item_rolls': all_d100_item_rolls
+    }
 
 # 5. Toda a lógica de rolagem (sem mudanças, apenas colada abaixo)
 # (get_weighted_roll_d100, roll_dice_string, roll_material_especial, etc.)
@@ -114,25 +134,19 @@ def get_weighted_roll_d100(table, bonus_pct=0):
     d100_details_str = f"(d100: {roll}"
     if bonus_pct > 0: d100_details_str += f" + {bonus_pct} = {roll_with_bonus}"
     d100_details_str += ")"
-    current_pct = 0
-    for item_key, weight in table.items():
-        current_pct += weight
-        if roll_with_bonus <= current_pct:
-            return item_key, d100_details_str
-    return list(table.keys())[-1], d100_details_str
+    # Faixas acumuladas pré-compiladas por tabela; busca binária em vez de varredura
+    return compilar(table, classe=TabelaCumulativa).localizar(roll_with_bonus), d100_details_str
 
 def roll_dice_string(dice_str):
     dice_str = str(dice_str).strip()
-    match = re.match(r'(\d+)d(\d+)(?:([+x])(\d+))?', dice_str, re.IGNORECASE)
-    if not match:
+    # Expressão compilada uma vez (cache de AST); "2d6+1x100" = (2d6+1) x 100
+    expressao, _ = compilar_prefixo(dice_str)
+    if expressao is None or not isinstance(expressao.arvore, (Dados, Operacao)):
         try: return int(dice_str), f"({dice_str})"
         except ValueError: return 0, "(String de dado inválida)"
-    num_dice = int(match.group(1)); die_face = int(match.group(2))
-    operator = match.group(3); modifier = int(match.group(4) or 0)
-    roll_total = sum(random.randint(1, die_face) for _ in range(num_dice))
-    final_total = roll_total; details = f"(Rolagem: {roll_total} no {num_dice}d{die_face})"
-    if operator == '+': final_total = roll_total + modifier; details = f"(Rolagem: {roll_total} + {modifier})"
-    elif operator == 'x': final_total = roll_total * modifier; details = f"(Rolagem: {roll_total} x {modifier})"
+    final_total, rolagens = expressao.rolar_detalhado()
+    if isinstance(expressao.arvore, Dados): details = f"(Rolagem: {final_total} no {expressao.arvore})"
+    else: details = f"(Rolagem: {rolagens})"
     return final_total, details
 
 def roll_material_especial():
@@ -157,7 +171,7 @@ def resolve_treasure_roll(roll_string, treasure_type="padrao"):
         else: results.append(f"Erro: Tipo de riqueza desconhecido '{tipo_raw}'"); return results
         quantity, _ = roll_dice_string(dice_str); total_value_tibar = 0
         for i in range(quantity):
-            table = ALL_RIQUEZAS.get(tipo, {}); rolled_item_str, d100_details = get_weighted_roll_d100(table, bonus_pct=bonus_pct) 
+            table = tabela('riquezas').get(tipo, {}); rolled_item_str, d100_details = get_weighted_roll_d100(table, bonus_pct=bonus_pct) 
             if not rolled_item_str: results.append(f"Erro: Tabela de riqueza '{tipo}' não encontrada."); continue
             match_item = re.match(r'(.*) \[([\w\d+x]+ T\$)\]', rolled_item_str)
             if not match_item: results.append(f"Item mal formatado em riquezas.json: {rolled_item_str}"); continue
@@ -175,9 +189,9 @@ def resolve_treasure_roll(roll_string, treasure_type="padrao"):
         for roll in d6_rolls:
             categoria = map_d6_to_category(roll); generated_item_str = None
             for _ in range(10):
-                item_base_table = ALL_EQUIPAMENTOS.get(categoria, {}); item_base, item_base_d100 = get_weighted_roll_d100(item_base_table, 0) 
+                item_base_table = tabela('equipamentos').get(categoria, {}); item_base, item_base_d100 = get_weighted_roll_d100(item_base_table, 0) 
                 if not item_base: generated_item_str = f"Erro: Tabela '{categoria}' não encontrada."; break
-                melhoria_table = ALL_SUPERIORES.get(categoria, {});
+                melhoria_table = tabela('superiores').get(categoria, {});
                 if not melhoria_table: generated_item_str = f"Erro: Tabela '{categoria}' não encontrada."; break
                 melhorias_duplas = ["Pungente", "Sob medida"]; melhorias_roladas = []; melhorias_gastas = 0; tentativas = 0
                 while melhorias_gastas < num_melhorias_total and tentativas < 10:
@@ -203,15 +217,16 @@ def resolve_treasure_roll(roll_string, treasure_type="padrao"):
     if match_pocao:
         dice_str = match_pocao.group(1).strip(); quantity, _ = roll_dice_string(dice_str)
         for i in range(quantity):
-            if not ALL_POCOES: results.append("Erro: 'pocoes.json' não carregado."); break
-            pocao, d100_details = get_weighted_roll_d100(ALL_POCOES, bonus_pct=bonus_pct)
+            all_pocoes = tabela('pocoes')
+            if not all_pocoes: results.append("Erro: 'pocoes.json' não carregado."); break
+            pocao, d100_details = get_weighted_roll_d100(all_pocoes, bonus_pct=bonus_pct)
             results.append(f"Poção: {pocao} {d100_details}")
         return results
     if roll_string.startswith("Equipamento"):
         is_2d = "2D" in roll_string; d6_rolls = [random.randint(1, 6)]; d6_rolls.append(random.randint(1, 6)) if is_2d else None
         final_options = []; rolled_items = [] 
         for roll in d6_rolls:
-            categoria = map_d6_to_category(roll); table = ALL_EQUIPAMENTOS.get(categoria, {}); item_str = None
+            categoria = map_d6_to_category(roll); table = tabela('equipamentos').get(categoria, {}); item_str = None
             for _ in range(10):
                 item, item_d100 = get_weighted_roll_d100(table, 0) 
                 if item not in rolled_items: item_str = f"{categoria.capitalize()}: {item} {item_d100}"; rolled_items.append(item); break
@@ -221,7 +236,7 @@ def resolve_treasure_roll(roll_string, treasure_type="padrao"):
         else: results.append("Equipamento: " + final_options[0])
         return results
     if roll_string == "Diverso":
-        item, item_d100 = get_weighted_roll_d100(ALL_DIVERSOS, 0)
+        item, item_d100 = get_weighted_roll_d100(tabela('diversos'), 0)
         if item: results.append(f"Item Diverso: {item} {item_d100}")
         else: results.append("Erro: Tabela 'diversos.json' não encontrada.")
         return results
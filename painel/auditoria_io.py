@@ -0,0 +1,240 @@
+import builtins
+import os
+import sys
+import threading
+from collections import Counter
+
+from flask import jsonify, request
+
+from .tabelas import PROJETO_DIR
+
+# Operações auditadas: nome exibido -> (objeto dono, atributo)
+OPERACOES = {
+    'open': (builtins, 'open'),
+    'stat': (os, 'stat'),        # os.path.exists/isfile/isdir/getmtime passam por aqui
+    'walk': (os, 'walk'),
+    'listdir': (os, 'listdir'),
+}
+
+CABECALHO = 'X-Painel-IO'
+
+_ESTE_ARQUIVO = os.path.abspath(__file__)
+_PAINEL_DIR = os.path.dirname(_ESTE_ARQUIVO)
+_local = threading.local()
+_originais = {}
+_instalar_lock = threading.Lock()
+
+
+# ========== CONTAGEM POR REQUISIÇÃO ==========
+
+class ContadorIO:
+    """Chamadas de I/O de uma requisição: por operação e por função de origem."""
+    __slots__ = ('operacoes', 'origens', 'em_fluxo')
+
+    def __init__(self):
+        self.operacoes = Counter()   # operação -> chamadas
+        self.origens = Counter()     # (operação, origem) -> chamadas
+        self.em_fluxo = False        # Resposta em streaming: a contagem segue até o fim do envio
+
+    def total(self):
+        return sum(self.operacoes.values())
+
+    def cabecalho(self):
+        return ';'.join(f"{op}={self.operacoes.get(op, 0)}" for op in OPERACOES)
+
+
+def _nome_frame(frame):
+    caminho = os.path.relpath(frame.f_code.co_filename, PROJETO_DIR)
+    modulo = os.path.splitext(caminho)[0].replace(os.sep, '.')
+    return f"{modulo}.{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}"
+
+
+def _do_projeto(nome_arquivo):
+    return (nome_arquivo.startswith(PROJETO_DIR + os.sep) and nome_arquivo != _ESTE_ARQUIVO
+            and 'site-packages' not in nome_arquivo)
+
+
+def _origem(frame):
+    """
+    Função do projeto responsável pela chamada. Se ela passou por um utilitário
+    de painel/ (ex: registro de tabelas), mostra os dois: "blueprint -> painel".
+    """
+    interno = None
+    while frame is not None:
+        nome_arquivo = frame.f_code.co_filename
+        if not nome_arquivo.startswith('<') and _do_projeto(os.path.abspath(nome_arquivo)):
+            nome_arquivo = os.path.abspath(nome_arquivo)
+            if not nome_arquivo.startswith(_PAINEL_DIR + os.sep):
+                nome = _nome_frame(frame)
+                return f"{nome} -> {interno}" if interno else nome
+            if interno is None:
+                interno = _nome_frame(frame)
+        frame = frame.f_back
+    return interno or '(fora do projeto)'
+
+
+def _envolver(operacao, original):
+    def auditado(*args, **kwargs):
+        contador = getattr(_local, 'contador', None)
+        if contador is not None:
+            contador.operacoes[operacao] += 1
+            contador.origens[(operacao, _origem(sys._getframe(1)))] += 1
+        return original(*args, **kwargs)
+    auditado.__wrapped__ = original
+    auditado.__name__ = getattr(original, '__name__', operacao)
+    return auditado
+
+
+def _instalar_ganchos():
+    """Substitui open/os.stat/os.walk/os.listdir por versões que contam (uma vez por processo)."""
+    with _instalar_lock:
+        if _originais:
+            return
+        for operacao, (dono, atributo) in OPERACOES.items():
+            original = getattr(dono, atributo)
+            _originais[operacao] = original
+            setattr(dono, atributo, _envolver(operacao, original))
+
+
+def desinstalar_ganchos():
+    with _instalar_lock:
+        for operacao, original in _originais.items():
+            dono, atributo = OPERACOES[operacao]
+            setattr(dono, atributo, original)
+        _originais.clear()
+
+
+# ========== AGREGADO POR ROTA ==========
+
+class AuditoriaIO:
+    """Acumula as contagens por rota e verifica o orçamento de I/O de cada uma."""
+
+    def __init__(self, orcamentos=None):
+        self.orcamentos = dict(orcamentos or {})   # rota (ou '*') -> máximo de chamadas por requisição
+        self._lock = threading.Lock()
+        self._rotas = {}                            # rota -> dict de agregados
+
+    def orcamento(self, rota):
+        return self.orcamentos.get(rota, self.orcamentos.get('*'))
+
+    def registrar(self, rota, contador):
+        total = contador.total()
+        limite = self.orcamento(rota)
+        excedeu = limite is not None and total > limite
+        with self._lock:
+            dados = self._rotas.get(rota)
+            if dados is None:
+                dados = self._rotas[rota] = {
+                    'requisicoes': 0, 'em_streaming': 0, 'chamadas': 0, 'maximo': 0, 'excessos': 0,
+                    'operacoes': Counter(), 'origens': Counter(),
+                }
+            dados['requisicoes'] += 1
+            dados['em_streaming'] += int(contador.em_fluxo)
+            dados['chamadas'] += total
+            dados['maximo'] = max(dados['maximo'], total)
+            dados['excessos'] += int(excedeu)
+            dados['operacoes'].update(contador.operacoes)
+            dados['origens'].update(contador.origens)
+        return excedeu
+
+    def relatorio(self, limite_origens=15):
+        """Rotas ordenadas da pior para a melhor (média de chamadas por requisição)."""
+        with self._lock:
+            rotas = []
+            for rota, d in self._rotas.items():
+                rotas.append({
+                    'rota': rota,
+                    'requisicoes': d['requisicoes'],
+                    'em_streaming': d['em_streaming'],
+                    'media_por_requisicao': round(d['chamadas'] / d['requisicoes'], 2),
+                    'maximo_por_requisicao': d['maximo'],
+                    'orcamento': self.orcamento(rota),
+                    'excessos': d['excessos'],
+                    'operacoes': dict(d['operacoes']),
+                    'origens': [{'operacao': op, 'origem': origem, 'chamadas': n}
+                                for (op, origem), n in d['origens'].most_common(limite_origens)],
+                })
+        return sorted(rotas, key=lambda r: r['media_por_requisicao'], reverse=True)
+
+    def limpar(self):
+        with self._lock:
+            self._rotas.clear()
+
+
+# ========== INTEGRAÇÃO COM O FLASK ==========
+
+def instalar_auditoria_io(app):
+    """
+    Modo de depuração (AUDITORIA_IO=True): conta open/stat/walk/listdir de cada
+    requisição, devolve as contagens no cabeçalho X-Painel-IO e agrega tudo em /debug/io.
+    ORCAMENTO_IO = {"/rota": máximo, "*": padrão}; com AUDITORIA_IO_ESTRITA=True a
+    requisição que estoura o orçamento responde 500.
+
+    Respostas em streaming são registradas só quando o envio termina
+    (call_on_close), com o I/O feito ao gerar o corpo; o cabeçalho, enviado
+    antes, traz apenas o que a view fez, e o orçamento estourado no corpo só
+    aparece no log e em /debug/io (não há mais como responder 500).
+    """
+    auditoria = AuditoriaIO(app.config.get('ORCAMENTO_IO'))
+    app.extensions['auditoria_io'] = auditoria
+    _instalar_ganchos()
+
+    @app.before_request
+    def _iniciar_contagem():
+        _local.contador = ContadorIO()
+
+    def _encerrar_fluxo(rota, contador):
+        if getattr(_local, 'contador', None) is contador:
+            _local.contador = None
+        if auditoria.registrar(rota, contador):
+            print(f"[AUDITORIA IO] {rota}: {contador.total()} chamadas de I/O com o corpo em streaming "
+                  f"(orçamento {auditoria.orcamento(rota)})")
+
+    @app.after_request
+    def _fechar_contagem(response):
+        contador = getattr(_local, 'contador', None)
+        _local.contador = None
+        if contador is None:
+            return response
+        rota = request.url_rule.rule if request.url_rule is not None else 'sem_rota'
+        if rota == '/debug/io':
+            return response
+        if response.is_streamed:
+            # O corpo é gerado depois (na mesma thread): continua contando até o fim do envio
+            contador.em_fluxo = True
+            _local.contador = contador
+            response.headers[CABECALHO] = contador.cabecalho()
+            response.headers[CABECALHO + '-Corpo'] = 'streaming (total em /debug/io)'
+            response.call_on_close(lambda: _encerrar_fluxo(rota, contador))
+            return response
+        excedeu = auditoria.registrar(rota, contador)
+        response.headers[CABECALHO] = contador.cabecalho()
+        if excedeu:
+            limite = auditoria.orcamento(rota)
+            print(f"[AUDITORIA IO] {rota}: {contador.total()} chamadas de I/O (orçamento {limite})")
+            response.headers[CABECALHO + '-Orcamento'] = f"excedido ({contador.total()}/{limite})"
+            if app.config.get('AUDITORIA_IO_ESTRITA'):
+                resposta = jsonify({'error': f"Orçamento de I/O excedido em {rota}: "
+                                             f"{contador.total()} chamadas (máximo {limite})",
+                                    'origens': [f"{op} {origem}: {n}" for (op, origem), n
+                                                in contador.origens.most_common(10)]})
+                resposta.status_code = 500
+                resposta.headers[CABECALHO] = contador.cabecalho()
+                return resposta
+        return response
+
+    @app.teardown_request
+    def _descartar_contagem(exc):
+        contador = getattr(_local, 'contador', None)
+        if contador is not None and not contador.em_fluxo:
+            _local.contador = None
+
+    @app.route('/debug/io')
+    def debug_io():
+        """Ranking das rotas por chamadas de I/O (?limpar=1 zera os agregados)."""
+        rotas = auditoria.relatorio()
+        if request.args.get('limpar'):
+            auditoria.limpar()
+        return jsonify({'orcamentos': auditoria.orcamentos, 'rotas': rotas})
+
+    return auditoria
@@ -0,0 +1,213 @@
+import atexit
+import datetime
+import gzip
+import itertools
+import os
+import queue
+import shutil
+import threading
+import time
+
+# Sinal na fila: o relatório terminou (fecha o arquivo)
+_FIM = object()
+
+
+# ========== RELATÓRIO EM ANDAMENTO ==========
+
+class RelatorioLog:
+    """
+    Alça devolvida por EscritorLogs.abrir(): só enfileira, nunca toca no disco.
+    O texto é juntado em pedaços de até 'tamanho_pedaco' caracteres antes de ir
+    para a fila (uma viagem longa não vira milhares de itens na fila).
+    """
+    __slots__ = ('escritor', 'nome', 'fechado', '_partes', '_acumulado')
+
+    tamanho_pedaco = 32 * 1024
+
+    def __init__(self, escritor, nome):
+        self.escritor = escritor
+        self.nome = nome
+        self.fechado = False
+        self._partes = []
+        self._acumulado = 0
+
+    def escrever(self, texto):
+        if self.fechado:
+            return
+        self._partes.append(texto)
+        self._acumulado += len(texto)
+        if self._acumulado >= self.tamanho_pedaco:
+            self._enviar()
+
+    def _enviar(self):
+        if self._partes:
+            self.escritor._fila.put((self.nome, ''.join(self._partes)))
+            self._partes = []
+            self._acumulado = 0
+
+    def fechar(self):
+        if not self.fechado:
+            self.fechado = True
+            self._enviar()
+            self.escritor._fila.put((self.nome, _FIM))
+
+
+# ========== ESCRITOR EM SEGUNDO PLANO ==========
+
+class EscritorLogs:
+    """
+    Grava relatórios de texto numa thread própria, fora do caminho da requisição.
+
+    - novo_nome(prefixo) gera um nome único ("<prefixo>_<data>_<hora>_<micros>_<pid>_<seq>.txt");
+      abrir(nome) o marca como pendente e devolve um RelatorioLog, e escrever()/fechar()
+      só colocam o texto na fila. Todo relatório aberto precisa ser fechado.
+    - A thread junta o que estiver na fila (até 'lote' itens) e grava tudo de uma vez.
+    - Depois de fechar relatórios, faz a rotação: os 'manter_texto' mais recentes
+      ficam em .txt, os mais antigos viram .txt.gz e além de 'manter_total' são apagados.
+    """
+
+    def __init__(self, diretorio, manter_texto=50, manter_total=500, lote=512, intervalo_rotacao=30.0):
+        self.diretorio = os.path.abspath(diretorio)
+        self.manter_texto = manter_texto
+        self.manter_total = manter_total
+        self.lote = lote
+        self.intervalo_rotacao = intervalo_rotacao
+        self.erros = 0
+        self._fila = queue.Queue()
+        self._sequencia = itertools.count(1)
+        self._pendentes = set()                # nomes ainda não fechados em disco
+        self._condicao = threading.Condition()
+        self._ultima_rotacao = 0.0
+        self._thread = None
+        self._iniciar_lock = threading.Lock()
+
+    # --- API usada nas requisições ---
+
+    def novo_nome(self, prefixo):
+        agora = datetime.datetime.now()
+        return (f"{prefixo}_{agora:%Y%m%d_%H%M%S}_{agora.microsecond:06d}"
+                f"_{os.getpid()}_{next(self._sequencia):04d}.txt")
+
+    def abrir(self, nome, cabecalho=''):
+        """Abre o relatório 'nome' (de novo_nome) e devolve a alça para escrever nele."""
+        self._garantir_thread()
+        with self._condicao:
+            self._pendentes.add(nome)
+        relatorio = RelatorioLog(self, nome)
+        if cabecalho:
+            relatorio.escrever(cabecalho)
+        return relatorio
+
+    def pendente(self, nome):
+        return nome in self._pendentes
+
+    def aguardar(self, nome, timeout=10.0):
+        """Espera o relatório 'nome' chegar ao disco. False se o tempo acabar."""
+        limite = time.monotonic() + timeout
+        with self._condicao:
+            while nome in self._pendentes:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._condicao.wait(restante)
+        return True
+
+    def esvaziar(self, timeout=10.0):
+        """Espera a fila ser toda gravada (usado no encerramento do processo)."""
+        if self._thread is None:
+            return True
+        limite = time.monotonic() + timeout
+        while self._fila.unfinished_tasks:
+            if time.monotonic() > limite:
+                return False
+            time.sleep(0.01)
+        return True
+
+    # --- Thread de gravação ---
+
+    def _garantir_thread(self):
+        if self._thread is not None:
+            return
+        with self._iniciar_lock:
+            if self._thread is None:
+                os.makedirs(self.diretorio, exist_ok=True)
+                self._thread = threading.Thread(target=self._executar, name='painel-escritor-logs', daemon=True)
+                self._thread.start()
+                atexit.register(self.esvaziar)
+
+    def _executar(self):
+        abertos = {}   # nome -> arquivo aberto em modo append
+        while True:
+            itens = [self._fila.get()]
+            try:
+                while len(itens) < self.lote:
+                    itens.append(self._fila.get_nowait())
+            except queue.Empty:
+                pass
+            fechados = self._gravar(itens, abertos)
+            if fechados:
+                with self._condicao:
+                    self._pendentes.difference_update(fechados)
+                    self._condicao.notify_all()
+                self._talvez_rotacionar()
+            for _ in itens:
+                self._fila.task_done()
+
+    def _gravar(self, itens, abertos):
+        textos = {}    # nome -> [pedaços], na ordem de chegada
+        fechados = []
+        for nome, texto in itens:
+            if texto is _FIM:
+                fechados.append(nome)
+            else:
+                textos.setdefault(nome, []).append(texto)
+        for nome in set(textos) | set(fechados):
+            try:
+                arquivo = abertos.get(nome)
+                if arquivo is None:
+                    arquivo = abertos[nome] = open(os.path.join(self.diretorio, nome), 'a', encoding='utf-8')
+                if nome in textos:
+                    arquivo.write(''.join(textos[nome]))
+                if nome in fechados:
+                    abertos.pop(nome).close()
+            except Exception as e:
+                self.erros += 1
+                print(f"[LOGS] Falha ao gravar '{nome}': {e}")
+                arquivo = abertos.pop(nome, None)
+                if arquivo is not None:
+                    arquivo.close()
+        return fechados
+
+    # --- Rotação ---
+
+    def _talvez_rotacionar(self):
+        agora = time.monotonic()
+        if agora - self._ultima_rotacao < self.intervalo_rotacao:
+            return
+        self._ultima_rotacao = agora
+        try:
+            self.rotacionar()
+        except Exception as e:
+            print(f"[LOGS] Falha na rotação de '{self.diretorio}': {e}")
+
+    def rotacionar(self):
+        """Comprime os relatórios antigos e apaga os que passam de 'manter_total'. Retorna (comprimidos, apagados)."""
+        with os.scandir(self.diretorio) as entradas:
+            arquivos = [(e.stat().st_mtime, e.name) for e in entradas
+                        if e.is_file() and e.name.endswith(('.txt', '.txt.gz'))]
+        arquivos.sort(reverse=True)   # Mais recentes primeiro
+        comprimidos = apagados = 0
+        for posicao, (_, nome) in enumerate(arquivos):
+            if nome in self._pendentes:
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            if posicao >= self.manter_total:
+                os.remove(caminho)
+                apagados += 1
+            elif posicao >= self.manter_texto and nome.endswith('.txt'):
+                with open(caminho, 'rb') as origem, gzip.open(caminho + '.gz', 'wb') as destino:
+                    shutil.copyfileobj(origem, destino)
+                shutil.copystat(caminho, caminho + '.gz')   # Mantém a ordem por data
+                os.remove(caminho)
+                comprimidos += 1
+        return comprimidos, apagados
@@ -0,0 +1,27 @@
+from flask import Response, current_app, stream_with_context
+
+# Tamanho mínimo de cada pedaço enviado no streaming de HTML/SVG
+TAMANHO_PEDACO = 16 * 1024
+
+
+def agrupar(partes, tamanho=TAMANHO_PEDACO):
+    """Junta os pedaços pequenos do Jinja em blocos de ~'tamanho' caracteres."""
+    buffer = []; acumulado = 0
+    for parte in partes:
+        buffer.append(parte); acumulado += len(parte)
+        if acumulado >= tamanho:
+            yield ''.join(buffer)
+            buffer = []; acumulado = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def transmitir_template(nome, mimetype='text/html', **contexto):
+    """
+    Resposta que renderiza o template aos pedaços (template.generate): o
+    documento nunca é montado inteiro na memória. Iteradores do contexto são
+    consumidos durante o envio.
+    """
+    template = current_app.jinja_env.get_template(nome)
+    current_app.update_template_context(contexto)
+    return Response(stream_with_context(agrupar(template.generate(contexto))), mimetype=mimetype)
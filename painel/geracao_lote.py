@@ -0,0 +1,226 @@
+"""
+Geração em lote fora do Flask: NPCs, hexágonos, rumores, tesouros e viagens
+gerados direto pelas funções dos blueprints, distribuídos num pool de processos
+e gravados em JSONL ou CSV (stdout ou arquivo) à medida que ficam prontos.
+
+Uso (a partir da raiz do projeto):
+    python -m painel generate npcs --count 10000 --seed 42 --workers 8 > npcs.jsonl
+    python -m painel generate hexes --count 5000 --terrain floresta --format csv --output hexes.csv
+    python -m painel generate journeys --count 200 --days 30 --night
+
+O trabalho é dividido em pedaços de tamanho fixo e cada pedaço tem a própria
+semente (derivada de --seed): com a mesma semente a saída é idêntica para
+qualquer número de workers. Os prints de erro dos geradores vão para o stderr,
+para não misturar com a saída em stdout.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from .tabelas import PROJETO_DIR, iniciar_registro
+from .pacote import NOME_PADRAO as NOME_PACOTE
+
+# Itens por pedaço enviado a um worker (também a unidade de semente)
+TAMANHO_PEDACO = 250
+
+
+# ========== GERADORES ==========
+# Cada gerador recebe o dicionário de opções (picklável) e o random.Random do
+# pedaço, e devolve um registro (dict). As importações dos blueprints ficam
+# dentro das funções: só o worker que usa um gerador paga a importação.
+
+def _escolher(rng, valor, opcoes):
+    return valor if valor else rng.choice(sorted(opcoes))
+
+
+def gerar_npcs(opcoes, rng):
+    from geracao_npcs.routes import gerar_npc
+    return gerar_npc()
+
+
+def gerar_hexes(opcoes, rng):
+    from geracao_hex.routes import generate_hex_description, get_terrains
+    return generate_hex_description(_escolher(rng, opcoes.get('terrain'), get_terrains()))
+
+
+def gerar_rumores(opcoes, rng):
+    from geracao_rumores.routes import carregar_json, gerar_rumor_por_estado
+    estados = carregar_json('estados.json') or ["Nada muito fora do habitual"]
+    if isinstance(estados, dict):
+        estados = set(estados.values())
+    return gerar_rumor_por_estado(_escolher(rng, opcoes.get('state'), estados))
+
+
+def gerar_tesouros(opcoes, rng):
+    from geracao_tesouros.routes import rolar_tesouro_nd, tabela
+    nd = _escolher(rng, opcoes.get('nd'), tabela('nds'))
+    return rolar_tesouro_nd(nd, opcoes.get('treasure_type') or 'padrao')
+
+
+def gerar_viagens(opcoes, rng):
+    from geracao_eventos.routes import carregar_json, get_bp_path, iterar_viagem
+    terrenos = carregar_json(get_bp_path('tipos_terreno.json'))
+    terreno = _escolher(rng, opcoes.get('terrain'), terrenos)
+    dias = opcoes.get('days') or 30
+    noite = bool(opcoes.get('night'))
+    encontros = [d for d in iterar_viagem(terreno, dias, noite) if d['encounter']]
+    return {'terreno': terreno, 'dias': dias, 'periodo': 'noite' if noite else 'dia',
+            'encontros': len(encontros), 'dias_com_encontro': encontros}
+
+
+GERADORES = {
+    'npcs': gerar_npcs,
+    'hexes': gerar_hexes,
+    'rumors': gerar_rumores,
+    'treasure': gerar_tesouros,
+    'journeys': gerar_viagens,
+}
+
+
+# ========== EXECUÇÃO DOS PEDAÇOS ==========
+
+def _iniciar_processo(pacote):
+    """Prepara o registro de tabelas do processo (sem revalidação: os dados não mudam durante o lote)."""
+    iniciar_registro(intervalo_revalidacao=None, carregar=False, pacote=pacote)
+
+
+def _iniciar_worker(pacote):
+    _iniciar_processo(pacote)
+    sys.stdout = sys.stderr   # prints dos geradores não podem cair na saída
+
+
+def gerar_pedaco(tarefa):
+    """
+    Gera um pedaço: (tipo, opções, semente, índice do pedaço, quantidade).
+    Os geradores usam o 'random' global, então ele é semeado por pedaço.
+    """
+    tipo, opcoes, semente, indice, quantidade = tarefa
+    gerar = GERADORES[tipo]
+    random.seed(f"{semente}:{tipo}:{indice}")
+    rng = random.Random(f"{semente}:{tipo}:{indice}:escolhas")
+    registros = []
+    for _ in range(quantidade):
+        try:
+            registros.append(gerar(opcoes, rng))
+        except Exception as e:
+            registros.append({'error': str(e)})
+    return registros
+
+
+def tarefas(tipo, opcoes, quantidade, semente, tamanho=TAMANHO_PEDACO):
+    for indice, inicio in enumerate(range(0, quantidade, tamanho)):
+        yield tipo, opcoes, semente, indice, min(tamanho, quantidade - inicio)
+
+
+def gerar_registros(tipo, quantidade, semente, workers=1, opcoes=None, pacote=None):
+    """Gera os registros em ordem, pedaço a pedaço (em paralelo quando workers > 1)."""
+    opcoes = opcoes or {}
+    lista = tarefas(tipo, opcoes, quantidade, semente)
+    if workers <= 1:
+        _iniciar_processo(pacote)
+        for pedaco in map(gerar_pedaco, lista):
+            yield from pedaco
+        return
+    with multiprocessing.Pool(workers, initializer=_iniciar_worker, initargs=(pacote,)) as pool:
+        # imap mantém a ordem dos pedaços: a saída não depende de quem terminou primeiro
+        for pedaco in pool.imap(gerar_pedaco, lista):
+            yield from pedaco
+
+
+# ========== SAÍDA ==========
+
+def _achatar(registro, prefixo=''):
+    """Dicionários aninhados viram colunas "a.b"; listas e tuplas viram JSON."""
+    saida = {}
+    for chave, valor in registro.items():
+        nome = f"{prefixo}{chave}"
+        if isinstance(valor, dict):
+            saida.update(_achatar(valor, nome + '.'))
+        elif isinstance(valor, (list, tuple)):
+            saida[nome] = json.dumps(valor, ensure_ascii=False)
+        else:
+            saida[nome] = valor
+    return saida
+
+
+def escrever_jsonl(registros, saida):
+    total = 0
+    for registro in registros:
+        saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        total += 1
+    return total
+
+
+def escrever_csv(registros, saida, amostra=TAMANHO_PEDACO):
+    """
+    CSV com colunas achatadas. O cabeçalho sai da união das colunas dos primeiros
+    'amostra' registros; colunas que só aparecem depois são descartadas (com aviso).
+    """
+    registros = iter(registros)
+    primeiros = [_achatar(r) for _, r in zip(range(amostra), registros)]
+    colunas = list(dict.fromkeys(c for r in primeiros for c in r))
+    escritor = csv.DictWriter(saida, fieldnames=colunas, extrasaction='ignore')
+    escritor.writeheader()
+    escritor.writerows(primeiros)
+    total = len(primeiros)
+    descartadas = set()
+    for registro in registros:
+        linha = _achatar(registro)
+        descartadas.update(c for c in linha if c not in escritor.fieldnames)
+        escritor.writerow(linha)
+        total += 1
+    if descartadas:
+        print(f"[LOTE] Colunas fora do cabeçalho descartadas: {', '.join(sorted(descartadas))}", file=sys.stderr)
+    return total
+
+
+# ========== LINHA DE COMANDO ==========
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m painel', description="Ferramentas do Painel do Mestre.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    gerar = comandos.add_parser('generate', help="Gera conteúdo em lote (JSONL ou CSV)")
+    gerar.add_argument('tipo', choices=sorted(GERADORES), help="O que gerar")
+    gerar.add_argument('--count', type=int, default=100, help="Quantidade de registros (padrão: 100)")
+    gerar.add_argument('--seed', type=int, default=None, help="Semente (padrão: aleatória, informada no stderr)")
+    gerar.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help="Processos do pool (padrão: número de CPUs; 1 roda no próprio processo)")
+    gerar.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl', help="Formato de saída")
+    gerar.add_argument('--output', help="Arquivo de saída (padrão: stdout)")
+    gerar.add_argument('--terrain', help="hexes/journeys: terreno fixo (padrão: sorteado por registro)")
+    gerar.add_argument('--days', type=int, default=30, help="journeys: dias de viagem (padrão: 30)")
+    gerar.add_argument('--night', action='store_true', help="journeys: viagem à noite")
+    gerar.add_argument('--nd', help="treasure: ND fixo, ex: 'nd 5' (padrão: sorteado)")
+    gerar.add_argument('--treasure-type', default='padrao', help="treasure: padrao, metade ou dobro")
+    gerar.add_argument('--state', help="rumors: estado do reino fixo (padrão: sorteado)")
+    args = parser.parse_args(argv)
+
+    if args.count < 0 or args.workers < 1:
+        parser.error("--count precisa ser >= 0 e --workers >= 1.")
+    semente = args.seed if args.seed is not None else random.SystemRandom().randrange(2 ** 32)
+    opcoes = {'terrain': args.terrain, 'days': args.days, 'night': args.night, 'nd': args.nd,
+              'treasure_type': args.treasure_type, 'state': args.state}
+    pacote = os.path.join(PROJETO_DIR, NOME_PACOTE)
+    workers = min(args.workers, max(1, -(-args.count // TAMANHO_PEDACO)))
+
+    escrever = escrever_csv if args.format == 'csv' else escrever_jsonl
+    inicio = time.perf_counter()
+    with contextlib.ExitStack() as pilha:
+        if args.output:
+            saida = pilha.enter_context(open(args.output, 'w', encoding='utf-8', newline=''))
+        else:
+            saida = sys.stdout
+        # No modo sem pool os geradores rodam aqui: seus prints vão para o stderr
+        pilha.enter_context(contextlib.redirect_stdout(sys.stderr))
+        total = escrever(gerar_registros(args.tipo, args.count, semente, workers, opcoes, pacote), saida)
+        saida.flush()
+    segundos = time.perf_counter() - inicio
+    print(f"[LOTE] {total} registros de '{args.tipo}' em {segundos:.2f} s "
+          f"(semente {semente}, {workers} worker(s))", file=sys.stderr)
+    return 0
@@ -0,0 +1,84 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# ========== RELATÓRIO DE INICIALIZAÇÃO ==========
+
+class RelatorioInicio:
+    """Cronometra as fases da inicialização do app (usado por --startup-report)."""
+
+    def __init__(self):
+        self.fases = []          # [(nome, segundos)]
+        self._inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def fase(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.fases.append((nome, time.perf_counter() - inicio))
+
+    def total(self):
+        return time.perf_counter() - self._inicio
+
+    def imprimir(self, titulo="Relatório de inicialização"):
+        print(f"=== {titulo} ===")
+        with self._lock:
+            fases = list(self.fases)
+        for nome, segundos in fases:
+            print(f"  {nome:<45} {segundos * 1000:9.1f} ms")
+        print(f"  {'TOTAL (desde o início do relatório)':<45} {self.total() * 1000:9.1f} ms")
+
+
+class _SemRelatorio:
+    """Relatório nulo: mesma interface, sem custo."""
+
+    @contextmanager
+    def fase(self, nome):
+        yield
+
+
+SEM_RELATORIO = _SemRelatorio()
+
+
+# ========== AQUECIMENTO EM SEGUNDO PLANO ==========
+
+class Aquecimento:
+    """
+    Executa tarefas de aquecimento (carga de tabelas, pastas de dados...) numa
+    thread daemon, depois que o app já está pronto para responder.
+    Quem precisar do resultado antes pode chamar aguardar().
+    """
+
+    def __init__(self, tarefas, relatorio=SEM_RELATORIO):
+        self.tarefas = list(tarefas)   # [(nome, funcao)]
+        self.relatorio = relatorio
+        self.concluido = threading.Event()
+        self.erros = {}
+        self._thread = None
+
+    def _executar(self):
+        try:
+            for nome, funcao in self.tarefas:
+                try:
+                    with self.relatorio.fase(f"aquecimento: {nome}"):
+                        funcao()
+                except Exception as e:
+                    self.erros[nome] = repr(e)
+                    print(f"[AQUECIMENTO] Falha em '{nome}': {e}")
+        finally:
+            self.concluido.set()
+
+    def iniciar(self, em_segundo_plano=True):
+        if not em_segundo_plano:
+            self._executar()
+            return self
+        self._thread = threading.Thread(target=self._executar, name='painel-aquecimento', daemon=True)
+        self._thread.start()
+        return self
+
+    def aguardar(self, timeout=None):
+        return self.concluido.wait(timeout)
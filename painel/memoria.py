@@ -0,0 +1,191 @@
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+import types
+
+from flask import jsonify, request
+
+from .tabelas import PROJETO_DIR, RAIZES_PADRAO, obter_registro
+
+# Tipos que não são "dados residentes" (código, módulos, classes)
+_IGNORAR_TIPOS = (types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                  types.MethodType, type, threading.Lock().__class__)
+
+_CONTEINERES = (dict, list, tuple, set, frozenset, str, bytes, int, float, bool)
+
+# Só objetos de classes do próprio projeto são percorridos por dentro; Blueprints,
+# proxies do Flask e afins alcançariam o app inteiro
+_PACOTES_PROJETO = frozenset(['painel'] + RAIZES_PADRAO)
+
+
+def _do_projeto(obj):
+    return type(obj).__module__.split('.')[0] in _PACOTES_PROJETO
+
+
+# ========== TAMANHO PROFUNDO ==========
+
+def tamanho_profundo(objeto, vistos=None):
+    """
+    Soma de sys.getsizeof do objeto e de tudo o que ele alcança (dicts, listas,
+    tuplas, conjuntos, __dict__ e __slots__). 'vistos' ({id: objeto}) evita contar
+    duas vezes objetos compartilhados; passe o mesmo dicionário para medir grupos
+    sem sobreposição. Ele mantém os objetos vivos para que um id não seja reaproveitado.
+    """
+    vistos = {} if vistos is None else vistos
+    total = 0
+    pilha = [objeto]
+    while pilha:
+        obj = pilha.pop()
+        if id(obj) in vistos or isinstance(obj, _IGNORAR_TIPOS):
+            continue
+        vistos[id(obj)] = obj
+        total += sys.getsizeof(obj, 0)
+        if isinstance(obj, dict):
+            pilha.extend(obj.keys())
+            pilha.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pilha.extend(obj)
+        elif isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+            continue
+        elif _do_projeto(obj):
+            if hasattr(obj, '__dict__'):
+                pilha.append(vars(obj))
+            for classe in type(obj).__mro__:
+                for slot in getattr(classe, '__slots__', ()):
+                    if slot not in ('__weakref__', '__dict__') and hasattr(obj, slot):
+                        pilha.append(getattr(obj, slot))
+    return total
+
+
+def _estado_modulo(modulo):
+    """Globais de dados de um módulo (contêineres e objetos do projeto; sem código nem dunders)."""
+    return {nome: valor for nome, valor in vars(modulo).items()
+            if not nome.startswith('__') and (issubclass(type(valor), _CONTEINERES) or _do_projeto(valor))}
+
+
+def _caches_lru(modulo):
+    """cache_info() de cada função com lru_cache do módulo."""
+    saida = {}
+    for nome, valor in vars(modulo).items():
+        if callable(valor) and hasattr(valor, 'cache_info') and getattr(valor, '__module__', None) == modulo.__name__:
+            info = valor.cache_info()
+            saida[nome] = {'itens': info.currsize, 'maximo': info.maxsize, 'acertos': info.hits, 'falhas': info.misses}
+    return saida
+
+
+# ========== RELATÓRIO POR BLUEPRINT ==========
+
+def relatorio_memoria():
+    """
+    Memória residente por blueprint: tabelas do registro que pertencem a ele,
+    estado global do módulo routes e caches lru_cache. Objetos compartilhados
+    são contados só no primeiro grupo que os alcança.
+    """
+    gc.collect()
+    registro = obter_registro()
+    tabelas = registro.tabelas_carregadas()
+    vistos = {}
+    blueprints = {}
+
+    for pasta in RAIZES_PADRAO:
+        raiz = os.path.join(PROJETO_DIR, pasta) + os.sep
+        do_blueprint = {c: d for c, d in tabelas.items() if c.startswith(raiz)}
+        maiores = sorted(((os.path.relpath(c, PROJETO_DIR), tamanho_profundo(d)) for c, d in do_blueprint.items()),
+                         key=lambda x: x[1], reverse=True)[:10]
+        bytes_tabelas = tamanho_profundo(list(do_blueprint.values()), vistos)
+
+        modulo = sys.modules.get(f"{pasta}.routes")
+        estado = {}
+        caches = {}
+        if modulo is not None:
+            for nome, valor in _estado_modulo(modulo).items():
+                estado[nome] = tamanho_profundo(valor, vistos)
+            caches = _caches_lru(modulo)
+        blueprints[pasta] = {
+            'tabelas': len(do_blueprint),
+            'tabelas_bytes': bytes_tabelas,
+            'maiores_tabelas': [{'arquivo': a, 'bytes': b} for a, b in maiores],
+            'estado_modulo_bytes': sum(estado.values()),
+            'estado_modulo': dict(sorted(estado.items(), key=lambda x: x[1], reverse=True)),
+            'caches_lru': caches,
+        }
+
+    from . import rolagem, sorteio
+    compartilhado = {
+        'tabelas_compiladas': {'itens': len(sorteio._CACHE),
+                               'bytes': tamanho_profundo([e[1] for e in list(sorteio._CACHE.values())], vistos)},
+        'expressoes_dados': {'compilar': rolagem.compilar.cache_info()._asdict(),
+                             'compilar_prefixo': rolagem.compilar_prefixo.cache_info()._asdict()},
+        'pacote_dados_mapeado_bytes': os.path.getsize(registro.pacote.caminho) if registro.pacote else 0,
+    }
+    return {
+        'pid': os.getpid(),
+        'tabelas_carregadas': len(tabelas),
+        'total_bytes': sum(b['tabelas_bytes'] + b['estado_modulo_bytes'] for b in blueprints.values())
+                       + compartilhado['tabelas_compiladas']['bytes'],
+        'blueprints': blueprints,
+        'compartilhado': compartilhado,
+        'tracemalloc': tracemalloc.is_tracing(),
+    }
+
+
+# ========== SNAPSHOTS (tracemalloc) ==========
+
+class Snapshots:
+    """Guarda o último snapshot do tracemalloc para comparar com o próximo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.anterior = None
+
+    def comparar(self, limite=25, agrupar='lineno'):
+        """Tira um snapshot e compara com o anterior (o primeiro só vira referência)."""
+        if not tracemalloc.is_tracing():
+            return None
+        gc.collect()
+        atual = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+        with self._lock:
+            anterior, self.anterior = self.anterior, atual
+        atual_bytes, pico = tracemalloc.get_traced_memory()
+        saida = {'rastreado_bytes': atual_bytes, 'pico_bytes': pico, 'diferencas': []}
+        if anterior is None:
+            saida['aviso'] = "Primeiro snapshot guardado; chame de novo para ver a diferença."
+            return saida
+        diferencas = atual.compare_to(anterior, agrupar)
+        saida['crescimento_bytes'] = sum(d.size_diff for d in diferencas)
+        saida['diferencas'] = [{
+            'local': str(d.traceback[0]) if d.traceback else '?',
+            'diferenca_bytes': d.size_diff, 'total_bytes': d.size,
+            'diferenca_blocos': d.count_diff,
+        } for d in diferencas[:limite] if d.size_diff]
+        return saida
+
+
+# ========== INTEGRAÇÃO COM O FLASK ==========
+
+def instalar_memoria(app):
+    """
+    Registra /debug/memory (só quando DEBUG_MEMORIA=True). Com MEMORIA_TRACEMALLOC
+    o tracemalloc é ligado já na criação do app e ?diff=1 compara o heap com o
+    snapshot da chamada anterior (útil entre requisições para achar vazamentos).
+    """
+    if app.config.get('MEMORIA_TRACEMALLOC') and not tracemalloc.is_tracing():
+        tracemalloc.start(app.config.get('MEMORIA_TRACEMALLOC_QUADROS', 1))
+    snapshots = Snapshots()
+    app.extensions['memoria'] = snapshots
+
+    @app.route('/debug/memory')
+    def debug_memory():
+        """Memória por blueprint; ?diff=1 inclui a diferença desde o último snapshot."""
+        saida = relatorio_memoria()
+        if request.args.get('diff'):
+            diff = snapshots.comparar(int(request.args.get('limite', 25)),
+                                      'filename' if request.args.get('agrupar') == 'arquivo' else 'lineno')
+            saida['snapshot'] = diff if diff is not None else {
+                'aviso': "tracemalloc desligado: use MEMORIA_TRACEMALLOC=True (ou PAINEL_TRACEMALLOC=1)."}
+        return jsonify(saida)
@@ -0,0 +1,175 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+# Limites dos baldes do histograma de latência (segundos), estilo Prometheus
+BALDES_LATENCIA = (
+    0.0005, 0.001, 0.0025, 0.005, 0.0075, 0.01, 0.025, 0.05, 0.075, 0.1,
+    0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0, 30.0
+)
+
+QUANTIS = (0.5, 0.95, 0.99)
+
+# Requisições que não casaram com nenhuma rota (404) ficam todas sob o mesmo rótulo
+ROTA_DESCONHECIDA = 'sem_rota'
+
+
+# ========== HISTOGRAMA ==========
+
+class Histograma:
+    """Histograma de baldes fixos: memória constante por rota, quantis estimados por interpolação."""
+    __slots__ = ('contagens', 'quantidade', 'soma', 'maximo')
+
+    def __init__(self):
+        self.contagens = [0] * (len(BALDES_LATENCIA) + 1)  # último = +Inf
+        self.quantidade = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(BALDES_LATENCIA, valor)] += 1
+        self.quantidade += 1
+        self.soma += valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def quantil(self, q):
+        """Estimativa do quantil q (0..1) interpolando linearmente dentro do balde."""
+        if not self.quantidade:
+            return 0.0
+        alvo = q * self.quantidade
+        acumulado = 0
+        for i, c in enumerate(self.contagens):
+            if c and acumulado + c >= alvo:
+                inferior = BALDES_LATENCIA[i - 1] if i > 0 else 0.0
+                superior = BALDES_LATENCIA[i] if i < len(BALDES_LATENCIA) else self.maximo
+                superior = min(superior, self.maximo)
+                return inferior + (superior - inferior) * ((alvo - acumulado) / c)
+            acumulado += c
+        return self.maximo
+
+
+# ========== REGISTRO DE MÉTRICAS ==========
+
+class MetricasRotas:
+    """Contadores e histogramas de latência por (rota, método)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requisicoes = {}   # (rota, metodo, status) -> contagem
+        self._erros = {}         # (rota, metodo) -> contagem
+        self._latencias = {}     # (rota, metodo) -> Histograma
+        self.inicio = time.time()
+
+    def registrar(self, rota, metodo, status, duracao, erro=False):
+        with self._lock:
+            chave = (rota, metodo)
+            self._requisicoes[(rota, metodo, status)] = self._requisicoes.get((rota, metodo, status), 0) + 1
+            if erro:
+                self._erros[chave] = self._erros.get(chave, 0) + 1
+            hist = self._latencias.get(chave)
+            if hist is None:
+                hist = self._latencias[chave] = Histograma()
+            hist.observar(duracao)
+
+    def resumo(self):
+        """Visão em dicionário (rota -> contagem, erros, p50/p95/p99 em ms)."""
+        with self._lock:
+            saida = {}
+            for (rota, metodo), hist in sorted(self._latencias.items()):
+                saida[f"{metodo} {rota}"] = {
+                    'requisicoes': hist.quantidade,
+                    'erros': self._erros.get((rota, metodo), 0),
+                    **{f"p{int(q * 100)}_ms": round(hist.quantil(q) * 1000, 3) for q in QUANTIS},
+                }
+            return saida
+
+    def exportar_prometheus(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        linhas = []
+        with self._lock:
+            linhas += ["# HELP painel_requisicoes_total Requisições atendidas por rota, método e status.",
+                       "# TYPE painel_requisicoes_total counter"]
+            for (rota, metodo, status), n in sorted(self._requisicoes.items()):
+                linhas.append(f'painel_requisicoes_total{{rota="{_escapar(rota)}",metodo="{metodo}",status="{status}"}} {n}')
+
+            linhas += ["# HELP painel_erros_total Requisições com erro (exceção ou status 5xx) por rota.",
+                       "# TYPE painel_erros_total counter"]
+            for (rota, metodo) in sorted(self._latencias):
+                n = self._erros.get((rota, metodo), 0)
+                linhas.append(f'painel_erros_total{{rota="{_escapar(rota)}",metodo="{metodo}"}} {n}')
+
+            linhas += ["# HELP painel_latencia_segundos Latência das requisições por rota.",
+                       "# TYPE painel_latencia_segundos histogram"]
+            for (rota, metodo), hist in sorted(self._latencias.items()):
+                rotulos = f'rota="{_escapar(rota)}",metodo="{metodo}"'
+                acumulado = 0
+                for limite, c in zip(BALDES_LATENCIA, hist.contagens):
+                    acumulado += c
+                    linhas.append(f'painel_latencia_segundos_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+                linhas.append(f'painel_latencia_segundos_bucket{{{rotulos},le="+Inf"}} {hist.quantidade}')
+                linhas.append(f'painel_latencia_segundos_sum{{{rotulos}}} {hist.soma:.6f}')
+                linhas.append(f'painel_latencia_segundos_count{{{rotulos}}} {hist.quantidade}')
+
+            linhas += ["# HELP painel_latencia_quantil_segundos Quantis estimados (p50/p95/p99) da latência por rota.",
+                       "# TYPE painel_latencia_quantil_segundos gauge"]
+            for (rota, metodo), hist in sorted(self._latencias.items()):
+                for q in QUANTIS:
+                    linhas.append(f'painel_latencia_quantil_segundos{{rota="{_escapar(rota)}",metodo="{metodo}",'
+                                  f'quantil="{q}"}} {hist.quantil(q):.6f}')
+
+        linhas += ["# HELP painel_inicio_segundos Momento (epoch) em que o app começou a coletar métricas.",
+                   "# TYPE painel_inicio_segundos gauge",
+                   f"painel_inicio_segundos {self.inicio:.3f}"]
+        return "\n".join(linhas) + "\n"
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# ========== INTEGRAÇÃO COM O FLASK ==========
+
+def instalar_metricas(app, caminho='/metrics'):
+    """Instrumenta todas as rotas do app e expõe as métricas em 'caminho'."""
+    metricas = MetricasRotas()
+    app.extensions['metricas'] = metricas
+
+    @app.before_request
+    def _iniciar_cronometro():
+        g._metricas_inicio = time.perf_counter()
+
+    @app.after_request
+    def _registrar_resposta(response):
+        inicio = g.pop('_metricas_inicio', None)
+        if inicio is None:
+            return response
+        rota = request.url_rule.rule if request.url_rule is not None else ROTA_DESCONHECIDA
+        metodo, status = request.method, response.status_code
+
+        def _registrar():
+            metricas.registrar(rota, metodo, status, time.perf_counter() - inicio, erro=status >= 500)
+
+        if response.is_streamed:
+            # O corpo ainda vai ser gerado: a latência conta até o fim do envio
+            response.call_on_close(_registrar)
+        else:
+            _registrar()
+        return response
+
+    @app.teardown_request
+    def _registrar_excecao(exc):
+        # Só chega aqui com o cronômetro ainda ativo se a resposta não passou pelo after_request
+        inicio = g.pop('_metricas_inicio', None)
+        if inicio is not None and exc is not None:
+            rota = request.url_rule.rule if request.url_rule is not None else ROTA_DESCONHECIDA
+            metricas.registrar(rota, request.method, 500, time.perf_counter() - inicio, erro=True)
+
+    @app.route(caminho)
+    def metricas_prometheus():
+        """Métricas por rota no formato texto do Prometheus."""
+        return Response(metricas.exportar_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    return metricas
@@ -0,0 +1,22 @@
+import threading
+
+# NumPy é opcional e caro de importar (~0,1 s): só é carregado quando algum
+# caminho vetorizado realmente precisa dele, não na inicialização do app.
+_numpy = None
+_numpy_tentado = False
+_lock = threading.Lock()
+
+
+def numpy_opcional():
+    """Módulo numpy importado sob demanda, ou None se não estiver instalado."""
+    global _numpy, _numpy_tentado
+    if not _numpy_tentado:
+        with _lock:
+            if not _numpy_tentado:
+                try:
+                    import numpy
+                    _numpy = numpy
+                except ImportError:
+                    _numpy = None
+                _numpy_tentado = True
+    return _numpy
@@ -0,0 +1,180 @@
+"""
+Pacote de dados: todas as tabelas JSON dos blueprints num único arquivo indexado.
+
+Construção (valida cada tabela antes de gravar):
+    python -m painel.pacote                  # grava dados.pack na raiz do projeto
+    python -m painel.pacote --saida outro.pack
+
+O servidor abre o pacote com mmap (páginas compartilhadas entre workers) e só
+decodifica uma tabela quando ela é pedida pela primeira vez.
+
+Formato:
+    cabeçalho  MAGICO (8 bytes) | versão (u32) | deslocamento do índice (u64) | tamanho do índice (u64)
+    corpo      tabelas em JSON compacto (UTF-8), uma após a outra
+    índice     JSON {"caminho/relativo.json": [deslocamento, tamanho, mtime_ns]}
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+
+MAGICO = b'PAINELPK'
+VERSAO = 1
+_CABECALHO = struct.Struct('<8sIQQ')
+
+NOME_PADRAO = 'dados.pack'
+
+
+# ========== LEITURA (mmap) ==========
+
+class PacoteDados:
+    """Pacote aberto com mmap; as tabelas são decodificadas sob demanda."""
+
+    def __init__(self, caminho, base):
+        self.caminho = os.path.abspath(caminho)
+        self.base = os.path.abspath(base)
+        self._arquivo = open(self.caminho, 'rb')
+        try:
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Arquivo vazio
+            self._arquivo.close()
+            raise ValueError(f"Pacote de dados vazio: '{caminho}'")
+        magico, versao, inicio_indice, tamanho_indice = _CABECALHO.unpack_from(self._mapa, 0)
+        if magico != MAGICO or versao != VERSAO:
+            self.fechar()
+            raise ValueError(f"'{caminho}' não é um pacote de dados v{VERSAO} válido.")
+        indice = json.loads(self._mapa[inicio_indice:inicio_indice + tamanho_indice])
+        self.indice = {os.path.join(self.base, *relativo.split('/')): tuple(v) for relativo, v in indice.items()}
+
+    def __contains__(self, caminho):
+        return caminho in self.indice
+
+    def __len__(self):
+        return len(self.indice)
+
+    def caminhos(self):
+        return self.indice.keys()
+
+    def mtime(self, caminho):
+        return self.indice[caminho][2]
+
+    def ler(self, caminho):
+        """Decodifica a tabela de 'caminho' (absoluto). KeyError se não estiver no pacote."""
+        deslocamento, tamanho, _ = self.indice[caminho]
+        return json.loads(self._mapa[deslocamento:deslocamento + tamanho])
+
+    def fechar(self):
+        self._mapa.close()
+        self._arquivo.close()
+
+
+# ========== VALIDAÇÃO ==========
+
+_FAIXA = re.compile(r'^\s*(\d+)\s*-\s*(\d+)\s*$')
+
+
+def validar_tabela(dados):
+    """
+    Problemas estruturais de uma tabela (lista vazia = válida): números não
+    finitos (NaN/Infinity, que o json do Python aceita) e faixas "10-5" invertidas.
+    """
+    problemas = []
+
+    def _visitar(valor, onde):
+        if isinstance(valor, float) and (math.isnan(valor) or math.isinf(valor)):
+            problemas.append(f"{onde}: número inválido {valor}")
+        elif isinstance(valor, dict):
+            for chave, v in valor.items():
+                faixa = _FAIXA.match(chave)
+                if faixa and int(faixa.group(1)) > int(faixa.group(2)):
+                    problemas.append(f"{onde}: faixa invertida '{chave}'")
+                _visitar(v, f"{onde}/{chave}")
+        elif isinstance(valor, list):
+            for i, v in enumerate(valor):
+                _visitar(v, f"{onde}[{i}]")
+
+    _visitar(dados, '')
+    return problemas
+
+
+# ========== CONSTRUÇÃO ==========
+
+def _arquivos_json(raizes, ignorar):
+    for raiz in raizes:
+        for pasta, subpastas, arquivos in os.walk(raiz):
+            subpastas[:] = sorted(d for d in subpastas if not d.startswith(('.', '__'))
+                                  and os.path.join(pasta, d) not in ignorar)
+            for nome in sorted(arquivos):
+                if nome.endswith('.json'):
+                    yield os.path.join(pasta, nome)
+
+
+def construir_pacote(saida, base, raizes, ignorar=()):
+    """
+    Valida e grava todas as tabelas das 'raizes' em 'saida'.
+    Retorna (quantidade de tabelas, {caminho relativo: [problemas]}); com
+    problemas o pacote não é gravado.
+    """
+    base = os.path.abspath(base)
+    ignorar = {os.path.abspath(p) for p in ignorar}
+    corpo = bytearray()
+    indice = {}
+    erros = {}
+    for caminho in _arquivos_json([os.path.abspath(r) for r in raizes], ignorar):
+        relativo = os.path.relpath(caminho, base).replace(os.sep, '/')
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            erros[relativo] = [str(e)]
+            continue
+        problemas = validar_tabela(dados)
+        if problemas:
+            erros[relativo] = problemas
+            continue
+        bruto = json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        indice[relativo] = [_CABECALHO.size + len(corpo), len(bruto), os.stat(caminho).st_mtime_ns]
+        corpo += bruto
+
+    if erros:
+        return len(indice), erros
+
+    bruto_indice = json.dumps(indice, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    inicio_indice = _CABECALHO.size + len(corpo)
+    temporario = saida + '.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(_CABECALHO.pack(MAGICO, VERSAO, inicio_indice, len(bruto_indice)))
+        f.write(corpo)
+        f.write(bruto_indice)
+    os.replace(temporario, saida)  # Workers que já abriram o pacote antigo continuam com ele
+    return len(indice), {}
+
+
+def main(argv=None):
+    from painel.tabelas import PROJETO_DIR, RAIZES_PADRAO, IGNORAR_PADRAO
+
+    parser = argparse.ArgumentParser(description="Constrói o pacote de dados com todas as tabelas JSON.")
+    parser.add_argument('--saida', default=os.path.join(PROJETO_DIR, NOME_PADRAO),
+                        help=f"Arquivo de saída (padrão: {NOME_PADRAO} na raiz do projeto)")
+    args = parser.parse_args(argv)
+
+    total, erros = construir_pacote(
+        args.saida, PROJETO_DIR,
+        [os.path.join(PROJETO_DIR, r) for r in RAIZES_PADRAO],
+        [os.path.join(PROJETO_DIR, p) for p in IGNORAR_PADRAO])
+    if erros:
+        print(f"ERRO: {len(erros)} tabela(s) inválida(s); pacote não gravado.")
+        for relativo, problemas in sorted(erros.items()):
+            for problema in problemas:
+                print(f"  {relativo}: {problema}")
+        return 1
+    print(f"Pacote '{args.saida}' gravado com {total} tabelas ({os.path.getsize(args.saida) / 1024:.1f} KiB).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
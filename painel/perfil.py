@@ -0,0 +1,211 @@
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from urllib.parse import parse_qsl
+
+from flask import Response, abort, jsonify, request
+from werkzeug.exceptions import HTTPException
+
+from .tabelas import PROJETO_DIR
+
+ORDENS = ('cumulative', 'tottime', 'ncalls')
+
+# Só um perfil por vez: cProfile não aceita dois perfis ativos e o resultado ficaria misturado
+_perfil_lock = threading.Lock()
+
+
+# ========== PILHAS COLAPSADAS ==========
+
+def _rotulo(funcao):
+    """'arquivo.py:funcao' (relativo ao projeto quando possível), sem ';' para não quebrar as pilhas."""
+    arquivo, linha, nome = funcao
+    if arquivo == '~':  # Funções embutidas: "<built-in method ...>"
+        return nome.replace(';', ',')
+    if arquivo.startswith(PROJETO_DIR + os.sep):
+        arquivo = os.path.relpath(arquivo, PROJETO_DIR)
+    else:
+        arquivo = os.path.basename(arquivo)
+    return f"{arquivo}:{nome}".replace(';', ',')
+
+
+def pilhas_colapsadas(estatisticas, profundidade_maxima=64, minimo_us=1):
+    """
+    Converte as estatísticas do cProfile em pilhas colapsadas ("a;b;c micros"),
+    o formato lido por flamegraph.pl, speedscope e afins.
+
+    O cProfile só guarda pares chamador -> chamado, então o tempo de cada função
+    é repartido entre os caminhos na proporção das arestas: as pilhas são uma
+    aproximação fiel para árvores (o caso dos geradores) e aproximada quando
+    uma função é chamada de vários lugares com custos diferentes.
+    """
+    dados = estatisticas.stats  # funcao -> (cc, nc, tt, ct, chamadores)
+    chamados = {}
+    for funcao, (_, _, _, _, chamadores) in dados.items():
+        for chamador, aresta in chamadores.items():
+            chamados.setdefault(chamador, []).append((funcao, aresta[3]))
+
+    linhas = {}
+
+    def _descer(funcao, orcamento, caminho):
+        _, _, tt, ct, _ = dados[funcao]
+        pilha = caminho + (_rotulo(funcao),)
+        escala = orcamento / ct if ct > 0 else 0.0
+        proprio = tt * escala
+        if proprio * 1e6 >= minimo_us:
+            chave = ';'.join(pilha)
+            linhas[chave] = linhas.get(chave, 0.0) + proprio
+        if len(pilha) >= profundidade_maxima:
+            return
+        for filho, ct_aresta in chamados.get(funcao, ()):
+            if filho in visitando:
+                continue  # Recursão: o tempo já está contado no nível de cima
+            orcamento_filho = ct_aresta * escala
+            if orcamento_filho * 1e6 < minimo_us:
+                continue
+            visitando.add(filho)
+            _descer(filho, orcamento_filho, pilha)
+            visitando.discard(filho)
+
+    # Raízes: as views (sem chamador perfilado), exceto o próprio Profiler.disable()
+    raizes = [f for f, (_, _, _, _, chamadores) in dados.items()
+              if not chamadores and '_lsprof' not in f[2]]
+    for raiz in raizes:
+        visitando = {raiz}
+        _descer(raiz, dados[raiz][3], ())
+
+    return "\n".join(f"{pilha} {int(round(segundos * 1e6))}"
+                     for pilha, segundos in sorted(linhas.items()) if segundos * 1e6 >= minimo_us)
+
+
+# ========== EXECUÇÃO ==========
+
+def resolver_rota(app, rota, metodo='GET'):
+    """(view, argumentos) da rota. Levanta NotFound/MethodNotAllowed do werkzeug."""
+    endpoint, argumentos = app.url_map.bind('localhost').match(rota, method=metodo)
+    return app.view_functions[endpoint], argumentos
+
+
+def _consumir(resposta):
+    """Consome o corpo da resposta (gera os pedaços de views em streaming) e a fecha."""
+    if resposta.is_streamed:
+        for _pedaco in resposta.response:
+            pass
+    resposta.close()
+
+
+def perfilar_rota(app, rota, n, metodo='GET', corpo_json=None, formulario=None, seed=None):
+    """
+    Executa a view de 'rota' n vezes sob cProfile (sem passar pelos hooks de
+    métricas/auditoria). Respostas em streaming são consumidas dentro do perfil,
+    para que o trabalho feito durante o envio apareça. Retorna (pstats.Stats,
+    segundos totais); exceções da view (inclusive abort) são propagadas.
+
+    Chamar com _perfil_lock adquirido. Efeito colateral de 'seed': o 'random'
+    global do processo é semeado, e requisições concorrentes compartilham esse
+    gerador; o estado anterior é restaurado ao final, mas sorteios de outras
+    requisições durante o perfil alteram a sequência (e vice-versa).
+    """
+    view, argumentos = resolver_rota(app, rota, metodo)
+
+    estado_random = random.getstate() if seed is not None else None
+    if seed is not None:
+        random.seed(seed)
+    perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+    try:
+        for _ in range(n):
+            with app.test_request_context(rota, method=metodo, json=corpo_json, data=formulario):
+                perfil.enable()
+                try:
+                    _consumir(app.make_response(view(**argumentos)))
+                finally:
+                    perfil.disable()
+    finally:
+        if estado_random is not None:
+            random.setstate(estado_random)
+    return pstats.Stats(perfil), time.perf_counter() - inicio
+
+
+# ========== INTEGRAÇÃO COM O FLASK ==========
+
+def _autorizado(app):
+    token = app.config.get('PERFIL_TOKEN')
+    if not token:
+        return True
+    enviado = request.headers.get('X-Painel-Token') or request.args.get('token', '')
+    return hmac.compare_digest(enviado, token)
+
+
+def instalar_perfil(app):
+    """
+    Registra /debug/profile (só quando DEBUG_PERFIL=True; com PERFIL_TOKEN definido,
+    exige o token no cabeçalho X-Painel-Token ou em ?token=).
+
+    Parâmetros: route, n, metodo (GET/POST), json (corpo JSON), form (corpo
+    urlencoded), seed, ordem (cumulative/tottime/ncalls), limite (linhas da tabela)
+    e formato: json (padrão), tabela ou pilhas (texto puro para flamegraph).
+    """
+
+    @app.route('/debug/profile')
+    def debug_profile():
+        if not _autorizado(app):
+            abort(403)
+        rota = request.args.get('route')
+        if not rota:
+            return jsonify({'error': "Informe a rota: /debug/profile?route=/npcs/gerar_npc&n=500"}), 400
+        try:
+            n = int(request.args.get('n', 100))
+            limite = int(request.args.get('limite', 40))
+            seed = int(request.args['seed']) if 'seed' in request.args else None
+            corpo_json = json.loads(request.args['json']) if 'json' in request.args else None
+        except ValueError as e:
+            return jsonify({'error': f"Parâmetro inválido: {e}"}), 400
+        n = max(1, min(n, app.config['PERFIL_MAX_N']))
+        metodo = request.args.get('metodo', 'GET').upper()
+        ordem = request.args.get('ordem', 'cumulative')
+        if ordem not in ORDENS:
+            return jsonify({'error': f"Ordem inválida: use {', '.join(ORDENS)}"}), 400
+
+        if not _perfil_lock.acquire(blocking=False):
+            return jsonify({'error': "Já existe um perfil em execução."}), 409
+        try:
+            resolver_rota(app, rota, metodo)
+        except HTTPException as e:  # Rota inexistente ou método não permitido
+            _perfil_lock.release()
+            return jsonify({'error': f"Rota '{rota}' ({metodo}): {e.description}"}), 404
+        try:
+            formulario = dict(parse_qsl(request.args['form'])) if 'form' in request.args else None
+            estatisticas, segundos = perfilar_rota(app, rota, n, metodo, corpo_json, formulario, seed)
+        except HTTPException as e:  # abort() dentro da view
+            return jsonify({'error': f"A view de '{rota}' respondeu {e.code}: {e.description}"}), 422
+        except Exception as e:
+            print(f"[PERFIL] Exceção ao perfilar '{rota}': {e!r}")
+            return jsonify({'error': f"Exceção na view de '{rota}': {e!r}"}), 422
+        finally:
+            _perfil_lock.release()
+
+        saida = io.StringIO()
+        estatisticas.stream = saida
+        estatisticas.sort_stats(ordem).print_stats(limite)
+        tabela = saida.getvalue()
+        pilhas = pilhas_colapsadas(estatisticas)
+
+        formato = request.args.get('formato', 'json')
+        if formato == 'pilhas':
+            return Response(pilhas + "\n", mimetype='text/plain')
+        if formato == 'tabela':
+            return Response(tabela, mimetype='text/plain')
+        return jsonify({
+            'rota': rota, 'metodo': metodo, 'n': n, 'seed': seed,
+            'segundos_total': round(segundos, 4),
+            'ms_por_execucao': round(segundos / n * 1000, 3),
+            'ordem': ordem,
+            'estatisticas': tabela,
+            'pilhas_colapsadas': pilhas,
+        })
@@ -0,0 +1,267 @@
+import random
+import re
+from fractions import Fraction
+from functools import lru_cache
+
+from .opcional import numpy_opcional
+
+# A partir de quantos dados numa única parada a rolagem vai para o NumPy
+LIMIAR_LOTE = 32
+
+# Notação de dados dentro de textos livres (ex: "2d4 bandidos", "1d4-1 Sucuri")
+PADRAO_DADOS_TEXTO = re.compile(r'(\d+)d(\d+)(([+-])(\d+))?')
+
+_TOKENS = re.compile(r'\s*(?:(\d*)[dD](\d+)|(\d+)|([+\-xX*]))')
+
+
+# ========== NÓS DA ÁRVORE (AST) ==========
+
+class Constante:
+    __slots__ = ('valor',)
+
+    def __init__(self, valor):
+        self.valor = valor
+
+    def rolar(self, rng, parciais=None):
+        return self.valor
+
+    def rolar_lote(self, n, gerador):
+        np = numpy_opcional()
+        return np.full(n, self.valor, dtype=np.int64)
+
+    def pmf(self):
+        return {self.valor: Fraction(1)}
+
+    def descrever(self, parciais):
+        return str(self.valor)
+
+    def __str__(self):
+        return str(self.valor)
+
+
+class Dados:
+    __slots__ = ('quantidade', 'faces')
+
+    def __init__(self, quantidade, faces):
+        if faces < 1:
+            raise ValueError(f"Dado inválido: d{faces}")
+        self.quantidade = quantidade
+        self.faces = faces
+
+    def rolar(self, rng, parciais=None):
+        q, f = self.quantidade, self.faces
+        if q >= LIMIAR_LOTE:
+            np = numpy_opcional()
+            if np is not None:
+                total = int(np.random.default_rng(rng.getrandbits(64)).integers(1, f + 1, size=q).sum())
+            else:  # Sem NumPy as paradas grandes usam random.choices
+                total = sum(rng.choices(range(1, f + 1), k=q))
+        else:
+            total = sum(rng.randint(1, f) for _ in range(q))
+        if parciais is not None:
+            parciais.append(total)
+        return total
+
+    def rolar_lote(self, n, gerador):
+        # Em blocos para não alocar n x quantidade de uma vez em paradas enormes
+        np = numpy_opcional()
+        total = np.zeros(n, dtype=np.int64)
+        bloco = max(1, 4_000_000 // max(1, n))
+        restantes = self.quantidade
+        while restantes > 0:
+            k = min(bloco, restantes)
+            total += gerador.integers(1, self.faces + 1, size=(n, k)).sum(axis=1)
+            restantes -= k
+        return total
+
+    def pmf(self):
+        contagens = _contagens_dados(self.quantidade, self.faces)
+        total = self.faces ** self.quantidade
+        return {self.quantidade + i: Fraction(c, total) for i, c in enumerate(contagens) if c}
+
+    def descrever(self, parciais):
+        return str(parciais.pop(0)) if parciais else str(self)
+
+    def __str__(self):
+        return f"{self.quantidade}d{self.faces}"
+
+
+_OPERACOES = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    'x': lambda a, b: a * b,
+}
+
+
+class Operacao:
+    __slots__ = ('operador', 'esquerda', 'direita')
+
+    def __init__(self, operador, esquerda, direita):
+        self.operador = operador
+        self.esquerda = esquerda
+        self.direita = direita
+
+    def rolar(self, rng, parciais=None):
+        return _OPERACOES[self.operador](self.esquerda.rolar(rng, parciais), self.direita.rolar(rng, parciais))
+
+    def rolar_lote(self, n, gerador):
+        return _OPERACOES[self.operador](self.esquerda.rolar_lote(n, gerador), self.direita.rolar_lote(n, gerador))
+
+    def pmf(self):
+        op = _OPERACOES[self.operador]
+        resultado = {}
+        direita = self.direita.pmf()
+        for a, pa in self.esquerda.pmf().items():
+            for b, pb in direita.items():
+                v = op(a, b)
+                resultado[v] = resultado.get(v, 0) + pa * pb
+        return resultado
+
+    def descrever(self, parciais):
+        return f"{self.esquerda.descrever(parciais)} {self.operador} {self.direita.descrever(parciais)}"
+
+    def __str__(self):
+        return f"{self.esquerda}{self.operador}{self.direita}"
+
+
+def _contagens_dados(quantidade, faces):
+    """Número de combinações para cada soma de 'quantidade' dados de 'faces' lados."""
+    contagens = [1]
+    for _ in range(quantidade):
+        novo = [0] * (len(contagens) + faces - 1)
+        for i, c in enumerate(contagens):
+            if c:
+                for j in range(i, i + faces):
+                    novo[j] += c
+        contagens = novo
+    return contagens
+
+
+# ========== DISTRIBUIÇÃO EXATA ==========
+
+class Distribuicao:
+    """Distribuição exata (PMF com frações) de uma expressão de dados."""
+    __slots__ = ('pmf', 'minimo', 'maximo', 'media')
+
+    def __init__(self, pmf):
+        self.pmf = dict(sorted(pmf.items()))
+        self.minimo = min(self.pmf)
+        self.maximo = max(self.pmf)
+        self.media = sum(v * p for v, p in self.pmf.items())
+
+    def probabilidade(self, valor):
+        return self.pmf.get(valor, Fraction(0))
+
+    def como_dict(self):
+        """Versão serializável (floats) para respostas JSON."""
+        return {
+            'minimo': self.minimo, 'maximo': self.maximo, 'media': float(self.media),
+            'pmf': {str(v): float(p) for v, p in self.pmf.items()}
+        }
+
+
+# ========== EXPRESSÃO COMPILADA ==========
+
+class ExpressaoDados:
+    """
+    Expressão de dados compilada (ex: "2d4+1", "1d6x100", "2d6+1x100").
+    Os operadores são avaliados da esquerda para a direita, como nas tabelas
+    do livro: "2d6+1x100" = (2d6+1) x 100.
+    """
+    __slots__ = ('texto', 'arvore', '_distribuicao')
+
+    def __init__(self, texto, arvore):
+        self.texto = texto
+        self.arvore = arvore
+        self._distribuicao = None
+
+    def rolar(self, rng=random):
+        return self.arvore.rolar(rng)
+
+    def rolar_detalhado(self, rng=random):
+        """Retorna (total, texto) com o valor de cada parada, ex: (700, "7 x 100")."""
+        parciais = []
+        total = self.arvore.rolar(rng, parciais)
+        return total, self.arvore.descrever(parciais)
+
+    def rolar_lote(self, n, gerador=None):
+        """Rola a expressão n vezes de uma vez (ndarray). Requer NumPy."""
+        np = numpy_opcional()
+        if np is None:
+            raise RuntimeError("NumPy não está instalado.")
+        gerador = gerador if gerador is not None else np.random.default_rng(random.getrandbits(64))
+        return self.arvore.rolar_lote(n, gerador)
+
+    def distribuicao(self):
+        """Distribuição exata (mínimo, máximo, média e PMF)."""
+        if self._distribuicao is None:
+            self._distribuicao = Distribuicao(self.arvore.pmf())
+        return self._distribuicao
+
+    def __str__(self):
+        return self.texto
+
+    def __repr__(self):
+        return f"ExpressaoDados({self.texto!r})"
+
+
+def _analisar(texto):
+    """Analisa o maior prefixo válido de 'texto'. Retorna (árvore ou None, posição final)."""
+    pos = 0; arvore = None; operador = None; fim_valido = 0
+    while True:
+        m = _TOKENS.match(texto, pos)
+        if not m:
+            break
+        qtd, faces, numero, op = m.groups()
+        if op is not None:
+            if arvore is None or operador is not None:
+                break
+            operador = 'x' if op in 'xX*' else op
+        else:
+            termo = Dados(int(qtd or 1), int(faces)) if faces is not None else Constante(int(numero))
+            if arvore is None:
+                arvore = termo
+            elif operador is not None:
+                arvore = Operacao(operador, arvore, termo)
+            else:
+                break
+            operador = None
+            fim_valido = m.end()
+        pos = m.end()
+    return arvore, fim_valido
+
+
+@lru_cache(maxsize=2048)
+def compilar(texto):
+    """Compila uma expressão completa. Levanta ValueError se houver sobras."""
+    arvore, fim = _analisar(texto)
+    if arvore is None or texto[fim:].strip():
+        raise ValueError(f"Expressão de dados inválida: '{texto}'")
+    return ExpressaoDados(texto.strip(), arvore)
+
+
+@lru_cache(maxsize=2048)
+def compilar_prefixo(texto):
+    """
+    Compila a expressão no início do texto e devolve (expressão, resto),
+    ex: "4d6 riquezas" -> (4d6, "riquezas"). Sem expressão: (None, texto).
+    """
+    arvore, fim = _analisar(texto)
+    if arvore is None:
+        return None, texto
+    return ExpressaoDados(texto[:fim].strip(), arvore), texto[fim:].strip()
+
+
+def rolar(texto, rng=random):
+    """Atalho: compila (com cache) e rola uma expressão."""
+    return compilar(texto).rolar(rng)
+
+
+def resolver_dados_em_texto(texto, rng=random):
+    """Encontra e rola todas as notações de dado (ex: "1d6", "1d4-1") em uma string."""
+    def _rolar(match):
+        total = compilar(match.group(0)).rolar(rng)
+        if match.group(4) == '-':
+            total = max(1, total)  # Garante que não seja menor que 1
+        return f"{match.group(0)} (rolado {total})"
+    return PADRAO_DADOS_TEXTO.sub(_rolar, texto)
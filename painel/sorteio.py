@@ -0,0 +1,224 @@
+import heapq
+import math
+import random
+import weakref
+from bisect import bisect_left
+from itertools import accumulate
+
+from .opcional import numpy_opcional
+from .tabelas import DictImutavel, ListaImutavel
+
+
+# ========== TABELA DE PESOS (MÉTODO ALIAS DE VOSE) ==========
+
+class TabelaPesos:
+    """
+    Tabela de pesos pré-compilada para sorteio em O(1) (método alias de Vose).
+
+    Semântica única para todos os blueprints:
+      - a chance de cada opção é peso / soma dos pesos;
+      - opções com peso <= 0 nunca são sorteadas;
+      - se nenhum peso for positivo, o sorteio é uniforme entre todas as opções.
+    """
+    __slots__ = ('opcoes', 'pesos', 'total', '_indices', '_prob', '_alias', '_np_cache')
+
+    def __init__(self, opcoes, pesos):
+        opcoes = list(opcoes)
+        pesos = [float(p) if p and p > 0 else 0.0 for p in pesos]
+        if len(opcoes) != len(pesos):
+            raise ValueError("Quantidade de opções e de pesos diferente.")
+        self.opcoes = opcoes
+        self.pesos = pesos
+        self.total = math.fsum(pesos)
+        self._np_cache = None
+
+        if self.total > 0:
+            indices = [i for i, p in enumerate(pesos) if p > 0]
+        else:
+            indices = list(range(len(opcoes)))
+        self._indices = indices
+        n = len(indices)
+        if n == 0:
+            self._prob, self._alias = [], []
+            return
+
+        # Probabilidades escaladas para média 1
+        if self.total > 0:
+            escala = [pesos[i] * n / self.total for i in indices]
+        else:
+            escala = [1.0] * n
+        prob = [0.0] * n
+        alias = list(range(n))
+        pequenos = [i for i, p in enumerate(escala) if p < 1.0]
+        grandes = [i for i, p in enumerate(escala) if p >= 1.0]
+        while pequenos and grandes:
+            p = pequenos.pop(); g = grandes.pop()
+            prob[p] = escala[p]; alias[p] = g
+            escala[g] = (escala[g] + escala[p]) - 1.0
+            (pequenos if escala[g] < 1.0 else grandes).append(g)
+        # Sobras só existem por arredondamento: ficam com probabilidade 1
+        for i in grandes + pequenos:
+            prob[i] = 1.0
+        self._prob, self._alias = prob, alias
+
+    @classmethod
+    def de_dict(cls, opcoes_dict):
+        """Compila um dicionário {"opção": peso}."""
+        return cls(opcoes_dict.keys(), opcoes_dict.values())
+
+    def __len__(self):
+        return len(self.opcoes)
+
+    def __bool__(self):
+        return bool(self._indices)
+
+    def chance(self, opcao):
+        """Probabilidade exata (float) de uma opção."""
+        if not self._indices:
+            return 0.0
+        if self.total > 0:
+            return sum(p for o, p in zip(self.opcoes, self.pesos) if o == opcao) / self.total
+        return sum(1 for o in self.opcoes if o == opcao) / len(self.opcoes)
+
+    # --- Sorteios individuais ---
+
+    def sortear_indice(self, rng=random):
+        """Índice da opção sorteada (um único número aleatório por sorteio)."""
+        n = len(self._indices)
+        if n == 0:
+            raise IndexError("Tabela de pesos vazia.")
+        u = rng.random() * n
+        i = int(u)
+        if i >= n:  # u == n só por arredondamento
+            i = n - 1
+        if (u - i) >= self._prob[i]:
+            i = self._alias[i]
+        return self._indices[i]
+
+    def sortear(self, rng=random):
+        """Sorteia uma opção."""
+        return self.opcoes[self.sortear_indice(rng)]
+
+    def sortear_k(self, k, rng=random):
+        """Sorteia k opções com reposição."""
+        opcoes = self.opcoes
+        return [opcoes[self.sortear_indice(rng)] for _ in range(k)]
+
+    def sortear_sem_reposicao(self, k, rng=random):
+        """
+        Sorteia k opções distintas (Efraimidis-Spirakis: chave = log(u) / peso).
+        Levanta ValueError se k for maior que o número de opções sorteáveis.
+        """
+        indices = self._indices
+        if k > len(indices):
+            raise ValueError(f"Não há {k} opções sorteáveis (apenas {len(indices)}).")
+        if k <= 0:
+            return []
+        if self.total <= 0:
+            return [self.opcoes[i] for i in rng.sample(indices, k)]
+        pesos = self.pesos
+        chaves = ((math.log(1.0 - rng.random()) / pesos[i], i) for i in indices)
+        return [self.opcoes[i] for _, i in heapq.nlargest(k, chaves)]
+
+    # --- Sorteio em lote (NumPy opcional) ---
+
+    def _arrays(self):
+        np = numpy_opcional()
+        if self._np_cache is None:
+            self._np_cache = (np.asarray(self._indices, dtype=np.int64),
+                              np.asarray(self._prob, dtype=np.float64),
+                              np.asarray(self._alias, dtype=np.int64))
+        return self._np_cache
+
+    def sortear_indices_lote(self, n, gerador=None):
+        """
+        Sorteia n índices de uma vez. Com NumPy devolve um ndarray (vetorizado);
+        sem NumPy devolve uma lista. 'gerador' é um numpy.random.Generator ou,
+        no modo sem NumPy, um random.Random.
+        """
+        if not self._indices:
+            raise IndexError("Tabela de pesos vazia.")
+        np = numpy_opcional()
+        if np is None:  # Sem NumPy os lotes caem no laço em Python
+            rng = gerador or random
+            return [self.sortear_indice(rng) for _ in range(n)]
+        gerador = gerador if gerador is not None else gerador_numpy()
+        indices, prob, alias = self._arrays()
+        u = gerador.random(n) * len(indices)
+        i = np.minimum(u.astype(np.int64), len(indices) - 1)
+        i = np.where((u - i) < prob[i], i, alias[i])
+        return indices[i]
+
+    def sortear_lote(self, n, gerador=None):
+        """Sorteia n opções (com reposição) usando o caminho vetorizado quando disponível."""
+        opcoes = self.opcoes
+        return [opcoes[i] for i in self.sortear_indices_lote(n, gerador)]
+
+
+def gerador_numpy(rng=random):
+    """numpy.random.Generator semeado a partir do 'random' (mantém reprodutibilidade com random.seed)."""
+    np = numpy_opcional()
+    if np is None:
+        raise RuntimeError("NumPy não está instalado.")
+    return np.random.default_rng(rng.getrandbits(64))
+
+
+# ========== TABELA CUMULATIVA (ROLAGENS EM FAIXAS, EX: d100) ==========
+
+class TabelaCumulativa:
+    """
+    Tabela de faixas pré-compilada: cada opção ocupa 'peso' valores consecutivos
+    a partir de 1. localizar(valor) usa bisect em O(log n).
+    """
+    __slots__ = ('opcoes', 'limites')
+
+    def __init__(self, opcoes, pesos):
+        self.opcoes = list(opcoes)
+        self.limites = list(accumulate(pesos))
+
+    @classmethod
+    def de_dict(cls, opcoes_dict):
+        return cls(opcoes_dict.keys(), opcoes_dict.values())
+
+    def localizar(self, valor):
+        """Opção cuja faixa contém 'valor'; acima do total devolve a última opção."""
+        if not self.opcoes:
+            return None
+        i = bisect_left(self.limites, valor)
+        return self.opcoes[i] if i < len(self.opcoes) else self.opcoes[-1]
+
+
+# ========== CACHE DE COMPILAÇÃO ==========
+
+_CACHE = {}
+
+
+def _chaves_pesos_dict(opcoes):
+    return opcoes.keys(), opcoes.values()
+
+
+def compilar(opcoes, extrator=None, classe=TabelaPesos):
+    """
+    Compila 'opcoes' numa tabela de sorteio. 'extrator(opcoes) -> (chaves, pesos)'
+    adapta formatos diferentes do padrão {"opção": peso}.
+
+    Tabelas imutáveis do registro são compiladas uma única vez (cache por objeto);
+    dicionários comuns são compilados a cada chamada. 'extrator' deve ser uma
+    função de módulo (ela faz parte da chave do cache).
+    """
+    extrator = extrator or _chaves_pesos_dict
+    if not isinstance(opcoes, (DictImutavel, ListaImutavel)):
+        return classe(*extrator(opcoes))
+    chave = (id(opcoes), extrator, classe)
+    entrada = _CACHE.get(chave)
+    if entrada is not None and entrada[0]() is opcoes:
+        return entrada[1]
+    tabela = classe(*extrator(opcoes))
+    ref = weakref.ref(opcoes, lambda _r, c=chave: _CACHE.pop(c, None))
+    _CACHE[chave] = (ref, tabela)
+    return tabela
+
+
+def sortear(opcoes, rng=random, extrator=None):
+    """Sorteia uma chave de {"opção": peso} com a semântica de TabelaPesos."""
+    return compilar(opcoes, extrator).sortear(rng)
@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+import time
+
+# ========== ESTRUTURAS IMUTÁVEIS ==========
+
+def _bloqueado(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} é somente leitura (tabela compartilhada do registro).")
+
+
+class DictImutavel(dict):
+    """Dicionário somente leitura. Continua sendo um 'dict' para isinstance e jsonify."""
+    __slots__ = ('__weakref__',)
+
+    __setitem__ = __delitem__ = __ior__ = _bloqueado
+    clear = pop = popitem = setdefault = update = _bloqueado
+
+    def __reduce__(self):
+        return (DictImutavel, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class ListaImutavel(list):
+    """Lista somente leitura. Continua sendo uma 'list' para isinstance e concatenação."""
+    __slots__ = ('__weakref__',)
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _bloqueado
+    append = extend = insert = remove = pop = clear = sort = reverse = _bloqueado
+
+    def __reduce__(self):
+        return (ListaImutavel, (list(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def congelar(valor):
+    """Converte recursivamente dicts/listas de um JSON em estruturas imutáveis."""
+    if isinstance(valor, dict):
+        return DictImutavel((k, congelar(v)) for k, v in valor.items())
+    if isinstance(valor, list):
+        return ListaImutavel(congelar(v) for v in valor)
+    return valor
+
+
+def descongelar(valor):
+    """Cópia profunda e mutável de uma tabela (para quem precisa alterar os dados)."""
+    if isinstance(valor, dict):
+        return {k: descongelar(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [descongelar(v) for v in valor]
+    return valor
+
+
+# ========== REGISTRO DE TABELAS ==========
+
+class RegistroTabelas:
+    """
+    Guarda em memória todas as tabelas JSON dos blueprints, lidas uma única vez.
+    Cada tabela é revalidada pelo mtime do arquivo no máximo a cada
+    'intervalo_revalidacao' segundos (None desativa a revalidação).
+    """
+
+    def __init__(self, raizes, ignorar=(), intervalo_revalidacao=5.0, pacote=None):
+        self.raizes = [os.path.abspath(r) for r in raizes]
+        self.ignorar = [os.path.abspath(p) for p in ignorar]
+        self.intervalo_revalidacao = intervalo_revalidacao
+        self._entradas = {}      # caminho -> [mtime_ns, dados, verificado_em]
+        self._por_nome = {}      # (raiz, nome_arquivo) -> caminho
+        self._lock = threading.RLock()
+        self.completo = False    # True depois que carregar_tudo() varreu todas as raízes
+        self.pacote = pacote     # PacoteDados (painel.pacote): tabelas decodificadas sob demanda
+        if pacote is not None:
+            self._indexar_pacote()
+
+    def _indexar_pacote(self):
+        for caminho in sorted(self.pacote.caminhos()):
+            for raiz in self.raizes:
+                if caminho.startswith(raiz + os.sep) and not self._ignorado(caminho):
+                    self._por_nome.setdefault((raiz, os.path.basename(caminho)), caminho)
+                    break
+        # O índice do pacote já descreve todas as tabelas: nada a varrer no disco
+        self.completo = True
+
+    def _ignorado(self, caminho):
+        return any(caminho == p or caminho.startswith(p + os.sep) for p in self.ignorar)
+
+    def _ler_do_pacote(self, caminho):
+        dados = congelar(self.pacote.ler(caminho))
+        self._entradas[caminho] = [self.pacote.mtime(caminho), dados, time.monotonic()]
+        return dados
+
+    def _ler(self, caminho):
+        mtime = os.stat(caminho).st_mtime_ns
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = congelar(json.load(f))
+        self._entradas[caminho] = [mtime, dados, time.monotonic()]
+        return dados
+
+    def carregar_tudo(self):
+        """
+        Lê e congela todos os .json das raízes. Retorna quantas tabelas foram carregadas.
+        Com pacote de dados não é necessário: as tabelas são decodificadas no primeiro uso.
+        """
+        total = 0
+        with self._lock:
+            for raiz in self.raizes:
+                for pasta, subpastas, arquivos in os.walk(raiz):
+                    subpastas[:] = [d for d in subpastas if not d.startswith(('.', '__'))
+                                    and not self._ignorado(os.path.join(pasta, d))]
+                    for nome in arquivos:
+                        if not nome.endswith('.json'):
+                            continue
+                        caminho = os.path.join(pasta, nome)
+                        self._por_nome.setdefault((raiz, nome), caminho)
+                        if caminho in self._entradas:
+                            continue  # Já lida sob demanda antes da varredura
+                        try:
+                            self._ler(caminho)
+                            total += 1
+                        except (OSError, json.JSONDecodeError) as e:
+                            print(f"[REGISTRO] Falha ao carregar '{caminho}': {e}")
+            self.completo = True
+        return total
+
+    def _revalidar(self, caminho, entrada):
+        if self.intervalo_revalidacao is None:
+            return entrada[1]
+        agora = time.monotonic()
+        if agora - entrada[2] < self.intervalo_revalidacao:
+            return entrada[1]
+        try:
+            mtime = os.stat(caminho).st_mtime_ns
+        except FileNotFoundError:
+            self._entradas.pop(caminho, None)
+            raise
+        if mtime != entrada[0]:
+            return self._ler(caminho)
+        entrada[2] = agora
+        return entrada[1]
+
+    def obter(self, caminho):
+        """
+        Retorna a tabela (imutável) do arquivo JSON em 'caminho'.
+        Levanta FileNotFoundError/JSONDecodeError como json.load faria.
+        """
+        caminho = os.path.abspath(caminho)
+        entrada = self._entradas.get(caminho)
+        if entrada is not None:
+            if self.intervalo_revalidacao is not None and time.monotonic() - entrada[2] >= self.intervalo_revalidacao:
+                with self._lock:
+                    return self._revalidar(caminho, entrada)
+            return entrada[1]
+        with self._lock:
+            if self.pacote is not None and caminho in self.pacote:
+                return self._ler_do_pacote(caminho)
+            # Arquivo criado depois da carga inicial (ou fora das raízes)
+            return self._ler(caminho)
+
+    def existe(self, caminho):
+        """Indica se há uma tabela registrada (ou em disco) nesse caminho."""
+        caminho = os.path.abspath(caminho)
+        return (caminho in self._entradas or (self.pacote is not None and caminho in self.pacote)
+                or os.path.exists(caminho))
+
+    def procurar(self, nome_arquivo, pasta):
+        """Localiza um arquivo pelo nome dentro de 'pasta' (substitui os.walk por busca)."""
+        pasta = os.path.abspath(pasta)
+        for raiz in self.raizes:
+            if pasta == raiz or pasta.startswith(raiz + os.sep):
+                caminho = self._por_nome.get((raiz, nome_arquivo))
+                if caminho and caminho.startswith(pasta + os.sep):
+                    return caminho
+        for pasta_raiz, _, arquivos in os.walk(pasta):
+            if nome_arquivo in arquivos:
+                return os.path.join(pasta_raiz, nome_arquivo)
+        return None
+
+    def listar(self, pasta, extensao='.json'):
+        """Nomes dos arquivos registrados diretamente dentro de 'pasta'."""
+        pasta = os.path.abspath(pasta)
+        if not self.completo:
+            # Carga inicial ainda em andamento (aquecimento em segundo plano): consulta o disco
+            try:
+                return sorted(f for f in os.listdir(pasta) if f.endswith(extensao))
+            except FileNotFoundError:
+                return []
+        conhecidos = set(self._entradas)
+        if self.pacote is not None:
+            conhecidos.update(self.pacote.caminhos())
+        return sorted(os.path.basename(c) for c in conhecidos
+                      if os.path.dirname(c) == pasta and c.endswith(extensao))
+
+    def tabelas_carregadas(self):
+        """{caminho: tabela} das tabelas já lidas (para relatórios de memória)."""
+        with self._lock:
+            return {c: e[1] for c, e in self._entradas.items()}
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+# ========== REGISTRO GLOBAL DO PROCESSO ==========
+
+# Pasta raiz do projeto (um nível acima de 'painel/')
+PROJETO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RAIZES_PADRAO = [
+    'destino_npc', 'geracao_encontros', 'geracao_eventos', 'geracao_hex',
+    'geracao_npcs', 'geracao_rumores', 'geracao_tesouros'
+]
+
+# Estado mutável (escrito pelo app), não é tabela
+IGNORAR_PADRAO = [os.path.join('destino_npc', 'datas')]
+
+_registro = None
+_registro_lock = threading.Lock()
+
+
+def iniciar_registro(raizes=None, ignorar=None, intervalo_revalidacao=5.0, carregar=True, pacote=None):
+    """
+    Cria o registro global do processo (chamado pelo create_app).
+    'pacote' é o caminho de um pacote de dados (python -m painel.pacote); se
+    existir, as tabelas vêm dele em vez de centenas de arquivos soltos.
+    """
+    global _registro
+    raizes = raizes or [os.path.join(PROJETO_DIR, r) for r in RAIZES_PADRAO]
+    ignorar = ignorar if ignorar is not None else [os.path.join(PROJETO_DIR, p) for p in IGNORAR_PADRAO]
+    pacote_aberto = None
+    if pacote and os.path.exists(pacote):
+        from .pacote import PacoteDados
+        try:
+            pacote_aberto = PacoteDados(pacote, PROJETO_DIR)
+        except (OSError, ValueError) as e:
+            print(f"[REGISTRO] Pacote de dados ignorado ('{pacote}'): {e}")
+    registro = RegistroTabelas(raizes, ignorar, intervalo_revalidacao, pacote_aberto)
+    if carregar:
+        registro.carregar_tudo()
+    with _registro_lock:
+        _registro = registro
+    return registro
+
+
+def obter_registro():
+    """
+    Retorna o registro global, criando-o na primeira chamada (útil fora do Flask).
+    Sem create_app, as tabelas são lidas sob demanda (carregar_tudo() é opcional).
+    """
+    global _registro
+    if _registro is None:
+        with _registro_lock:
+            if _registro is None:
+                registro = RegistroTabelas([os.path.join(PROJETO_DIR, r) for r in RAIZES_PADRAO],
+                                           [os.path.join(PROJETO_DIR, p) for p in IGNORAR_PADRAO])
+                _registro = registro
+    return _registro
+
+
+def carregar_json(caminho):
+    """Atalho: tabela imutável do arquivo 'caminho' via registro global."""
+    return obter_registro().obter(caminho)